@@ -1,55 +1,219 @@
+import os
+import threading
+import uuid
+from contextlib import contextmanager
 import pandas as pd
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+class PostgresConnectionPool:
+    """Thread-safe pool of PostgreSQL connections with health-checked checkout.
+
+    Every checkout runs a cheap liveness query; dead connections are discarded and
+    replaced with fresh ones, so a dropped server connection heals on the next use.
+    When all maxconn connections are in use, checkout waits up to timeout seconds
+    for one to be returned instead of failing at once.
+    """
+
+    def __init__(self, dbname, user, password, host, port, minconn=1, maxconn=10, timeout=30.0):
+        self.params = dict(dbname=dbname, user=user, password=password, host=host, port=port)
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        # ThreadedConnectionPool raises PoolError when exhausted; one slot per connection makes callers queue
+        self.slots = threading.BoundedSemaphore(maxconn)
+        self.pool = ThreadedConnectionPool(minconn, maxconn, **self.params)
+
+    @staticmethod
+    def is_alive(conn):
+        """Check that a connection can still reach the server."""
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self, timeout=None):
+        """Check out a live connection, reconnecting past any dead ones.
+
+        Waits up to timeout (default self.timeout) seconds for a free connection
+        and raises PoolError if none is returned in time.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if not self.slots.acquire(timeout=timeout):
+            raise PoolError(f"No connection became free within {timeout}s (maxconn={self.maxconn}).")
+        try:
+            for _ in range(self.maxconn + 1):
+                conn = self.pool.getconn()
+                if self.is_alive(conn):
+                    return conn
+                self.pool.putconn(conn, close=True)
+            raise psycopg2.OperationalError("Could not obtain a live connection from the pool.")
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn):
+        """Return a connection, rolling back anything left open or discarding it if broken."""
+        discard = bool(conn.closed)
+        if not discard and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        try:
+            self.pool.putconn(conn, close=discard)
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a live connection for the duration of a with-block."""
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        if not self.pool.closed:
+            self.pool.closeall()
+
+# Pools shared by every PostgresConnection, the dashboard and scripts in a process
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(dbname, user, password, host, port, minconn=1, maxconn=10):
+    """Return the process-wide pool for these connection details and size, creating it once."""
+    key = (dbname, user, password, host, str(port), minconn, maxconn)
+    with _pools_lock:
+        if key not in _pools or _pools[key].pool.closed:
+            _pools[key] = PostgresConnectionPool(dbname, user, password, host, port, minconn, maxconn)
+        return _pools[key]
+
+def close_pools():
+    """Close every shared pool, e.g. at interpreter shutdown."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
 
 class PostgresConnection:
-    def __init__(self, dbname, user, password, host, port):
-        
-        self.dbname = dbname
-        self.user = user
-        self.password = password
-        self.host = host
-        self.port = port
+    def __init__(self, dbname=None, user=None, password=None, host=None, port=None,
+                 pooled=True, minconn=1, maxconn=10):
+        # Fall back to the DB_* variables that load_env() reads from .env
+        self.dbname = dbname or os.getenv('DB_NAME')
+        self.user = user or os.getenv('DB_USER')
+        self.password = password or os.getenv('DB_PASSWORD')
+        self.host = host or os.getenv('DB_HOST')
+        self.port = port or os.getenv('DB_PORT')
+        self.pooled = pooled
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.pool = None
         self.conn = None
 
     def connect(self):
         try:
-            self.conn = psycopg2.connect(
-                dbname=self.dbname,
-                user=self.user,
-                password=self.password,
-                host=self.host,
-                port=self.port
-            )
+            if self.pooled:
+                self.pool = get_pool(self.dbname, self.user, self.password, self.host, self.port,
+                                     minconn=self.minconn, maxconn=self.maxconn)
+            else:
+                self.conn = psycopg2.connect(
+                    dbname=self.dbname,
+                    user=self.user,
+                    password=self.password,
+                    host=self.host,
+                    port=self.port
+                )
             print("Connected to PostgreSQL Database!")
         except Exception as e:
             print(f"Error connecting to database: {e}")
 
+    @contextmanager
+    def connection(self):
+        """Yield a live connection: borrowed from the shared pool, or the dedicated one.
+
+        A dedicated connection that has been closed underneath us is reopened.
+        Yields None when connect() has not succeeded.
+        """
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            if self.conn is not None and self.conn.closed:
+                self.connect()
+            yield self.conn
+
     def execute_query(self, query, fetch=False):
         try:
-            if self.conn:
-                with self.conn.cursor() as cursor:
-                    cursor.execute(query)
-                    if fetch:
-                        return cursor.fetchall()
-                    self.conn.commit()
-            else:
-                print("No connection found.")
+            with self.connection() as conn:
+                if conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute(query)
+                        if fetch:
+                            return cursor.fetchall()
+                        conn.commit()
+                else:
+                    print("No connection found.")
         except Exception as e:
             print(f"Error executing query: {e}")
 
-    def fetch_data(self, query):
+    def fetch_data(self, query, params=None):
         """Fetch data from the database and return as a DataFrame."""
         try:
-            if self.conn:
-                return pd.read_sql_query(query, self.conn)
-            else:
-                print("No connection found.")
-                return None
+            with self.connection() as conn:
+                if conn:
+                    return pd.read_sql_query(query, conn, params=params)
+                else:
+                    print("No connection found.")
+                    return None
         except Exception as e:
             print(f"Error fetching data: {e}")
             return None
 
+    def fetch_chunks(self, query, chunk_rows=50000, params=None):
+        """Stream query results as DataFrames of at most chunk_rows rows.
+
+        A named (server-side) cursor keeps the result set on the server, so only
+        one chunk is held in client memory at a time. Errors are raised rather than
+        ending the stream early, since a truncated stream looks like a complete one.
+        """
+        with self.connection() as conn:
+            if not conn:
+                raise psycopg2.OperationalError("No connection found; call connect() first.")
+            cursor_name = f"xdr_stream_{uuid.uuid4().hex}"
+            try:
+                with conn.cursor(name=cursor_name) as cursor:
+                    cursor.itersize = chunk_rows
+                    cursor.execute(query, params)
+                    while True:
+                        rows = cursor.fetchmany(chunk_rows)
+                        if not rows:
+                            break
+                        columns = [desc[0] for desc in cursor.description]
+                        yield pd.DataFrame.from_records(rows, columns=columns)
+                # Named cursors live inside a transaction; end it to release the snapshot
+                conn.commit()
+            except GeneratorExit:
+                # The consumer stopped early; close out the transaction before leaving
+                conn.rollback()
+                raise
+            except Exception as e:
+                conn.rollback()
+                print(f"Error fetching data: {e}")
+                raise
+
     def close(self):
         if self.conn:
             self.conn.close()
             print("Connection closed.")
+        elif self.pool is not None:
+            # The pool is shared with other users in this process; just detach from it
+            self.pool = None
+            print("Connection closed.")
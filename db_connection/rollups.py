@@ -0,0 +1,314 @@
+import time
+from datetime import datetime, timedelta
+
+# Small summary tables kept next to xdr_data so dashboard pages never scan the raw table.
+# NULL handset values are stored as '' because they cannot take part in a primary key.
+ROLLUP_DDL = """
+CREATE TABLE IF NOT EXISTS xdr_rollup_state (
+    source TEXT PRIMARY KEY,
+    watermark TIMESTAMP,
+    refreshed_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS xdr_subscriber_rollup (
+    "MSISDN/Number" DOUBLE PRECISION PRIMARY KEY,
+    session_count BIGINT NOT NULL,
+    duration_sum DOUBLE PRECISION NOT NULL,
+    duration_count BIGINT NOT NULL,
+    dl_bytes DOUBLE PRECISION NOT NULL,
+    ul_bytes DOUBLE PRECISION NOT NULL,
+    last_start TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS xdr_subscriber_rollup_sessions_idx
+    ON xdr_subscriber_rollup (session_count DESC);
+CREATE INDEX IF NOT EXISTS xdr_subscriber_rollup_duration_idx
+    ON xdr_subscriber_rollup (duration_sum DESC);
+CREATE INDEX IF NOT EXISTS xdr_subscriber_rollup_avg_duration_idx
+    ON xdr_subscriber_rollup ((duration_sum / NULLIF(duration_count, 0)) DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS xdr_subscriber_rollup_data_idx
+    ON xdr_subscriber_rollup ((dl_bytes + ul_bytes) DESC);
+
+CREATE TABLE IF NOT EXISTS xdr_handset_rollup (
+    "Handset Type" TEXT NOT NULL,
+    "Handset Manufacturer" TEXT NOT NULL,
+    session_count BIGINT NOT NULL,
+    PRIMARY KEY ("Handset Type", "Handset Manufacturer")
+);
+
+-- Keys of recently folded xDRs, so rows re-read inside the lookback window count once
+CREATE TABLE IF NOT EXISTS xdr_rollup_folded (
+    source TEXT NOT NULL,
+    "MSISDN/Number" DOUBLE PRECISION,
+    "Bearer Id" DOUBLE PRECISION,
+    start_ts TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS xdr_rollup_folded_start_idx ON xdr_rollup_folded (source, start_ts);
+"""
+
+# xdr_data stores "Start" as text ('4/4/2019 07:05' in the export, ISO from other
+# loaders). A cast to timestamp depends on DateStyle, so it is not IMMUTABLE and cannot
+# be indexed; this parser reads both layouts without any session setting, so
+# "Start" range filters and ordering go through the xdr_data_start_ts_idx index.
+START_TS_DDL = """
+CREATE OR REPLACE FUNCTION xdr_start_ts(start TEXT) RETURNS TIMESTAMP AS $$
+    SELECT CASE
+        WHEN start ~ '^[0-9]{4}-' THEN make_timestamp(
+            substr(start, 1, 4)::int, substr(start, 6, 2)::int, substr(start, 9, 2)::int,
+            COALESCE(NULLIF(substr(start, 12, 2), '')::int, 0),
+            COALESCE(NULLIF(substr(start, 15, 2), '')::int, 0),
+            COALESCE(NULLIF(substr(start, 18), '')::float8, 0))
+        ELSE make_timestamp(
+            split_part(split_part(start, ' ', 1), '/', 3)::int,
+            split_part(start, '/', 1)::int,
+            split_part(start, '/', 2)::int,
+            COALESCE(NULLIF(split_part(split_part(start, ' ', 2), ':', 1), '')::int, 0),
+            COALESCE(NULLIF(split_part(split_part(start, ' ', 2), ':', 2), '')::int, 0),
+            COALESCE(NULLIF(split_part(split_part(start, ' ', 2), ':', 3), '')::float8, 0))
+    END
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+"""
+START_TS = 'xdr_start_ts("Start")'
+START_TS_INDEX = f'CREATE INDEX CONCURRENTLY IF NOT EXISTS xdr_data_start_ts_idx ON xdr_data ({START_TS})'
+
+# Indexes on the raw xdr_data table are built CONCURRENTLY, one statement at a time and
+# outside any transaction, so creating them never blocks loads into xdr_data.
+XDR_INDEXES = [
+    # Per-session top-10 pages read xdr_data directly; these indexes turn them into index scans
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS xdr_data_avg_rtt_dl_idx ON xdr_data ("Avg RTT DL (ms)" DESC NULLS LAST)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS xdr_data_avg_rtt_ul_idx ON xdr_data ("Avg RTT UL (ms)" DESC NULLS LAST)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS xdr_data_avg_tp_dl_idx ON xdr_data ("Avg Bearer TP DL (kbps)" DESC NULLS LAST)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS xdr_data_avg_tp_ul_idx ON xdr_data ("Avg Bearer TP UL (kbps)" DESC NULLS LAST)',
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS xdr_data_experience_score_idx ON xdr_data (
+    ("Avg RTT DL (ms)" + "Avg RTT UL (ms)" + "Avg Bearer TP DL (kbps)" + "Avg Bearer TP UL (kbps)") DESC NULLS LAST)""",
+]
+
+# A version counter bumped by every statement that writes to xdr_data, for caches of
+# queries that read it directly. The trigger runs once per statement, not per row, and
+# inside the writing transaction, so a committed change is always visible with it;
+# concurrent loads serialize on the counter row until they commit.
+CHANGE_TRACKING_DDL = """
+CREATE TABLE IF NOT EXISTS xdr_change_log (
+    source TEXT PRIMARY KEY,
+    version BIGINT NOT NULL,
+    changed_at TIMESTAMP NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION xdr_bump_change_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO xdr_change_log (source, version, changed_at) VALUES (TG_TABLE_NAME, 1, clock_timestamp())
+    ON CONFLICT (source) DO UPDATE SET version = xdr_change_log.version + 1, changed_at = EXCLUDED.changed_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                   WHERE tgname = 'xdr_data_change_version' AND tgrelid = 'xdr_data'::regclass) THEN
+        CREATE TRIGGER xdr_data_change_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON xdr_data
+        FOR EACH STATEMENT EXECUTE FUNCTION xdr_bump_change_version();
+    END IF;
+END;
+$$;
+"""
+
+# xDRs are written when a session ends, so rows for long sessions arrive after the
+# watermark has moved past their Start. Each refresh re-reads this far behind it.
+DEFAULT_LOOKBACK = timedelta(days=1)
+
+LOCK_STEPS = [
+    """
+    INSERT INTO xdr_rollup_state (source, watermark) VALUES (%(source)s, NULL)
+    ON CONFLICT (source) DO NOTHING;
+    """,
+    # Lock the state row so concurrent refreshes cannot double-count a delta
+    """
+    SELECT watermark FROM xdr_rollup_state WHERE source = %(source)s FOR UPDATE;
+    """,
+]
+
+# Run after LOCK_STEPS with %(watermark)s and %(cutoff)s (watermark - lookback) bound.
+# Start predicates use xdr_start_ts() so they match xdr_data_start_ts_idx.
+REFRESH_STEPS = [
+    # Rollups folded before the ledger existed: record the rows already inside the window once
+    """
+    INSERT INTO xdr_rollup_folded (source, "MSISDN/Number", "Bearer Id", start_ts)
+    SELECT %(source)s, "MSISDN/Number", "Bearer Id", xdr_start_ts("Start")
+    FROM xdr_data
+    WHERE "Start" IS NOT NULL
+      AND xdr_start_ts("Start") > %(cutoff)s::timestamp
+      AND xdr_start_ts("Start") <= %(watermark)s::timestamp
+      AND NOT EXISTS (SELECT 1 FROM xdr_rollup_folded WHERE source = %(source)s);
+    """,
+    """
+    CREATE TEMP TABLE xdr_rollup_delta ON COMMIT DROP AS
+    SELECT x."MSISDN/Number", x."Bearer Id", x."Dur. (ms)", x."Total DL (Bytes)", x."Total UL (Bytes)",
+           x."Handset Type", x."Handset Manufacturer", xdr_start_ts(x."Start") AS start_ts
+    FROM xdr_data x
+    WHERE x."Start" IS NOT NULL
+      AND xdr_start_ts(x."Start") > COALESCE(%(cutoff)s::timestamp, '-infinity'::timestamp)
+      AND NOT EXISTS (
+          SELECT 1 FROM xdr_rollup_folded f
+          WHERE f.source = %(source)s
+            AND f.start_ts = xdr_start_ts(x."Start")
+            AND f."MSISDN/Number" IS NOT DISTINCT FROM x."MSISDN/Number"
+            AND f."Bearer Id" IS NOT DISTINCT FROM x."Bearer Id");
+    """,
+    """
+    INSERT INTO xdr_subscriber_rollup AS r
+    SELECT "MSISDN/Number", COUNT(*), COALESCE(SUM("Dur. (ms)"), 0), COUNT("Dur. (ms)"),
+           COALESCE(SUM("Total DL (Bytes)"), 0), COALESCE(SUM("Total UL (Bytes)"), 0), MAX(start_ts)
+    FROM xdr_rollup_delta
+    WHERE "MSISDN/Number" IS NOT NULL
+    GROUP BY "MSISDN/Number"
+    ON CONFLICT ("MSISDN/Number") DO UPDATE SET
+        session_count = r.session_count + EXCLUDED.session_count,
+        duration_sum = r.duration_sum + EXCLUDED.duration_sum,
+        duration_count = r.duration_count + EXCLUDED.duration_count,
+        dl_bytes = r.dl_bytes + EXCLUDED.dl_bytes,
+        ul_bytes = r.ul_bytes + EXCLUDED.ul_bytes,
+        last_start = GREATEST(r.last_start, EXCLUDED.last_start);
+    """,
+    """
+    INSERT INTO xdr_handset_rollup AS r
+    SELECT COALESCE("Handset Type", ''), COALESCE("Handset Manufacturer", ''), COUNT(*)
+    FROM xdr_rollup_delta
+    GROUP BY 1, 2
+    ON CONFLICT ("Handset Type", "Handset Manufacturer") DO UPDATE SET
+        session_count = r.session_count + EXCLUDED.session_count;
+    """,
+    """
+    INSERT INTO xdr_rollup_folded (source, "MSISDN/Number", "Bearer Id", start_ts)
+    SELECT %(source)s, "MSISDN/Number", "Bearer Id", start_ts FROM xdr_rollup_delta;
+    """,
+    # Late rows never move the watermark backwards
+    """
+    UPDATE xdr_rollup_state
+    SET watermark = (SELECT MAX(ts) FROM (
+            SELECT start_ts AS ts FROM xdr_rollup_delta
+            UNION ALL SELECT %(watermark)s::timestamp) AS folded),
+        refreshed_at = CURRENT_TIMESTAMP
+    WHERE source = %(source)s;
+    """,
+    # Rows at or before the cutoff can no longer be re-read
+    """
+    DELETE FROM xdr_rollup_folded WHERE source = %(source)s AND start_ts <= %(cutoff)s::timestamp;
+    """,
+]
+
+# Dashboard queries served from the rollups (or from indexed per-session lookups)
+DASHBOARD_QUERIES = {
+    'top_handsets': """
+        SELECT NULLIF("Handset Type", ''), SUM(session_count) AS "Count" FROM xdr_handset_rollup
+        GROUP BY 1 ORDER BY "Count" DESC LIMIT 10""",
+    'top_manufacturers': """
+        SELECT NULLIF("Handset Manufacturer", ''), SUM(session_count) AS "Count" FROM xdr_handset_rollup
+        GROUP BY 1 ORDER BY "Count" DESC LIMIT 10""",
+    'top_sessions': """
+        SELECT "MSISDN/Number", session_count FROM xdr_subscriber_rollup
+        ORDER BY session_count DESC LIMIT 10""",
+    'top_duration': """
+        SELECT "MSISDN/Number", duration_sum FROM xdr_subscriber_rollup
+        ORDER BY duration_sum DESC LIMIT 10""",
+    'top_avg_duration': """
+        SELECT "MSISDN/Number", duration_sum / NULLIF(duration_count, 0) FROM xdr_subscriber_rollup
+        ORDER BY duration_sum / NULLIF(duration_count, 0) DESC NULLS LAST LIMIT 10""",
+    'top_data': """
+        SELECT "MSISDN/Number", dl_bytes + ul_bytes FROM xdr_subscriber_rollup
+        ORDER BY dl_bytes + ul_bytes DESC LIMIT 10""",
+    'top_rtt_dl': """
+        SELECT "MSISDN/Number", "Avg RTT DL (ms)" FROM xdr_data
+        ORDER BY "Avg RTT DL (ms)" DESC NULLS LAST LIMIT 10""",
+    'top_rtt_ul': """
+        SELECT "MSISDN/Number", "Avg RTT UL (ms)" FROM xdr_data
+        ORDER BY "Avg RTT UL (ms)" DESC NULLS LAST LIMIT 10""",
+    'top_tp_dl': """
+        SELECT "MSISDN/Number", "Avg Bearer TP DL (kbps)" FROM xdr_data
+        ORDER BY "Avg Bearer TP DL (kbps)" DESC NULLS LAST LIMIT 10""",
+    'top_tp_ul': """
+        SELECT "MSISDN/Number", "Avg Bearer TP UL (kbps)" FROM xdr_data
+        ORDER BY "Avg Bearer TP UL (kbps)" DESC NULLS LAST LIMIT 10""",
+    'top_experience_score': """
+        SELECT "MSISDN/Number",
+               "Avg RTT DL (ms)" + "Avg RTT UL (ms)" + "Avg Bearer TP DL (kbps)" + "Avg Bearer TP UL (kbps)"
+        FROM xdr_data
+        ORDER BY ("Avg RTT DL (ms)" + "Avg RTT UL (ms)" + "Avg Bearer TP DL (kbps)" + "Avg Bearer TP UL (kbps)") DESC NULLS LAST
+        LIMIT 10""",
+}
+
+# Changes whenever a statement writes to xdr_data (queries read it directly) or the
+# rollups are refreshed. Both values are single-row lookups, never table scans.
+WATERMARK_QUERY = """
+    SELECT (SELECT version FROM xdr_change_log WHERE source = 'xdr_data'),
+           (SELECT MAX(refreshed_at) FROM xdr_rollup_state)"""
+
+def ensure_rollups(db):
+    """Create the rollup tables, the xdr_data change counter and supporting indexes if they do not exist."""
+    db.execute_query(ROLLUP_DDL)
+    db.execute_query(CHANGE_TRACKING_DDL)
+    db.execute_query(START_TS_DDL)
+    create_indexes_concurrently(db, [START_TS_INDEX] + XDR_INDEXES)
+
+def ensure_start_index(db):
+    """Create the xdr_start_ts() parser and the xdr_data index on it if they do not exist."""
+    db.execute_query(START_TS_DDL)
+    return create_indexes_concurrently(db, [START_TS_INDEX])
+
+def create_indexes_concurrently(db, statements):
+    """Run CREATE INDEX CONCURRENTLY statements, which cannot run inside a transaction."""
+    with db.connection() as conn:
+        if conn is None:
+            print("No connection found.")
+            return False
+        autocommit = conn.autocommit
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+        except Exception as e:
+            print(f"Error creating indexes: {e}")
+            return False
+        finally:
+            conn.autocommit = autocommit
+    return True
+
+def refresh_rollups(db, source='xdr_data', lookback=DEFAULT_LOOKBACK):
+    """Fold xDR rows not yet counted into the rollup tables.
+
+    Rows that started after the stored watermark, or up to lookback before it
+    and not folded yet, are added; xDRs arriving more than lookback late are
+    missed. All steps run in one transaction, so the rollups and watermark
+    always move together. Returns the number of new xDR rows folded in, or None
+    on failure.
+    """
+    start_time = time.perf_counter()
+    with db.connection() as conn:
+        if conn is None:
+            print("No connection found.")
+            return None
+        try:
+            with conn.cursor() as cursor:
+                for step in LOCK_STEPS:
+                    cursor.execute(step, {'source': source})
+                watermark = cursor.fetchone()[0]
+                if isinstance(watermark, str):
+                    # Drivers without a timestamp type return the stored text
+                    watermark = datetime.fromisoformat(watermark)
+                params = {
+                    'source': source,
+                    'watermark': None if watermark is None else watermark.isoformat(sep=' '),
+                    'cutoff': None if watermark is None else (watermark - lookback).isoformat(sep=' ')
+                }
+                for step in REFRESH_STEPS:
+                    cursor.execute(step, params)
+                cursor.execute("SELECT COUNT(*) FROM xdr_rollup_delta;")
+                rows = cursor.fetchone()[0]
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Error refreshing rollups: {e}")
+            return None
+    print(f"Folded {rows} new xDR rows into the rollups in {time.perf_counter() - start_time:.2f}s.")
+    return rows
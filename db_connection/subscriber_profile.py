@@ -0,0 +1,124 @@
+import io
+import time
+
+from db_connection.rollups import create_indexes_concurrently
+
+# One precomputed row per subscriber for the dashboard drill-down, written by
+# script/refresh_profiles.py from the pipeline's subscriber_profile stage.
+PROFILE_COLUMNS = [
+    'MSISDN/Number', 'sessions_frequency', 'session_duration', 'total_traffic', 'engagement_cluster',
+    'avg_tcp_retransmission', 'avg_rtt', 'avg_throughput', 'Handset Type', 'experience_cluster',
+    'engagement_score', 'experience_score', 'satisfaction_score'
+]
+
+PROFILE_DDL = """
+CREATE TABLE IF NOT EXISTS xdr_subscriber_profile (
+    "MSISDN/Number" DOUBLE PRECISION PRIMARY KEY,
+    sessions_frequency BIGINT,
+    session_duration DOUBLE PRECISION,
+    total_traffic DOUBLE PRECISION,
+    engagement_cluster INTEGER,
+    avg_tcp_retransmission DOUBLE PRECISION,
+    avg_rtt DOUBLE PRECISION,
+    avg_throughput DOUBLE PRECISION,
+    "Handset Type" TEXT,
+    experience_cluster INTEGER,
+    engagement_score DOUBLE PRECISION,
+    experience_score DOUBLE PRECISION,
+    satisfaction_score DOUBLE PRECISION,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+"""
+
+# Session history for one subscriber is an index scan over just their rows. Built
+# CONCURRENTLY, like the rollup indexes, so loads into xdr_data are never blocked.
+PROFILE_INDEXES = [
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS xdr_data_msisdn_idx ON xdr_data ("MSISDN/Number")',
+]
+
+PROFILE_QUERY = """
+    SELECT {columns}, updated_at FROM xdr_subscriber_profile
+    WHERE "MSISDN/Number" = %(msisdn)s""".format(columns=', '.join(f'"{col}"' for col in PROFILE_COLUMNS))
+
+SESSION_COLUMNS = [
+    'Bearer Id', 'Start', 'End', 'Dur. (ms)', 'Handset Type', 'Avg RTT DL (ms)', 'Avg RTT UL (ms)',
+    'Avg Bearer TP DL (kbps)', 'Avg Bearer TP UL (kbps)', 'Total DL (Bytes)', 'Total UL (Bytes)'
+]
+
+# Sessions are ordered newest first by (start, bearer id, ctid). NULLs map to the lowest
+# key; 'epoch' rather than '-infinity' because psycopg2 cannot return infinite timestamps.
+# xdr_data has no unique key, so the row's physical location (ctid) breaks ties between
+# sessions with the same start and bearer id. xDRs are append-only; a row updated or
+# moved by VACUUM FULL while someone pages through its subscriber may be shown twice or
+# skipped.
+SESSION_KEY = """COALESCE("Start"::timestamp, 'epoch'::timestamp), COALESCE("Bearer Id", -1)"""
+
+def session_page_query(after=False):
+    """One page of a subscriber's sessions, newest first, plus the sort key of each row.
+
+    With after=True only sessions strictly before the (%(start)s, %(bearer)s,
+    %(ctid)s) key of the previous page's last row are returned, so every page
+    costs the same regardless of how deep it is (no OFFSET).
+    """
+    columns = ', '.join(f'"{col}"' for col in SESSION_COLUMNS)
+    keyset = f"AND ({SESSION_KEY}, ctid) < (%(start)s::timestamp, %(bearer)s, %(ctid)s::tid)" if after else ""
+    width = len(SESSION_COLUMNS)
+    return f"""
+    SELECT {columns}, {SESSION_KEY}, ctid::text
+    FROM xdr_data
+    WHERE "MSISDN/Number" = %(msisdn)s {keyset}
+    ORDER BY {width + 1} DESC, {width + 2} DESC, ctid DESC
+    LIMIT %(limit)s"""
+
+def ensure_profiles(db):
+    """Create the profile table and the xdr_data subscriber index if they do not exist."""
+    db.execute_query(PROFILE_DDL)
+    create_indexes_concurrently(db, PROFILE_INDEXES)
+
+def write_profiles(db, profiles, force=False):
+    """Replace the stored profiles with the given DataFrame in one transaction.
+
+    Rows are copied into a staging table and upserted, and subscribers missing
+    from the new profiles are deleted, so readers never see an empty table.
+    An empty DataFrame (e.g. from a failed upstream load) would delete every
+    profile and is refused unless force is set. Returns the number of profiles
+    written, or None on failure.
+    """
+    if profiles.empty and not force:
+        print("Refusing to replace the subscriber profiles with an empty set; pass force=True to clear them.")
+        return None
+    start_time = time.perf_counter()
+    column_list = ', '.join(f'"{col}"' for col in PROFILE_COLUMNS)
+    updates = ', '.join(f'"{col}" = EXCLUDED."{col}"' for col in PROFILE_COLUMNS[1:])
+    buffer = io.StringIO()
+    profiles[PROFILE_COLUMNS].to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    with db.connection() as conn:
+        if conn is None:
+            print("No connection found.")
+            return None
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                CREATE TEMP TABLE xdr_subscriber_profile_staging
+                (LIKE xdr_subscriber_profile INCLUDING DEFAULTS) ON COMMIT DROP;
+                """)
+                cursor.copy_expert(
+                    f"COPY xdr_subscriber_profile_staging ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+                cursor.execute(f"""
+                INSERT INTO xdr_subscriber_profile ({column_list}, updated_at)
+                SELECT {column_list}, now() FROM xdr_subscriber_profile_staging
+                ON CONFLICT ("MSISDN/Number") DO UPDATE SET {updates}, updated_at = EXCLUDED.updated_at;
+                """)
+                cursor.execute("""
+                DELETE FROM xdr_subscriber_profile p
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM xdr_subscriber_profile_staging s WHERE s."MSISDN/Number" = p."MSISDN/Number");
+                """)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Error writing subscriber profiles: {e}")
+            return None
+    print(f"Wrote {len(profiles)} subscriber profiles in {time.perf_counter() - start_time:.2f}s.")
+    return len(profiles)
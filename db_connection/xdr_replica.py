@@ -0,0 +1,168 @@
+import glob
+import json
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from db_connection.rollups import START_TS
+
+WATERMARK_FILE = '_watermark.json'
+AGGREGATES_FILE = '_subscriber_aggregates.pkl'
+PARTITION_COLUMN = 'start_day'
+PENDING_PREFIX = '_pending-'
+
+def read_watermark(replica_dir):
+    """Return the latest replicated `Start` timestamp, or None for an empty replica."""
+    path = os.path.join(replica_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        value = json.load(f).get('start')
+    return pd.Timestamp(value) if value else None
+
+def write_watermark(replica_dir, watermark, rows):
+    """Atomically record the new watermark after a successful sync."""
+    path = os.path.join(replica_dir, WATERMARK_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'start': watermark.isoformat(), 'rows_synced': rows}, f)
+    os.replace(tmp_path, path)
+
+# xDRs are written when a session ends, so a long session can arrive after shorter
+# ones that started later. Each sync re-reads this far behind the watermark and
+# drops rows already in the replica, identified by these columns.
+DEFAULT_LOOKBACK = pd.Timedelta(days=1)
+DEDUPE_COLUMNS = ['MSISDN/Number', 'Bearer Id', 'Start']
+
+def sync_query(watermark, table='xdr_data', lookback=DEFAULT_LOOKBACK):
+    """Rows that started within lookback of the watermark or later, oldest first, as (query, params).
+
+    The filter and order use the indexed xdr_start_ts() expression (see
+    db_connection.rollups.ensure_start_index), so a sync reads only the new rows
+    from the index instead of scanning and sorting the whole table.
+    """
+    if watermark is None:
+        return f'SELECT * FROM {table} WHERE "Start" IS NOT NULL ORDER BY {START_TS}', None
+    since = (watermark - lookback).to_pydatetime()
+    return f'SELECT * FROM {table} WHERE {START_TS} > %(since)s ORDER BY {START_TS}', {'since': since}
+
+def _key_hashes(frame, columns):
+    """One hash per row of the dedupe columns, independent of the stored dtypes."""
+    keys = pd.DataFrame({
+        col: pd.to_datetime(frame[col]).astype('datetime64[ns]') if col == 'Start' else frame[col].astype('float64')
+        for col in columns
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+def _replicated_keys(replica_dir, since, columns):
+    """Key hashes of replica rows in the partitions from since's day on."""
+    dataset = replica_dataset(replica_dir)
+    if dataset is None or since is None:
+        return set()
+    existing = read_replica(replica_dir, columns=columns, start_day=since.strftime('%Y-%m-%d'))
+    return set(_key_hashes(existing, columns))
+
+def sync_replica(db, replica_dir, table='xdr_data', chunk_rows=50000, lookback=DEFAULT_LOOKBACK, aggregates=None):
+    """Pull rows newer than the stored watermark into the day-partitioned Parquet replica.
+
+    Rows up to lookback older than the watermark are pulled again so late-arriving
+    xDRs are picked up; rows already replicated are skipped. Rows arriving more
+    than lookback late are not. Parts are written under a pending name and only
+    renamed into place, and the watermark advanced, once the whole pull has
+    succeeded. Readers skip names starting with '_', and a failed pull removes
+    its pending parts and re-raises, so the replica is left unchanged.
+
+    aggregates (e.g. a subscriber_aggregates.SubscriberAggregates) has every
+    added row folded in with update() and is saved to AGGREGATES_FILE next to
+    the watermark, so per-subscriber metrics only ever process new rows.
+    Returns the number of rows added.
+    """
+    os.makedirs(replica_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(replica_dir, '*', f'{PENDING_PREFIX}*.parquet')):
+        os.remove(stale)
+
+    watermark = read_watermark(replica_dir)
+    since = None if watermark is None else watermark - lookback
+    run_id = uuid.uuid4().hex
+    pending = []
+    rows = 0
+    new_watermark = watermark
+    seen = None
+    try:
+        query, params = sync_query(watermark, table, lookback)
+        for n, chunk in enumerate(db.fetch_chunks(query, chunk_rows=chunk_rows, params=params)):
+            chunk['Start'] = pd.to_datetime(chunk['Start'])
+            key_columns = [col for col in DEDUPE_COLUMNS if col in chunk.columns]
+            if seen is None:
+                seen = _replicated_keys(replica_dir, since, key_columns)
+            hashes = _key_hashes(chunk, key_columns)
+            fresh = ~pd.Series(hashes).isin(seen).to_numpy()
+            # Duplicates within the pull itself count once too
+            fresh &= ~pd.Series(hashes).duplicated().to_numpy()
+            seen.update(hashes[fresh])
+            chunk = chunk[fresh]
+            if aggregates is not None and len(chunk):
+                aggregates.update(chunk)
+            for day, part in chunk.groupby(chunk['Start'].dt.strftime('%Y-%m-%d')):
+                day_dir = os.path.join(replica_dir, f'{PARTITION_COLUMN}={day}')
+                os.makedirs(day_dir, exist_ok=True)
+                filename = f'{run_id}-{n}.parquet'
+                path = os.path.join(day_dir, f'{PENDING_PREFIX}{filename}')
+                pq.write_table(pa.Table.from_pandas(part, preserve_index=False), path)
+                pending.append((path, os.path.join(day_dir, f'part-{filename}')))
+            rows += len(chunk)
+            if len(chunk):
+                chunk_max = chunk['Start'].max()
+                if new_watermark is None or chunk_max > new_watermark:
+                    new_watermark = chunk_max
+    except Exception:
+        for path, _ in pending:
+            os.remove(path)
+        raise
+
+    for path, final_path in pending:
+        os.replace(path, final_path)
+    if rows:
+        if aggregates is not None:
+            state_path = os.path.join(replica_dir, AGGREGATES_FILE)
+            aggregates.save(f'{state_path}.tmp')
+            os.replace(f'{state_path}.tmp', state_path)
+        write_watermark(replica_dir, new_watermark, rows)
+    print(f"Synced {rows} rows into {replica_dir}.")
+    return rows
+
+def replica_dataset(replica_dir):
+    """Open the replica as a memory-mapped Arrow dataset."""
+    files = sorted(glob.glob(os.path.join(replica_dir, f'{PARTITION_COLUMN}=*', 'part-*.parquet')))
+    if not files:
+        return None
+    # Columns that were all-null in one part are typed `null` there; widen to a common schema
+    schema = pa.unify_schemas([pq.read_schema(f) for f in files], promote_options='permissive')
+    schema = schema.append(pa.field(PARTITION_COLUMN, pa.string()))
+    return ds.dataset(files, schema=schema, format='parquet',
+                      filesystem=pafs.LocalFileSystem(use_mmap=True),
+                      partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive'),
+                      partition_base_dir=replica_dir)
+
+def read_replica(replica_dir, columns=None, start_day=None, end_day=None):
+    """Read xDR rows from the local replica as a DataFrame.
+
+    start_day/end_day ('YYYY-MM-DD', inclusive) prune whole partitions before
+    any file is read.
+    """
+    dataset = replica_dataset(replica_dir)
+    if dataset is None:
+        return pd.DataFrame(columns=columns)
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != PARTITION_COLUMN]
+    day = ds.field(PARTITION_COLUMN)
+    condition = None
+    if start_day is not None:
+        condition = day >= start_day
+    if end_day is not None:
+        condition = (day <= end_day) if condition is None else condition & (day <= end_day)
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
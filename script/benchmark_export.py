@@ -0,0 +1,47 @@
+import sys
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from customer_satisfaction_analysis import export_to_mysql
+
+def benchmark(n_rows=100000, seed=0):
+    """Time the default to_sql export against the chunked, pooled exporter on SQLite."""
+    rng = np.random.default_rng(seed)
+    user_data = pd.DataFrame({
+        'MSISDN/Number': rng.integers(33600000000, 33799999999, n_rows),
+        'engagement_score': rng.random(n_rows),
+        'experience_score': rng.random(n_rows),
+        'satisfaction_score': rng.random(n_rows)
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        start = time.perf_counter()
+        engine = create_engine(url)
+        user_data.to_sql('baseline_scores', con=engine, if_exists='replace', index=False)
+        with engine.connect() as connection:
+            pd.read_sql('SELECT * FROM baseline_scores', connection)
+        engine.dispose()
+        baseline_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = export_to_mysql(user_data, url=url, table='user_satisfaction_scores')
+        export_seconds = time.perf_counter() - start
+
+    return {
+        'rows': n_rows,
+        'baseline_seconds': baseline_seconds,
+        'export_seconds': export_seconds,
+        'verified': result['verified']
+    }
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for key, value in benchmark(n_rows).items():
+        print(f"{key}: {value}")
@@ -0,0 +1,54 @@
+import sys
+import os
+import json
+import argparse
+import subprocess
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+# Modules batch workers and scoring jobs import; none of them may pull in plotting or model fitting
+MODULES = ['utils', 'telecom_experience_analysis', 'customer_satisfaction_analysis', 'scoring_service',
+           'model_store', 'sketches', 'traffic_matrix', 'parallel_groupby', 'pipeline']
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'scipy', 'sklearn', 'plotly', 'sqlalchemy']
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def measure_import(module, repeat=3):
+    """Import module in fresh interpreters; returns the best time and the heavy modules it loaded."""
+    best, heavy = None, []
+    for _ in range(repeat):
+        code = PROBE.format(src=SRC_DIR, module=module, heavy=HEAVY_MODULES)
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best = result['seconds'] if best is None else min(best, result['seconds'])
+        heavy = result['heavy']
+    return {'module': module, 'seconds': best, 'heavy': heavy}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Guard the import time of the headless compute modules.")
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--budget', type=float, default=2.0, help="Maximum seconds per module import.")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for module in args.modules:
+        result = measure_import(module, args.repeat)
+        problems = []
+        if result['seconds'] > args.budget:
+            problems.append(f"over the {args.budget:.2f}s budget")
+        if result['heavy']:
+            problems.append(f"loads {', '.join(result['heavy'])}")
+        failures += bool(problems)
+        print(f"{module:<32} {result['seconds']:8.3f}s  {'; '.join(problems) or 'ok'}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import euclidean
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from customer_satisfaction_analysis import cluster_distances
+
+def row_apply_scores(features, center):
+    """The previous scoring path: one scipy call per row."""
+    return features.apply(lambda row: euclidean(row, center), axis=1).to_numpy()
+
+def benchmark(n_rows=200000, seed=0):
+    """Time row-wise apply against the batched distance computation."""
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame({
+        'Avg RTT DL (ms)': rng.gamma(2.0, 50.0, n_rows),
+        'Avg Bearer TP DL (kbps)': rng.gamma(1.5, 8000.0, n_rows)
+    })
+    centers = features.sample(2, random_state=seed).to_numpy()
+
+    start = time.perf_counter()
+    expected = row_apply_scores(features, centers[0])
+    apply_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    distances = cluster_distances(features, centers)
+    batched_seconds = time.perf_counter() - start
+
+    max_rel_error = float(np.max(np.abs(distances[:, 0] - expected) / np.maximum(expected, 1e-12)))
+    return {
+        'rows': n_rows,
+        'apply_seconds': apply_seconds,
+        'batched_seconds': batched_seconds,
+        'speedup': apply_seconds / batched_seconds,
+        'max_relative_error': max_rel_error
+    }
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    for key, value in benchmark(n_rows).items():
+        print(f"{key}: {value}")
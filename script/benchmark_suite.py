@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from db_connection.rollups import ROLLUP_DDL, DASHBOARD_QUERIES
+from synthetic_xdr import generate_xdr_chunks
+from xdr_schema import apply_schema
+from utils import aggregate_engagement
+from telecom_experience_analysis import clean_data, aggregate_per_customer, perform_clustering
+from customer_satisfaction_analysis import calculate_scores
+from traffic_matrix import TrafficMatrix, app_columns
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(__file__), 'benchmark_history.jsonl')
+
+DASHBOARD_COLUMNS = ['MSISDN/Number', 'Handset Type', 'Handset Manufacturer', 'Dur. (ms)',
+                     'Total DL (Bytes)', 'Total UL (Bytes)', 'Avg RTT DL (ms)', 'Avg RTT UL (ms)',
+                     'Avg Bearer TP DL (kbps)', 'Avg Bearer TP UL (kbps)']
+EXPERIENCE_COLUMNS = ['MSISDN/Number', 'TCP DL Retrans. Vol (Bytes)', 'Avg RTT DL (ms)',
+                      'Avg Bearer TP DL (kbps)', 'Handset Type']
+SCORE_COLUMNS = ['Avg RTT DL (ms)', 'Avg Bearer TP DL (kbps)', 'Avg RTT UL (ms)', 'Avg Bearer TP UL (kbps)']
+# Fixed so results stay comparable across machines; os.cpu_count() would change the workload
+PARALLEL_JOBS = 4
+PARALLEL_CASES = {'aggregate_engagement_parallel', 'aggregate_engagement_parallel_typed', 'aggregate_per_customer_parallel'}
+ENGAGEMENT_COLUMNS = ['MSISDN/Number', 'Bearer Id', 'Dur. (ms)', 'Total UL (Bytes)', 'Total DL (Bytes)']
+
+# The dashboard's rollups as db_connection.rollups.refresh_rollups leaves them after a full
+# refresh, built here with plain SQLite aggregates
+SQLITE_ROLLUPS = [
+    """
+    INSERT INTO xdr_subscriber_rollup
+    SELECT "MSISDN/Number", COUNT(*), COALESCE(SUM("Dur. (ms)"), 0), COUNT("Dur. (ms)"),
+           COALESCE(SUM("Total DL (Bytes)"), 0), COALESCE(SUM("Total UL (Bytes)"), 0), NULL
+    FROM xdr_data WHERE "MSISDN/Number" IS NOT NULL GROUP BY "MSISDN/Number"
+    """,
+    """
+    INSERT INTO xdr_handset_rollup
+    SELECT COALESCE("Handset Type", ''), COALESCE("Handset Manufacturer", ''), COUNT(*)
+    FROM xdr_data GROUP BY 1, 2
+    """,
+]
+
+def benchmark_columns():
+    """Every column a benchmark case reads, so the other ~40 are never held in memory."""
+    return list(dict.fromkeys(DASHBOARD_COLUMNS + EXPERIENCE_COLUMNS + SCORE_COLUMNS + ENGAGEMENT_COLUMNS
+                              + app_columns()))
+
+def load_xdr(rows, seed=0):
+    """Synthetic xDRs generated chunk by chunk, keeping only the benchmarked columns."""
+    columns = benchmark_columns()
+    return pd.concat((chunk[columns] for chunk in generate_xdr_chunks(rows, seed=seed)), ignore_index=True)
+
+def run_dashboard_queries(conn):
+    for query in DASHBOARD_QUERIES.values():
+        conn.execute(query).fetchall()
+
+def load_sqlite(df):
+    """xdr_data plus its rollup tables in an in-memory SQLite database."""
+    conn = sqlite3.connect(':memory:')
+    df[DASHBOARD_COLUMNS].to_sql('xdr_data', conn, index=False)
+    # SQLite has no NULLS LAST in index definitions; its DESC order already puts NULLs last
+    conn.executescript(ROLLUP_DDL.replace(' NULLS LAST', ''))
+    for statement in SQLITE_ROLLUPS:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+# name -> (setup building the inputs outside the timed region, function under test)
+CASES = {
+    'aggregate_engagement': (
+        lambda df: (df[ENGAGEMENT_COLUMNS].copy(),),
+        aggregate_engagement),
+    'aggregate_engagement_parallel': (
+        lambda df: (df[ENGAGEMENT_COLUMNS], PARALLEL_JOBS),
+        aggregate_engagement),
+    # Typed input as the pipeline loads it: nullable Int64 keys and categorical handsets
+    'aggregate_engagement_typed': (
+        lambda df: (apply_schema(df[ENGAGEMENT_COLUMNS].copy()),),
+        aggregate_engagement),
+    'aggregate_engagement_parallel_typed': (
+        lambda df: (apply_schema(df[ENGAGEMENT_COLUMNS].copy()), PARALLEL_JOBS),
+        aggregate_engagement),
+    'aggregate_per_customer_parallel': (
+        lambda df: (clean_data(df[EXPERIENCE_COLUMNS].copy()), PARALLEL_JOBS),
+        aggregate_per_customer),
+    'clean_data': (
+        lambda df: (df[EXPERIENCE_COLUMNS].copy(),),
+        clean_data),
+    'aggregate_per_customer': (
+        lambda df: (clean_data(df[EXPERIENCE_COLUMNS].copy()),),
+        aggregate_per_customer),
+    'calculate_scores': (
+        lambda df: (df.groupby('MSISDN/Number')[SCORE_COLUMNS].mean().reset_index(),),
+        calculate_scores),
+    'perform_clustering': (
+        lambda df: (aggregate_per_customer(clean_data(df[EXPERIENCE_COLUMNS].copy())).dropna(),),
+        perform_clustering),
+    'traffic_matrix': (
+        lambda df: (df[['MSISDN/Number'] + app_columns()],),
+        TrafficMatrix.from_xdr),
+    'dashboard_queries': (
+        lambda df: (load_sqlite(df),),
+        run_dashboard_queries),
+}
+
+def measure(setup, func, df, track_memory=True):
+    """Time one call of func and, optionally, its peak traced allocation in a second call."""
+    args = setup(df)
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+
+    peak_bytes = None
+    if track_memory:
+        args = setup(df)
+        tracemalloc.start()
+        func(*args)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak_bytes
+
+def code_version():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def find_regressions(history, results, threshold=0.2):
+    """Compare each result with the latest entry for the same function and size from another version."""
+    regressions = []
+    for result in results:
+        if result['seconds'] is None:
+            continue
+        previous = [entry for entry in history
+                    if entry['function'] == result['function'] and entry['rows'] == result['rows']
+                    and entry['version'] != result['version'] and entry['seconds'] is not None]
+        if not previous:
+            continue
+        baseline = previous[-1]
+        if result['seconds'] > baseline['seconds'] * (1 + threshold):
+            regressions.append((result, baseline))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis functions on synthetic xDR data.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000],
+                        help="Row counts to benchmark; 10000000 needs several GB of memory.")
+    parser.add_argument('--functions', nargs='+', choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory pass.")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Slowdown ratio reported as a regression.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    version = code_version()
+    results = []
+    for rows in args.sizes:
+        df = load_xdr(rows, seed=args.seed)
+        for name in args.functions:
+            result = {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'version': version,
+                'python': platform.python_version(),
+                'rows': rows,
+                'function': name
+            }
+            if name in PARALLEL_CASES and (os.cpu_count() or 1) < 2:
+                # A single core would only time the process-pool overhead
+                result.update(seconds=None, peak_bytes=None, skipped=f"cpu_count() is {os.cpu_count()}")
+                results.append(result)
+                print(f"{rows:>10} rows  {name:<36} skipped: {result['skipped']}")
+                continue
+            setup, func = CASES[name]
+            seconds, peak_bytes = measure(setup, func, df, track_memory=not args.no_memory)
+            result.update(seconds=round(seconds, 4), peak_bytes=peak_bytes)
+            if name in PARALLEL_CASES:
+                result['n_jobs'] = PARALLEL_JOBS
+            results.append(result)
+            peak = f"{peak_bytes / 1e6:.1f} MB" if peak_bytes is not None else "n/a"
+            print(f"{rows:>10} rows  {name:<36} {seconds:8.3f}s  peak {peak}")
+        del df
+
+    with open(args.history, 'a') as f:
+        for result in results:
+            f.write(json.dumps(result) + '\n')
+
+    regressions = find_regressions(history, results, args.threshold)
+    for result, baseline in regressions:
+        print(f"REGRESSION {result['function']} @ {result['rows']} rows: {result['seconds']:.3f}s "
+              f"vs {baseline['seconds']:.3f}s in {baseline['version']}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
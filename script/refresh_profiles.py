@@ -0,0 +1,49 @@
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from db_connection.connection import PostgresConnection
+from db_connection.subscriber_profile import ensure_profiles, write_profiles
+from pipeline import (
+    DEFAULT_CHECKPOINT_DIR, build_pipeline, connect_postgres, postgres_engagement, postgres_source, replica_engagement,
+    replica_source
+)
+
+# Main script execution: run after each xdr_data load, like refresh_rollups.py
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish per-subscriber profiles for the dashboard drill-down.")
+    parser.add_argument('--source', choices=['postgres', 'replica'], default='postgres')
+    parser.add_argument('--table', default='xdr_data')
+    parser.add_argument('--replica-dir', default='data/xdr_replica')
+    parser.add_argument('--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR)
+    parser.add_argument('--force', action='store_true', help="Publish even if there are no profiles, clearing the table.")
+    args = parser.parse_args()
+
+    engagement = None
+    if args.source == 'postgres':
+        source_db = connect_postgres()
+        load, source_key = postgres_source(args.table, db=source_db)
+        # Engagement is grouped in the database rather than from the loaded rows
+        engagement = postgres_engagement(args.table, db=source_db)
+    else:
+        load, source_key = replica_source(args.replica_dir)
+        # Engagement comes from the incrementally maintained subscriber state
+        engagement = replica_engagement(args.replica_dir)
+    # Unchanged upstream stages are read back from their checkpoints
+    pipeline = build_pipeline(load, source_key, checkpoint_dir=args.checkpoint_dir, engagement=engagement)
+    pipeline.run(['subscriber_profile'])
+    profiles = pipeline.load('subscriber_profile')
+
+    # Connection details come from the DB_* environment variables
+    db = PostgresConnection()
+    db.connect()
+    if db.pool is None:
+        sys.exit("Could not connect to PostgreSQL; profiles were not published.")
+    ensure_profiles(db)
+    written = write_profiles(db, profiles, force=args.force)
+    db.close()
+    if written is None:
+        sys.exit(1)
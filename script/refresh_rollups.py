@@ -0,0 +1,16 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from db_connection.connection import PostgresConnection
+from db_connection.rollups import ensure_rollups, refresh_rollups
+
+# Main script execution: run after each xdr_data load (e.g. from cron)
+if __name__ == "__main__":
+    # Connection details come from the DB_* environment variables
+    db = PostgresConnection()
+    db.connect()
+    ensure_rollups(db)
+    refresh_rollups(db)
+    db.close()
@@ -0,0 +1,30 @@
+import argparse
+import os
+import pstats
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from instrumentation import load_records, summarize
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize per-stage timings recorded with STAGE_LOG.")
+    parser.add_argument('log', help="JSON-lines file written by the stage recorder.")
+    parser.add_argument('--profile-lines', type=int, default=20,
+                        help="Functions to show from each captured cProfile, by cumulative time.")
+    args = parser.parse_args()
+
+    records = load_records(args.log)
+    summary = summarize(records)
+    print(summary.to_string(float_format=lambda value: f"{value:,.3f}"))
+
+    for record in records:
+        if record.get('profile_path') and os.path.exists(record['profile_path']):
+            print(f"\nProfile of {record['stage']} ({record['wall_seconds']:.3f}s, "
+                  f"traced peak {record['traced_peak_bytes'] / 1e6:.1f} MB)")
+            for line in record.get('top_allocations', []):
+                print(f"  {line}")
+            pstats.Stats(record['profile_path']).sort_stats('cumulative').print_stats(args.profile_lines)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import sys
+import os
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from db_connection.connection import PostgresConnection
+from db_connection.rollups import ensure_start_index
+from db_connection.xdr_replica import AGGREGATES_FILE, read_replica, replica_dataset, sync_replica
+from subscriber_aggregates import SubscriberAggregates
+
+def load_aggregates(replica_dir):
+    """The saved per-subscriber state, rebuilt once from the replica if it predates it."""
+    path = os.path.join(replica_dir, AGGREGATES_FILE)
+    if os.path.exists(path):
+        return SubscriberAggregates.load(path)
+    aggregates = SubscriberAggregates()
+    if replica_dataset(replica_dir) is not None:
+        aggregates.update(read_replica(replica_dir, columns=aggregates.columns()))
+        aggregates.save(path)
+    return aggregates
+
+# Main script execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync new xdr_data rows into the local Parquet replica.")
+    parser.add_argument('--replica-dir', default='data/xdr_replica')
+    parser.add_argument('--table', default='xdr_data')
+    parser.add_argument('--chunk-rows', type=int, default=50000)
+    parser.add_argument('--lookback-hours', type=float, default=24.0,
+                        help="Re-read rows this far behind the watermark to pick up late-arriving xDRs.")
+    args = parser.parse_args()
+
+    db = PostgresConnection(
+        dbname=os.getenv('DB_NAME', 'telecom'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD', 'root'),
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=os.getenv('DB_PORT', '5432')
+    )
+    db.connect()
+    ensure_start_index(db)
+    sync_replica(db, args.replica_dir, table=args.table, chunk_rows=args.chunk_rows,
+                 lookback=pd.Timedelta(hours=args.lookback_hours), aggregates=load_aggregates(args.replica_dir))
+    db.close()
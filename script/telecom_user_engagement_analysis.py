@@ -1,19 +1,21 @@
 import pandas as pd
 import sys
 import os
-sys.path.append(os.path.abspath(os.path.join(os.getcwd(), '../src')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from db_connection.connection import PostgresConnection
-from utils import load_data, aggregate_engagement, normalize_data, kmeans_clustering, plot_elbow_method, plot_top_apps
+from utils import aggregate_engagement, normalize_data, kmeans_clustering, plot_elbow_method, plot_top_apps
 
 # Main script execution
 if __name__ == "__main__":
+    # Connection details come from the DB_* environment variables; the pool is shared
     db = PostgresConnection()
     db.connect()
 
     # Fetch data
     query = "SELECT * FROM xdr_data;"
-    df = load_data(query, db)
+    df = db.fetch_data(query)
     
     if df is not None:
         # Aggregate and analyze data
@@ -0,0 +1,100 @@
+import pandas as pd
+
+SQL_FUNCTIONS = {
+    'count': 'COUNT({col})',
+    'sum': 'COALESCE(SUM({col}), 0)',
+    'mean': 'AVG({col})',
+    'min': 'MIN({col})',
+    'max': 'MAX({col})',
+    # First non-null value in physical row order, i.e. the order SELECT * returns
+    'first': '(array_agg({col} ORDER BY ctid) FILTER (WHERE {col} IS NOT NULL))[1]',
+}
+
+def quote(name):
+    return '"{}"'.format(name.replace('"', '""'))
+
+class AggregationSpec:
+    """A per-key aggregation that compiles to a server-side GROUP BY or to pandas.
+
+    aggregations is a list of (output column, input column, function) with
+    functions from SQL_FUNCTIONS. derived maps extra input columns to the list of
+    raw columns they are the row-wise sum of (e.g. total traffic = UL + DL).
+    Both paths drop rows with a NULL key, sort by key and return the same dtypes:
+    int64 for counts, float64 for numeric aggregates.
+    """
+
+    def __init__(self, key, aggregations, derived=None):
+        unknown = [func for _, _, func in aggregations if func not in SQL_FUNCTIONS]
+        if unknown:
+            raise ValueError(f"Unsupported aggregation functions: {unknown}")
+        self.key = key
+        self.aggregations = list(aggregations)
+        self.derived = dict(derived or {})
+
+    def output_columns(self):
+        return [self.key] + [output for output, _, _ in self.aggregations]
+
+    def _input_sql(self, column):
+        if column in self.derived:
+            return '(' + ' + '.join(quote(col) for col in self.derived[column]) + ')'
+        return quote(column)
+
+    def to_sql(self, table='xdr_data', where=None):
+        """Compile to a GROUP BY query returning one row per key."""
+        selects = [quote(self.key)]
+        for output, column, func in self.aggregations:
+            selects.append(f"{SQL_FUNCTIONS[func].format(col=self._input_sql(column))} AS {quote(output)}")
+        conditions = [f"{quote(self.key)} IS NOT NULL"] + ([where] if where else [])
+        return (f"SELECT {', '.join(selects)} FROM {table} "
+                f"WHERE {' AND '.join(conditions)} "
+                f"GROUP BY {quote(self.key)} ORDER BY {quote(self.key)}")
+
+    def _normalize(self, agg_df):
+        for output, _, func in self.aggregations:
+            if func == 'count':
+                agg_df[output] = agg_df[output].astype('int64')
+            elif func != 'first':
+                agg_df[output] = agg_df[output].astype('float64')
+        return agg_df[self.output_columns()].reset_index(drop=True)
+
+    def aggregate(self, df):
+        """Run the aggregation in pandas on raw rows."""
+        inputs = {}
+        for _, column, _ in self.aggregations:
+            if column in self.derived:
+                inputs[column] = df[self.derived[column]].sum(axis=1, min_count=len(self.derived[column]))
+            else:
+                inputs[column] = df[column]
+        grouped = pd.DataFrame(inputs).groupby(df[self.key])
+        agg_df = pd.DataFrame({output: grouped[column].agg(func) for output, column, func in self.aggregations})
+        agg_df.index.name = self.key
+        return self._normalize(agg_df.reset_index())
+
+    def fetch(self, db, table='xdr_data', where=None):
+        """Run the aggregation next to the data and fetch one row per key."""
+        agg_df = db.fetch_data(self.to_sql(table, where))
+        if agg_df is None:
+            return None
+        return self._normalize(agg_df)
+
+# Mirrors utils.aggregate_engagement
+ENGAGEMENT_SPEC = AggregationSpec(
+    key='MSISDN/Number',
+    aggregations=[
+        ('sessions_frequency', 'Bearer Id', 'count'),
+        ('session_duration', 'Dur. (ms)', 'sum'),
+        ('total_traffic', 'total_traffic', 'sum'),
+    ],
+    derived={'total_traffic': ['Total UL (Bytes)', 'Total DL (Bytes)']}
+)
+
+# Mirrors telecom_experience_analysis.aggregate_per_customer
+EXPERIENCE_SPEC = AggregationSpec(
+    key='MSISDN/Number',
+    aggregations=[
+        ('avg_tcp_retransmission', 'TCP DL Retrans. Vol (Bytes)', 'mean'),
+        ('avg_rtt', 'Avg RTT DL (ms)', 'mean'),
+        ('avg_throughput', 'Avg Bearer TP DL (kbps)', 'mean'),
+        ('Handset Type', 'Handset Type', 'first'),
+    ]
+)
@@ -1,142 +1,149 @@
 import os
+import sys
+import time
+import itertools
 import streamlit as st
-import psycopg2
 import pandas as pd
-import plotly.express as px
 
-# Initialize connection
-@st.cache_resource(hash_funcs={psycopg2.extensions.connection: id})
+# Add the repository root so the shared connection pool can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from db_connection.connection import get_pool
+from db_connection.rollups import DASHBOARD_QUERIES, WATERMARK_QUERY
+from db_connection.subscriber_profile import SESSION_COLUMNS
+from dashboard_data import fetch_rows, iter_query_results, fetch_profile, fetch_session_page
+from query_cache import QueryCache, DEFAULT_CACHE_DIR
+
+# Initialize a connection pool shared by every Streamlit session in this process
+@st.cache_resource
 def init_connection():
     try:
+        maxconn = int(os.getenv('DB_POOL_MAX', '10'))
         # Check the environment variable
         if os.getenv('STREAMLIT_ENV') == 'production':
             # Production connection details
-            return psycopg2.connect(
+            return get_pool(
                 dbname=st.secrets["dbname"],
                 user=st.secrets["user"],
                 password=st.secrets["password"],
                 host=st.secrets["host"],
-                port=st.secrets["port"]
+                port=st.secrets["port"],
+                maxconn=maxconn
             )
         else:
             # Non-production or development connection details
             st.warning("The application is not running in production mode. Using development settings.")
             # You can use different connection details or mock connection here
-            return psycopg2.connect(
+            return get_pool(
                 dbname="telecom",
                 user="postgres",
                 password="root",
                 host="localhost",
-                port="5432"
+                port="5432",
+                maxconn=maxconn
             )
     except Exception as e:
         st.error(f"Error connecting to PostgreSQL database: {e}")
         return None  # Return None if connection fails
 
-# def init_connection():
-#     try:
-#         # Pass PostgreSQL credentials directly to psycopg2.connect
-#         return psycopg2.connect(
-#             dbname="telecom",
-#             user="postgres",
-#             password="root",
-#             host="localhost",
-#             port="5432"
-#         )
-#     except Exception as e:
-#         st.error(f"Error connecting to PostgreSQL database: {e}")
-#         return None  # Return None if connection fails
-
-conn = init_connection()
+pool = init_connection()
+
+# Query results are shared by every dashboard process through an on-disk cache
+@st.cache_resource
+def init_query_cache():
+    return QueryCache(os.getenv('QUERY_CACHE_DIR', DEFAULT_CACHE_DIR),
+                      max_bytes=int(os.getenv('QUERY_CACHE_MB', '256')) * 1024 * 1024)
+
+query_cache = init_query_cache()
+
+# The watermark is one index lookup, so it is rechecked every few seconds instead of trusting a long TTL
+@st.cache_data(ttl=5)
+def current_watermark():
+    return [list(row) for row in fetch_rows(pool, WATERMARK_QUERY)]
 
 # Perform query
-@st.cache_data(ttl=600)
 def run_query(query):
-    if conn is None:
+    if pool is None:
         st.error("Failed to establish database connection.")
         return None  # Return None if connection is not established
     try:
-        with conn.cursor() as cur:
-            cur.execute(query)
-            return cur.fetchall()
+        # Served from the cache until xdr_data or the rollups change
+        return query_cache.fetch(query, current_watermark(), lambda: fetch_rows(pool, query))
     except Exception as e:
         st.error(f"Error executing query: {e}")
         return None
 
+def format_score(value):
+    """Two decimals, or 'n/a' for a subscriber the model could not score."""
+    return "n/a" if value is None or pd.isna(value) else f"{value:.2f}"
+
 # Sidebar headers
 st.sidebar.title('Analysis Sections')
-analysis_sections = ['User Overview Analysis', 'User Engagement Analysis', 'User Experience Analysis', 'User Satisfaction Analysis']
+analysis_sections = ['User Overview Analysis', 'User Engagement Analysis', 'User Experience Analysis', 'User Satisfaction Analysis',
+                     'Subscriber Drill-down']
 selected_section = st.sidebar.selectbox("Select Analysis Section:", analysis_sections)
 
+# Filled in after the selected section has run its queries
+cache_status = st.sidebar.empty()
+
 # User Overview Analysis
 if selected_section == 'User Overview Analysis':
     st.header("User Overview Analysis")
 
-    # Top handsets
-    query_top_handsets = "SELECT \"Handset Type\", COUNT(*) AS \"Count\" FROM xdr_data GROUP BY \"Handset Type\" ORDER BY \"Count\" DESC LIMIT 10"
-    top_handsets = run_query(query_top_handsets)
-
-    if top_handsets is not None:
-        top_handsets_df = pd.DataFrame(top_handsets, columns=['Handset Type', 'Count'])
-        st.subheader("Top Handsets")
-        st.bar_chart(top_handsets_df, x='Handset Type', y='Count')
-    else:
-        st.error("Failed to fetch top handsets data.")
-
-    # Top handsets by manufacturers
-    query_top_manufacturers = "SELECT \"Handset Manufacturer\", COUNT(*) AS \"Count\" FROM xdr_data GROUP BY \"Handset Manufacturer\" ORDER BY \"Count\" DESC LIMIT 10"
-    top_manufacturers = run_query(query_top_manufacturers)
-
-    if top_manufacturers is not None:
-        top_manufacturers_df = pd.DataFrame(top_manufacturers, columns=['Handset Manufacturer', 'Count'])
-        st.subheader("Top Handsets by Manufacturers")
-        st.bar_chart(top_manufacturers_df, x='Handset Manufacturer', y='Count')
-    else:
-        st.error("Failed to fetch top handset manufacturers data.")
-
-    # Users with the top number of sessions
-    query_top_sessions = "SELECT \"MSISDN/Number\", COUNT(*) AS \"Session Count\" FROM xdr_data GROUP BY \"MSISDN/Number\" ORDER BY \"Session Count\" DESC LIMIT 10"
-    top_sessions = run_query(query_top_sessions)
-
-    if top_sessions is not None:
-        top_sessions_df = pd.DataFrame(top_sessions, columns=['MSISDN/Number', 'Session Count'])
-        st.subheader("Users with the Top Number of Sessions")
-        st.table(top_sessions_df)
-    else:
-        st.error("Failed to fetch top sessions data.")
-
-    # Top total duration of sessions
-    query_top_duration = "SELECT \"MSISDN/Number\", SUM(\"Dur. (ms)\") AS \"Total Duration\" FROM xdr_data GROUP BY \"MSISDN/Number\" ORDER BY \"Total Duration\" DESC LIMIT 10"
-    top_duration = run_query(query_top_duration)
-
-    if top_duration is not None:
-        top_duration_df = pd.DataFrame(top_duration, columns=['MSISDN/Number', 'Total Duration'])
-        st.subheader("Users with the Top Total Duration of Sessions")
-        st.table(top_duration_df)
-    else:
-        st.error("Failed to fetch top duration data.")
-
-    # Top average duration of sessions
-    query_top_avg_duration = "SELECT \"MSISDN/Number\", AVG(\"Dur. (ms)\") AS \"Average Duration\" FROM xdr_data GROUP BY \"MSISDN/Number\" ORDER BY \"Average Duration\" DESC LIMIT 10"
-    top_avg_duration = run_query(query_top_avg_duration)
-
-    if top_avg_duration is not None:
-        top_avg_duration_df = pd.DataFrame(top_avg_duration, columns=['MSISDN/Number', 'Average Duration'])
-        st.subheader("Users with the Top Average Duration of Sessions")
-        st.table(top_avg_duration_df)
-    else:
-        st.error("Failed to fetch top average duration data.")
-
-    # Users with the top total data used
-    query_top_data = "SELECT \"MSISDN/Number\", SUM(\"Total DL (Bytes)\") + SUM(\"Total UL (Bytes)\") AS \"Total Data Used\" FROM xdr_data GROUP BY \"MSISDN/Number\" ORDER BY \"Total Data Used\" DESC LIMIT 10"
-    top_data = run_query(query_top_data)
-
-    if top_data is not None:
-        top_data_df = pd.DataFrame(top_data, columns=['MSISDN/Number','Total Data Used'])
-        st.subheader("Users with the Top Total Data Used")
-        st.table(top_data_df)
+    # (query key, subheader, columns, chart kind, error message), in display order
+    overview_sections = [
+        ('top_handsets', "Top Handsets", ['Handset Type', 'Count'], 'bar',
+         "Failed to fetch top handsets data."),
+        ('top_manufacturers', "Top Handsets by Manufacturers", ['Handset Manufacturer', 'Count'], 'bar',
+         "Failed to fetch top handset manufacturers data."),
+        ('top_sessions', "Users with the Top Number of Sessions", ['MSISDN/Number', 'Session Count'], 'table',
+         "Failed to fetch top sessions data."),
+        ('top_duration', "Users with the Top Total Duration of Sessions", ['MSISDN/Number', 'Total Duration'], 'table',
+         "Failed to fetch top duration data."),
+        ('top_avg_duration', "Users with the Top Average Duration of Sessions", ['MSISDN/Number', 'Average Duration'], 'table',
+         "Failed to fetch top average duration data."),
+        ('top_data', "Users with the Top Total Data Used", ['MSISDN/Number', 'Total Data Used'], 'table',
+         "Failed to fetch top data usage data."),
+    ]
+
+    # Reserve a slot per section so results can render as they arrive, in any order
+    placeholders = {key: st.empty() for key, *_ in overview_sections}
+    for key, *_ in overview_sections:
+        placeholders[key].info("Loading...")
+
+    if pool is None:
+        st.error("Failed to establish database connection.")
     else:
-        st.error("Failed to fetch top data usage data.")
+        sections = {key: rest for key, *rest in overview_sections}
+        queries = {key: DASHBOARD_QUERIES[key] for key in sections}
+        # Cached sections render at once; only the misses go to the database
+        cached = {}
+        try:
+            watermark = current_watermark()
+            for key, query in queries.items():
+                rows = query_cache.get(query, watermark)
+                if rows is not None:
+                    cached[key] = rows
+        except Exception as e:
+            st.warning(f"Query cache unavailable, reading from the database: {e}")
+            watermark = None
+        pending = {key: query for key, query in queries.items() if key not in cached}
+        results = itertools.chain(((key, rows, None) for key, rows in cached.items()),
+                                  iter_query_results(pool, pending))
+        for key, rows, error in results:
+            subheader, columns, kind, error_message = sections[key]
+            if error is None and watermark is not None and key in pending:
+                query_cache.put(pending[key], watermark, rows)
+            with placeholders[key].container():
+                if error is not None:
+                    st.error(f"{error_message} {error}")
+                    continue
+                section_df = pd.DataFrame(rows, columns=columns)
+                st.subheader(subheader)
+                if kind == 'bar':
+                    st.bar_chart(section_df, x=columns[0], y=columns[1])
+                else:
+                    st.table(section_df)
 
 # User Engagement Analysis
 elif selected_section == 'User Engagement Analysis':
@@ -146,11 +153,11 @@ elif selected_section == 'User Engagement Analysis':
     selected_engagement_metric = st.selectbox("Select an engagement metric:", engagement_metrics)
 
     if selected_engagement_metric == 'Number of Sessions':
-        query_engagement = "SELECT \"MSISDN/Number\", COUNT(*) AS \"Session Count\" FROM xdr_data GROUP BY \"MSISDN/Number\" ORDER BY \"Session Count\" DESC LIMIT 10"
+        query_engagement = DASHBOARD_QUERIES['top_sessions']
     elif selected_engagement_metric == 'Total Duration':
-        query_engagement = "SELECT \"MSISDN/Number\", SUM(\"Dur. (ms)\") AS \"Total Duration\" FROM xdr_data GROUP BY \"MSISDN/Number\" ORDER BY \"Total Duration\" DESC LIMIT 10"
+        query_engagement = DASHBOARD_QUERIES['top_duration']
     elif selected_engagement_metric == 'Total Data Volume':
-        query_engagement = "SELECT \"MSISDN/Number\", SUM(\"Total DL (Bytes)\") + SUM(\"Total UL (Bytes)\") AS \"Total Data Volume\" FROM xdr_data GROUP BY \"MSISDN/Number\" ORDER BY \"Total Data Volume\" DESC LIMIT 10"
+        query_engagement = DASHBOARD_QUERIES['top_data']
     else:
         st.error("Invalid engagement metric selected.")
 
@@ -171,13 +178,13 @@ elif selected_section == 'User Experience Analysis':
     selected_experience_metric = st.selectbox("Select an experience metric:", experience_metrics)
 
     if selected_experience_metric == 'Avg RTT DL':
-        query_experience = "SELECT \"MSISDN/Number\", \"Avg RTT DL (ms)\" AS \"Average RTT DL\" FROM xdr_data ORDER BY \"Average RTT DL\" DESC LIMIT 10"
+        query_experience = DASHBOARD_QUERIES['top_rtt_dl']
     elif selected_experience_metric == 'Avg RTT UL':
-        query_experience = "SELECT \"MSISDN/Number\", \"Avg RTT UL (ms)\" AS \"Average RTT UL\" FROM xdr_data ORDER BY \"Average RTT UL\" DESC LIMIT 10"
+        query_experience = DASHBOARD_QUERIES['top_rtt_ul']
     elif selected_experience_metric == 'Avg Bearer TP DL':
-        query_experience = "SELECT \"MSISDN/Number\", \"Avg Bearer TP DL (kbps)\" AS \"Average Bearer TP DL\" FROM xdr_data ORDER BY \"Average Bearer TP DL\" DESC LIMIT 10"
+        query_experience = DASHBOARD_QUERIES['top_tp_dl']
     elif selected_experience_metric == 'Avg Bearer TP UL':
-        query_experience = "SELECT \"MSISDN/Number\", \"Avg Bearer TP UL (kbps)\" AS \"Average Bearer TP UL\" FROM xdr_data ORDER BY \"Average Bearer TP UL\" DESC LIMIT 10"
+        query_experience = DASHBOARD_QUERIES['top_tp_ul']
     else:
         st.error("Invalid experience metric selected.")
 
@@ -198,9 +205,9 @@ elif selected_section == 'User Satisfaction Analysis':
     selected_satisfaction_metric = st.selectbox("Select a satisfaction metric:", satisfaction_metrics)
 
     if selected_satisfaction_metric == 'Engagement Score':
-        query_satisfaction = "SELECT \"MSISDN/Number\", COUNT(*) AS \"Engagement Score\" FROM xdr_data GROUP BY \"MSISDN/Number\" ORDER BY \"Engagement Score\" DESC LIMIT 10"
+        query_satisfaction = DASHBOARD_QUERIES['top_sessions']
     elif selected_satisfaction_metric == 'Experience Score':
-        query_satisfaction = "SELECT \"MSISDN/Number\", \"Avg RTT DL (ms)\" + \"Avg RTT UL (ms)\" + \"Avg Bearer TP DL (kbps)\" + \"Avg Bearer TP UL (kbps)\" AS \"Experience Score\" FROM xdr_data ORDER BY \"Experience Score\" DESC LIMIT 10"
+        query_satisfaction = DASHBOARD_QUERIES['top_experience_score']
     else:
         st.error("Invalid satisfaction metric selected.")
 
@@ -211,4 +218,60 @@ elif selected_section == 'User Satisfaction Analysis':
         st.subheader(f"Top 10 Users by {selected_satisfaction_metric}")
         st.table(satisfaction_df)
     else:
-        st.error("Failed to fetch satisfaction data.")
\ No newline at end of file
+        st.error("Failed to fetch satisfaction data.")
+
+# Subscriber Drill-down
+elif selected_section == 'Subscriber Drill-down':
+    st.header("Subscriber Drill-down")
+
+    msisdn_text = st.text_input("MSISDN/Number:").strip()
+    msisdn = None
+    if msisdn_text:
+        try:
+            msisdn = float(msisdn_text)
+        except ValueError:
+            st.error(f"'{msisdn_text}' is not a valid MSISDN.")
+
+    if msisdn is not None and pool is None:
+        st.error("Failed to establish database connection.")
+    elif msisdn is not None:
+        # Each page is fetched with the key of the previous page's last session; the stack allows going back
+        if st.session_state.get('drilldown_msisdn') != msisdn:
+            st.session_state['drilldown_msisdn'] = msisdn
+            st.session_state['drilldown_cursors'] = [None]
+        cursors = st.session_state['drilldown_cursors']
+
+        start_time = time.perf_counter()
+        try:
+            profile = fetch_profile(pool, msisdn)
+            sessions, next_cursor = fetch_session_page(pool, msisdn, cursors[-1])
+        except Exception as e:
+            st.error(f"Error executing query: {e}")
+            profile, sessions, next_cursor = None, None, None
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+        if profile is None and sessions is not None:
+            st.warning("No profile for this subscriber yet; profiles are published by script/refresh_profiles.py.")
+        elif profile is not None:
+            engagement_col, experience_col, satisfaction_col = st.columns(3)
+            engagement_col.metric("Engagement Score", format_score(profile['engagement_score']),
+                                  help=f"Engagement cluster {profile['engagement_cluster']}")
+            experience_col.metric("Experience Score", format_score(profile['experience_score']),
+                                  help=f"Experience cluster {profile['experience_cluster']}")
+            satisfaction_col.metric("Satisfaction Score", format_score(profile['satisfaction_score']))
+            st.subheader("Profile")
+            st.table(pd.DataFrame({'Value': [str(value) for value in profile.values()]}, index=list(profile)))
+
+        if sessions is not None:
+            st.subheader(f"Sessions (page {len(cursors)})")
+            st.dataframe(pd.DataFrame(sessions, columns=SESSION_COLUMNS), hide_index=True)
+            previous_col, next_col = st.columns(2)
+            previous_col.button("Newer sessions", disabled=len(cursors) == 1, on_click=cursors.pop)
+            next_col.button("Older sessions", disabled=next_cursor is None, on_click=cursors.append, args=(next_cursor,))
+            st.caption(f"Fetched in {elapsed_ms:.0f} ms")
+
+cache_stats = query_cache.stats()
+cache_status.caption(
+    f"Query cache (this process): {cache_stats['hits']} hits, {cache_stats['misses']} misses. "
+    f"Shared: {cache_stats['entries']} results, {cache_stats['bytes'] / 1024 / 1024:.1f} MB"
+)
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from db_connection.subscriber_profile import PROFILE_COLUMNS, PROFILE_QUERY, SESSION_COLUMNS, session_page_query
+
+DEFAULT_TIMEOUT = 10.0
+
+def fetch_rows(pool, query, timeout=DEFAULT_TIMEOUT, params=None):
+    """Run one query on a borrowed pooled connection, cancelling it after timeout seconds.
+
+    Waiting for a free connection is bounded by the same timeout.
+    """
+    with pool.connection(timeout=timeout or None) as conn:
+        with conn.cursor() as cursor:
+            if timeout:
+                # Server-side limit, scoped to this transaction only
+                cursor.execute("SET LOCAL statement_timeout = %s", (int(timeout * 1000),))
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        conn.rollback()
+    return rows
+
+def default_workers(pool, n_queries):
+    """Concurrent queries for one page: at most half the pool, leaving the rest to other sessions."""
+    maxconn = getattr(pool, 'maxconn', None)
+    limit = max(1, maxconn // 2) if maxconn else n_queries
+    return max(1, min(n_queries, limit))
+
+def iter_query_results(pool, queries, timeouts=None, default_timeout=DEFAULT_TIMEOUT, max_workers=None):
+    """Run independent queries concurrently and yield (name, rows, error) as each finishes.
+
+    queries maps a section name to its SQL; timeouts optionally overrides the
+    per-query timeout in seconds. Each running query holds its own pooled
+    connection, so the first result is available after the fastest query rather
+    than after the sum of all of them. By default at most half of the pool's
+    connections are used at once; further queries queue for a worker.
+    """
+    timeouts = timeouts or {}
+    max_workers = max_workers or default_workers(pool, len(queries))
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {
+        executor.submit(fetch_rows, pool, query, timeouts.get(name, default_timeout)): name
+        for name, query in queries.items()
+    }
+    # Client-side backstop: each query waits at most its timeout for a connection and
+    # runs at most its timeout on the server, and queued queries start in waves
+    waves = -(-len(queries) // max_workers)
+    deadline = max([timeouts.get(name, default_timeout) or 0 for name in queries] + [0]) * 2 * waves or None
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            name = futures.pop(future)
+            try:
+                yield name, future.result(), None
+            except Exception as e:
+                yield name, None, e
+    except FuturesTimeoutError:
+        for future, name in futures.items():
+            future.cancel()
+            yield name, None, TimeoutError(f"Query '{name}' did not finish in time.")
+    finally:
+        # Queries still running end at their statement_timeout and return their connections
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def fetch_profile(pool, msisdn, timeout=DEFAULT_TIMEOUT):
+    """The precomputed profile of one subscriber as a dict, or None if unknown."""
+    rows = fetch_rows(pool, PROFILE_QUERY, timeout, {'msisdn': msisdn})
+    if not rows:
+        return None
+    return dict(zip(PROFILE_COLUMNS + ['updated_at'], rows[0]))
+
+def fetch_session_page(pool, msisdn, after=None, page_size=20, timeout=DEFAULT_TIMEOUT):
+    """One page of a subscriber's sessions, newest first.
+
+    after is the cursor returned with the previous page (None for the first).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    params = {'msisdn': msisdn, 'limit': page_size + 1}
+    if after is not None:
+        params['start'], params['bearer'], params['ctid'] = after
+    rows = fetch_rows(pool, session_page_query(after is not None), timeout, params)
+    width = len(SESSION_COLUMNS)
+    page = [row[:width] for row in rows[:page_size]]
+    next_cursor = tuple(rows[page_size - 1][width:]) if len(rows) > page_size else None
+    return page, next_cursor
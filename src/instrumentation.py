@@ -0,0 +1,194 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+DEFAULT_PROFILE_DIR = 'artifacts/profiles'
+
+def peak_rss_bytes():
+    """High-water resident set size of the whole process so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _rows(value):
+    if isinstance(value, tuple):
+        value = next((item for item in value if isinstance(item, (pd.DataFrame, pd.Series))), None)
+    if isinstance(value, (pd.DataFrame, pd.Series)) or getattr(value, 'ndim', 0) >= 1:
+        return len(value)
+    return None
+
+def _frame_memory(value, deep):
+    if isinstance(value, tuple):
+        value = next((item for item in value if isinstance(item, pd.DataFrame)), None)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=deep).sum())
+    return None
+
+class StageRecorder:
+    """Records wall time, CPU time, rows, RSS and DataFrame memory per pipeline stage.
+
+    RSS comes from the process's high-water mark: process_peak_rss_bytes is that
+    mark when the stage ended (whatever stage first reached it), and
+    rss_growth_bytes is how far the stage raised it, which is 0 for a stage that
+    stayed below an earlier peak.
+
+    Each finished stage becomes one record; records are kept in memory and, when
+    path is set, appended to it as JSON lines. The stage named profile_stage is
+    additionally run under cProfile and tracemalloc. A disabled recorder runs
+    stages without measuring them.
+    """
+
+    def __init__(self, path=None, profile_stage=None, profile_dir=DEFAULT_PROFILE_DIR,
+                 deep_memory=False, enabled=True):
+        self.path = path
+        self.profile_stage = profile_stage
+        self.profile_dir = profile_dir
+        self.deep_memory = deep_memory
+        self.enabled = enabled
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Measure the enclosed block; set record['rows_out'] / record['output'] inside it."""
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        if not self.enabled:
+            yield record
+            return
+
+        profiler = None
+        if name == self.profile_stage:
+            profiler = cProfile.Profile()
+            tracemalloc.start()
+            profiler.enable()
+
+        record['started_at'] = datetime.now().isoformat()
+        rss_before = peak_rss_bytes()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        status = 'ok'
+        try:
+            yield record
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+            if profiler is not None:
+                profiler.disable()
+                self._save_profile(record, profiler)
+            rss_after = peak_rss_bytes()
+            record['process_peak_rss_bytes'] = rss_after
+            record['rss_growth_bytes'] = None if rss_after is None else rss_after - rss_before
+            output = record.pop('output', None)
+            if record['rows_out'] is None:
+                record['rows_out'] = _rows(output)
+            record['df_memory_bytes'] = _frame_memory(output, self.deep_memory)
+            record['status'] = status
+            self._emit(record)
+
+    def _save_profile(self, record, profiler):
+        _, traced_peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+        tracemalloc.stop()
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profile_path = os.path.join(self.profile_dir, f"{record['stage']}.prof")
+        profiler.dump_stats(profile_path)
+        record['profile_path'] = profile_path
+        record['traced_peak_bytes'] = traced_peak
+        record['top_allocations'] = [str(stat) for stat in top]
+
+    def _emit(self, record):
+        with self._lock:
+            self.records.append(record)
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record, default=str) + '\n')
+
+    def wrap(self, func=None, name=None):
+        """Decorator form of stage(); rows come from the first argument and the return value."""
+        if func is None:
+            return functools.partial(self.wrap, name=name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.stage(name or func.__name__, rows_in=_rows(args[0]) if args else None) as record:
+                result = func(*args, **kwargs)
+                record['output'] = result
+            return result
+        return wrapper
+
+    def summary(self):
+        return summarize(self.records)
+
+# STAGE_LOG=stages.jsonl (and optionally PROFILE_STAGE=<stage>) turns recording on for a whole run
+_recorder = StageRecorder(os.environ.get('STAGE_LOG'), os.environ.get('PROFILE_STAGE'),
+                          enabled=bool(os.environ.get('STAGE_LOG') or os.environ.get('PROFILE_STAGE')))
+
+def get_recorder():
+    return _recorder
+
+def configure(path=None, profile_stage=None, profile_dir=DEFAULT_PROFILE_DIR, deep_memory=False):
+    """Turn on recording for every instrumented stage; returns the new recorder."""
+    global _recorder
+    _recorder = StageRecorder(path, profile_stage, profile_dir, deep_memory)
+    return _recorder
+
+def instrument(func=None, name=None):
+    """Mark a function as a pipeline stage of the process-wide recorder.
+
+    Nothing is measured until configure() is called, so decorated functions cost
+    one attribute lookup when instrumentation is off.
+    """
+    if func is None:
+        return functools.partial(instrument, name=name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        recorder = _recorder
+        if not recorder.enabled:
+            return func(*args, **kwargs)
+        return recorder.wrap(func, name=name)(*args, **kwargs)
+    return wrapper
+
+def load_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def summarize(records):
+    """Per-stage totals, slowest first, with each stage's share of the total wall time."""
+    columns = ['calls', 'wall_seconds', 'cpu_seconds', 'rows_in', 'rows_out',
+               'rss_growth_bytes', 'process_peak_rss_bytes', 'df_memory_bytes', 'wall_share']
+    if not records:
+        return pd.DataFrame(columns=columns)
+    df = pd.DataFrame(records)
+    for col in ['rows_in', 'rows_out', 'rss_growth_bytes', 'process_peak_rss_bytes', 'df_memory_bytes']:
+        df[col] = pd.to_numeric(df.get(col), errors='coerce')
+    summary = df.groupby('stage').agg(
+        calls=('stage', 'size'),
+        wall_seconds=('wall_seconds', 'sum'),
+        cpu_seconds=('cpu_seconds', 'sum'),
+        rows_in=('rows_in', lambda rows: rows.sum(min_count=1)),
+        rows_out=('rows_out', lambda rows: rows.sum(min_count=1)),
+        rss_growth_bytes=('rss_growth_bytes', 'max'),
+        process_peak_rss_bytes=('process_peak_rss_bytes', 'max'),
+        df_memory_bytes=('df_memory_bytes', 'max')
+    )
+    summary['wall_share'] = summary['wall_seconds'] / summary['wall_seconds'].sum()
+    return summary.sort_values('wall_seconds', ascending=False)
@@ -1,3 +1,5 @@
+import io
+import time
 import pandas as pd
 import psycopg2
 import sys
@@ -43,6 +45,70 @@ def insert_user_data(db_connection, user_data_df):
         db_connection.execute_query(insert_sql)
     print("User data inserted successfully.")
 
+SCORE_COLUMNS = ['user_engagement', 'user_experience', 'user_satisfaction']
+
+def _csv_batches(user_data_df, columns, batch_size):
+    """Yield CSV buffers of at most batch_size rows for COPY FROM STDIN."""
+    for start in range(0, len(user_data_df), batch_size):
+        buffer = io.StringIO()
+        user_data_df.iloc[start:start + batch_size][columns].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        yield buffer
+
+def bulk_insert_user_data(db_connection, user_data_df, batch_size=100000, upsert=False, key='user_id'):
+    """Stream user data into user_scores with COPY FROM STDIN in a single transaction.
+
+    With upsert=True the rows are copied into a temporary staging table and merged
+    into user_scores on the subscriber key, updating the scores of existing rows.
+    Rows repeating a key are collapsed to the last one, since one statement cannot
+    update the same row twice. Returns the row count, elapsed seconds and rows per
+    second, or None on failure.
+    """
+    columns = SCORE_COLUMNS if key not in user_data_df.columns else [key] + SCORE_COLUMNS
+    if key in columns:
+        user_data_df = user_data_df.drop_duplicates(subset=key, keep='last')
+    if upsert and key not in columns:
+        print(f"Upsert requires a '{key}' column in the user data.")
+        return None
+    column_list = ', '.join(columns)
+    target = 'user_scores_staging' if upsert else 'user_scores'
+
+    start_time = time.perf_counter()
+    with db_connection.connection() as conn:
+        if conn is None:
+            print("No connection found.")
+            return None
+        try:
+            with conn.cursor() as cursor:
+                if upsert:
+                    cursor.execute(f"CREATE TEMP TABLE {target} (LIKE user_scores INCLUDING DEFAULTS) ON COMMIT DROP;")
+                for buffer in _csv_batches(user_data_df, columns, batch_size):
+                    cursor.copy_expert(f"COPY {target} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+                if upsert:
+                    updates = ', '.join(f"{col} = EXCLUDED.{col}" for col in SCORE_COLUMNS)
+                    cursor.execute(f"""
+                    INSERT INTO user_scores ({column_list})
+                    SELECT {column_list} FROM {target}
+                    ON CONFLICT ({key}) DO UPDATE SET {updates};
+                    """)
+                if key in columns:
+                    # Explicit ids bypass the SERIAL sequence; make the next id MAX + 1 (1 when empty)
+                    cursor.execute(f"""
+                    SELECT setval(pg_get_serial_sequence('user_scores', '{key}'), COALESCE(MAX({key}), 0) + 1, false)
+                    FROM user_scores;
+                    """)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Error bulk inserting user data: {e}")
+            return None
+
+    seconds = time.perf_counter() - start_time
+    rows = len(user_data_df)
+    rows_per_second = rows / seconds if seconds > 0 else float('inf')
+    print(f"Inserted {rows} rows in {seconds:.2f}s ({rows_per_second:,.0f} rows/s).")
+    return {'rows': rows, 'seconds': seconds, 'rows_per_second': rows_per_second}
+
 # Step 4: Fetch and Display Data
 def fetch_and_display_user_scores(db_connection):
     """Fetch user data from the user_scores table and display it."""
@@ -80,7 +146,7 @@ def main():
     create_user_scores_table(db_connection)
 
     # Insert data into the table
-    insert_user_data(db_connection, user_data_df)
+    bulk_insert_user_data(db_connection, user_data_df)
 
     # Fetch and display the inserted data
     fetch_and_display_user_scores(db_connection)
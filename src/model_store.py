@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import joblib
+import pandas as pd
+
+DEFAULT_STORE_DIR = 'artifacts/models'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+def fingerprint(data, params=None):
+    """Hash the training data (values, columns, dtypes) together with the hyperparameters.
+
+    The scikit-learn version is part of the key, since pickled estimators are not
+    guaranteed to load or predict the same under another release.
+    """
+    import sklearn
+    digest = hashlib.sha256(sklearn.__version__.encode())
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([list(map(str, data.columns)), list(map(str, data.dtypes))]).encode())
+    digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+class ModelStore:
+    """On-disk cache of fitted models keyed by a fingerprint of their inputs.
+
+    Each entry is a joblib bundle (e.g. a model together with its scaler and
+    imputer). Entries are evicted least-recently-used first once the store grows
+    beyond max_bytes. paths maps each model name to the artifact its last
+    get_or_fit loaded or saved.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.paths = {}
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, name, key):
+        return os.path.join(self.root, f'{name}-{key}.joblib')
+
+    def load(self, name, key):
+        """Return the cached bundle or None; a hit refreshes its LRU position."""
+        path = self.path(name, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            bundle = joblib.load(path)
+        except Exception as e:
+            print(f"Discarding unreadable model artifact {path}: {e}")
+            os.remove(path)
+            return None
+        os.utime(path)
+        return bundle
+
+    def save(self, name, key, bundle):
+        """Persist a bundle atomically and evict old entries if over budget."""
+        path = self.path(name, key)
+        tmp_path = f'{path}.tmp'
+        joblib.dump(bundle, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def get_or_fit(self, name, data, params, fit):
+        """Load the bundle fitted on this data and params, or call fit() and cache it."""
+        key = fingerprint(data, params)
+        bundle = self.load(name, key)
+        if bundle is not None:
+            self.hits += 1
+            self.paths[name] = self.path(name, key)
+            return bundle
+        self.misses += 1
+        bundle = fit()
+        self.paths[name] = self.save(name, key, bundle)
+        return bundle
+
+    def entries(self):
+        """Cached artifacts as (path, size, last_used), least recently used first."""
+        entries = []
+        for filename in os.listdir(self.root):
+            if filename.endswith('.joblib'):
+                path = os.path.join(self.root, filename)
+                stat = os.stat(path)
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, keep=None):
+        """Delete least-recently-used artifacts until the store fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+def partition_ids(keys, n_partitions):
+    """Hash partition of every key; equal keys always land in the same partition."""
+    hashes = pd.util.hash_array(np.asarray(keys))
+    return (hashes % np.uint64(n_partitions)).astype('uint16')
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment again with the resource
+        # tracker the pool inherited from the parent, which unregisters it on unlink
+        return shared_memory.SharedMemory(name=name)
+
+# Nullable numerics are a numpy values array plus a boolean NA mask
+MASKED_ARRAYS = (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)
+
+def _encode(series):
+    """Split a column into fixed-width arrays for shared memory, what rebuilds them in a
+    worker, and (uniques, dtype) when the worker only sees factorized codes."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return [series.cat.codes.to_numpy()], ('category', series.dtype), None
+    if isinstance(series.array, MASKED_ARRAYS):
+        return [series.array._data, series.array._mask], ('masked', type(series.array)), None
+    if series.dtype == object or not isinstance(series.dtype, np.dtype):
+        # Sorted so that comparisons (min, max, sort order) on codes match the values
+        codes, uniques = pd.factorize(series, sort=True, use_na_sentinel=True)
+        return [codes], ('codes',), (np.asarray(uniques, dtype=object), series.dtype)
+    return [series.to_numpy()], ('plain',), None
+
+def _decode(arrays, spec):
+    if spec[0] == 'category':
+        return pd.Categorical.from_codes(arrays[0], dtype=spec[1])
+    if spec[0] == 'masked':
+        return spec[1](arrays[0], arrays[1])
+    if spec[0] == 'codes':
+        # Missing values stay NA, so first/count/groupby skip them as they would the values
+        return pd.arrays.IntegerArray(arrays[0], arrays[0] < 0)
+    return arrays[0]
+
+def _decode_codes(result, factorized):
+    """Map code columns in a partition result back to the values they were factorized from."""
+    for name, (uniques, dtype) in factorized.items():
+        if name in result.columns and pd.api.types.is_integer_dtype(result[name].dtype):
+            codes = result[name].to_numpy(dtype='int64', na_value=-1)
+            # None for groups with no value, as groupby first() gives on object columns
+            decoded = np.full(len(codes), None, dtype=object)
+            present = codes >= 0
+            decoded[present] = uniques[codes[present]]
+            result[name] = decoded if dtype == object else pd.array(decoded, dtype=dtype)
+    return result
+
+def _aggregate_partition(func, columns, start, stop):
+    """Worker: view rows [start, stop) of the shared columns as a DataFrame and aggregate it."""
+    segments = [[_attach(shm_name) for shm_name, _ in arrays] for _, arrays, _, _ in columns]
+    try:
+        data = {name: _decode([np.ndarray((length,), dtype=dtype, buffer=shm.buf)[start:stop]
+                               for (_, dtype), shm in zip(arrays, shms)], spec)
+                for (name, arrays, length, spec), shms in zip(columns, segments)}
+        result = func(pd.DataFrame(data, copy=False))
+        del data
+        return result
+    finally:
+        for shm in [shm for shms in segments for shm in shms]:
+            try:
+                shm.close()
+            except BufferError:
+                # A traceback still references a view; the segment is released at exit
+                pass
+
+def parallel_groupby(df, func, key='MSISDN/Number', n_partitions=None, max_workers=None):
+    """Run a per-key aggregation over hash partitions of df in a process pool.
+
+    Rows are partitioned by a hash of `key`, reordered so every partition is one
+    contiguous slice (keeping the original row order within it) and copied once
+    into shared memory; workers read their slice zero-copy and call func on it.
+    func must return one row per key including the key column, like
+    aggregate_per_customer. Because every key's rows reach func in their original
+    order, the concatenated result sorted by key equals func(df).
+
+    Object and other non-numpy columns are factorized once here and reach func as
+    nullable integer codes; result columns of the same name are decoded back, so
+    func may group by them or take first/last/min/max of them.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    n_partitions = n_partitions or max_workers * 4
+    parts = partition_ids(df[key].to_numpy(), n_partitions)
+    order = np.argsort(parts, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(parts, minlength=n_partitions))])
+
+    segments, columns, factorized = [], [], {}
+    try:
+        for name in df.columns:
+            arrays, spec, uniques = _encode(df[name])
+            if uniques is not None:
+                factorized[name] = uniques
+            shared = []
+            for values in arrays:
+                shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                segments.append(shm)
+                np.take(values, order, out=np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf))
+                shared.append((shm.name, values.dtype))
+            columns.append((name, shared, len(df), spec))
+        del order, parts
+
+        slices = [(bounds[i], bounds[i + 1]) for i in range(n_partitions) if bounds[i + 1] > bounds[i]]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_aggregate_partition, func, columns, start, stop) for start, stop in slices]
+            results = [future.result() for future in futures]
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+    if not results:
+        return func(df.iloc[:0])
+    combined = _decode_codes(pd.concat(results, ignore_index=True), factorized)
+    return combined.sort_values(key, kind='stable').reset_index(drop=True)
@@ -0,0 +1,396 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+import pandas as pd
+
+# Add the repository root so the database helpers can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from db_connection.subscriber_profile import PROFILE_COLUMNS
+from aggregation_spec import ENGAGEMENT_SPEC
+from instrumentation import get_recorder
+from model_store import DEFAULT_STORE_DIR, ModelStore
+from xdr_schema import STAGE_COLUMNS, apply_schema, load_xdr_chunks
+from utils import aggregate_engagement, normalize_data, kmeans_clustering
+from telecom_experience_analysis import clean_data, aggregate_per_customer, perform_clustering
+from customer_satisfaction_analysis import (
+    ENGAGEMENT_FEATURES, EXPERIENCE_FEATURES, calculate_scores, calculate_satisfaction_score,
+    regression_model, model_deployment_tracking
+)
+
+DEFAULT_CHECKPOINT_DIR = 'artifacts/pipeline'
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ENGAGEMENT_METRICS = ['sessions_frequency', 'session_duration', 'total_traffic']
+EXPERIENCE_METRICS = ['avg_tcp_retransmission', 'avg_rtt', 'avg_throughput']
+# Union of the columns the analysis stages read, in schema order
+PIPELINE_COLUMNS = list(dict.fromkeys(
+    STAGE_COLUMNS['engagement'] + STAGE_COLUMNS['experience'] + STAGE_COLUMNS['satisfaction']))
+
+class Stage:
+    """One pipeline step: func(*outputs of deps, **params) returns a DataFrame.
+
+    source_key, for stages that read external data, returns a token that changes
+    whenever that data does (e.g. a row count and watermark).
+    """
+
+    def __init__(self, name, func, deps=(), params=None, source_key=None):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = dict(params or {})
+        self.source_key = source_key
+
+def _global_names(code):
+    """Names a code object and the functions nested in it look up."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+def _is_project_code(obj):
+    try:
+        path = os.path.abspath(inspect.getsourcefile(obj))
+    except TypeError:
+        return False
+    return path.startswith(REPO_ROOT + os.sep) and 'site-packages' not in path
+
+def code_fingerprint(func):
+    """Source of func and of every project function or class it references, transitively.
+
+    Library code is left out; its version is not part of the checkpoint key.
+    """
+    sources, pending, seen = [], [func], set()
+    while pending:
+        obj = inspect.unwrap(pending.pop())
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        try:
+            sources.append(inspect.getsource(obj))
+        except (OSError, TypeError):
+            sources.append(getattr(obj, '__qualname__', repr(obj)))
+        if inspect.isclass(obj):
+            module = sys.modules.get(obj.__module__)
+            namespace = vars(module) if module else {}
+            codes = [member.__code__ for member in vars(obj).values() if inspect.isfunction(member)]
+        elif inspect.isfunction(obj):
+            namespace = obj.__globals__
+            codes = [obj.__code__]
+        else:
+            continue
+        for code in codes:
+            for name in sorted(_global_names(code)):
+                callee = namespace.get(name)
+                if (inspect.isfunction(callee) or inspect.isclass(callee)) and _is_project_code(callee):
+                    pending.append(callee)
+    return sources
+
+class Pipeline:
+    """Runs stages as a DAG, checkpointing each output to Parquet.
+
+    A checkpoint is keyed by the stage's parameters, its code (including the
+    project functions it calls), an optional source token and the keys of its
+    upstream stages, so a stage is skipped when none of
+    those changed and everything downstream of a change is recomputed. Stages
+    whose inputs are ready run concurrently on a thread pool.
+    """
+
+    def __init__(self, stages, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, max_workers=4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.checkpoint_dir = checkpoint_dir
+        self.max_workers = max_workers
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def _ordered(self, targets=None):
+        """Targets and everything upstream of them, dependencies first."""
+        order, seen = [], set()
+
+        def visit(name, path=()):
+            if name in path:
+                raise ValueError(f"Pipeline cycle through stage '{name}'")
+            if name in seen:
+                return
+            for dep in self.stages[name].deps:
+                visit(dep, path + (name,))
+            seen.add(name)
+            order.append(name)
+
+        for name in targets or self.stages:
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'. Expected one of {sorted(self.stages)}")
+            visit(name)
+        return order
+
+    def keys(self, targets=None):
+        keys = {}
+        for name in self._ordered(targets):
+            stage = self.stages[name]
+            payload = {
+                'stage': name,
+                'params': stage.params,
+                'code': code_fingerprint(stage.func),
+                'source': stage.source_key() if stage.source_key else None,
+                'deps': [keys[dep] for dep in stage.deps]
+            }
+            keys[name] = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+        return keys
+
+    def checkpoint_path(self, name, key):
+        return os.path.join(self.checkpoint_dir, f'{name}-{key[:16]}.parquet')
+
+    def load(self, name, key=None):
+        """Read a stage's checkpointed output."""
+        key = key or self.keys([name])[name]
+        return pd.read_parquet(self.checkpoint_path(name, key))
+
+    def _execute(self, name, inputs):
+        stage = self.stages[name]
+        with get_recorder().stage(f'pipeline.{name}') as record:
+            output = stage.func(*inputs, **stage.params)
+            record['output'] = output
+        return output
+
+    def _save(self, name, key, output):
+        path = self.checkpoint_path(name, key)
+        tmp_path = f'{path}.tmp'
+        output.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def run(self, targets=None, force=()):
+        """Bring the targets (default: all stages) up to date.
+
+        force names stages to recompute even if checkpointed. Returns
+        {stage: (status, checkpoint path)} with status 'cached' or 'ran'.
+        """
+        order = self._ordered(targets)
+        keys = self.keys(targets)
+        to_run = set()
+        for name in order:
+            stale = name in force or any(dep in to_run for dep in self.stages[name].deps)
+            if stale or not os.path.exists(self.checkpoint_path(name, keys[name])):
+                to_run.add(name)
+        status = {name: 'cached' for name in order if name not in to_run}
+
+        # Checkpointed inputs of the stages that must run are read once, up front
+        outputs = {}
+        for name in order:
+            if name in to_run:
+                for dep in self.stages[name].deps:
+                    if dep not in to_run and dep not in outputs:
+                        outputs[dep] = self.load(dep, keys[dep])
+
+        pending = [name for name in order if name in to_run]
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name in [name for name in pending if all(dep in outputs for dep in self.stages[name].deps)]:
+                    pending.remove(name)
+                    inputs = [outputs[dep] for dep in self.stages[name].deps]
+                    running[executor.submit(self._execute, name, inputs)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outputs[name] = future.result()
+                    self._save(name, keys[name], outputs[name])
+                    status[name] = 'ran'
+        return {name: (status[name], self.checkpoint_path(name, keys[name])) for name in order}
+
+# Stage functions; each takes upstream DataFrames and returns a DataFrame
+
+def engagement_stage(xdr):
+    return aggregate_engagement(xdr[STAGE_COLUMNS['engagement']].copy())
+
+def experience_stage(xdr):
+    return aggregate_per_customer(clean_data(xdr[STAGE_COLUMNS['experience']].copy()))
+
+def engagement_clusters_stage(engagement, n_clusters=3):
+    scaled = normalize_data(engagement, ENGAGEMENT_METRICS)
+    clustered, _ = kmeans_clustering(scaled, list(scaled.columns), n_clusters=n_clusters)
+    return engagement.assign(cluster=clustered['cluster'].to_numpy())
+
+def experience_clusters_stage(experience, n_clusters=3):
+    clustered, _ = perform_clustering(experience.dropna(subset=EXPERIENCE_METRICS).copy(), n_clusters=n_clusters)
+    return clustered
+
+def scores_stage(xdr):
+    features = ENGAGEMENT_FEATURES + EXPERIENCE_FEATURES
+    user_data = xdr.groupby('MSISDN/Number', observed=True)[features].mean().astype('float64').reset_index()
+    user_data, _ = calculate_satisfaction_score(calculate_scores(user_data))
+    return user_data
+
+def satisfaction_model_stage(scores, model_dir=DEFAULT_STORE_DIR):
+    start_time = datetime.now()
+    model, mse, artifact = regression_model(scores.dropna(subset=['satisfaction_score']),
+                                            model_store=ModelStore(model_dir), return_artifact=True)
+    end_time = datetime.now()
+    log_data = model_deployment_tracking(mse, artifacts=artifact, start_time=start_time, end_time=end_time)
+    return pd.DataFrame({
+        'mse': [mse],
+        'intercept': [float(model.intercept_)],
+        'coef_rtt_ul': [float(model.coef_[0])],
+        'coef_tp_ul': [float(model.coef_[1])],
+        'trained_at': [log_data['start_time']],
+        'duration_seconds': [log_data['duration_seconds']],
+        'artifacts': [artifact]
+    })
+
+def subscriber_profile_stage(engagement_clusters, experience_clusters, scores):
+    """One row per subscriber joining engagement, experience, scores and both cluster labels."""
+    key = 'MSISDN/Number'
+    engagement = engagement_clusters.rename(columns={'cluster': 'engagement_cluster'})
+    experience = experience_clusters[[key] + EXPERIENCE_METRICS + ['Handset Type', 'cluster']].rename(
+        columns={'cluster': 'experience_cluster'})
+    satisfaction = scores[[key, 'engagement_score', 'experience_score', 'satisfaction_score']]
+    profile = engagement.merge(experience, on=key, how='outer').merge(satisfaction, on=key, how='outer')
+    profile = profile.dropna(subset=[key]).astype(
+        {'sessions_frequency': 'Int64', 'engagement_cluster': 'Int64', 'experience_cluster': 'Int64'})
+    profile['Handset Type'] = profile['Handset Type'].astype(object)
+    return profile[PROFILE_COLUMNS].sort_values(key).reset_index(drop=True)
+
+# Sources for the xDR input stage
+
+def connect_postgres():
+    """A connected PostgresConnection, or ConnectionError when the database is unreachable."""
+    from db_connection.connection import PostgresConnection
+    db = PostgresConnection()
+    db.connect()
+    if db.pool is None and db.conn is None:
+        raise ConnectionError("Could not connect to PostgreSQL; check the DB_* settings.")
+    return db
+
+def _table_key(db, table):
+    def key():
+        # Changes whenever rows are loaded into or removed from the table
+        state = db.fetch_data(f'SELECT COUNT(*) AS row_count, MAX("Start"::timestamp) AS max_start FROM {table}')
+        if state is None:
+            # A missing key would match a checkpoint of whatever the table held before
+            raise ConnectionError(f"Could not read the row count and watermark of {table}.")
+        return state.to_dict('records')
+
+    return key
+
+def postgres_source(table='xdr_data', chunk_rows=50000, db=None):
+    db = db if db is not None else connect_postgres()
+
+    def load():
+        chunks = list(load_xdr_chunks(db, PIPELINE_COLUMNS, table, chunk_rows))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=PIPELINE_COLUMNS)
+
+    return load, _table_key(db, table)
+
+def postgres_engagement(table='xdr_data', db=None):
+    """Engagement metrics grouped by PostgreSQL, so only one row per subscriber is transferred."""
+    db = db if db is not None else connect_postgres()
+
+    def load():
+        engagement = ENGAGEMENT_SPEC.fetch(db, table)
+        if engagement is None:
+            raise ConnectionError(f"Could not aggregate engagement metrics from {table}.")
+        return engagement.astype({'MSISDN/Number': 'Int64'})
+
+    return load, _table_key(db, table)
+
+def replica_source(replica_dir):
+    from db_connection.xdr_replica import WATERMARK_FILE, read_replica
+
+    def load():
+        return apply_schema(read_replica(replica_dir, columns=PIPELINE_COLUMNS))
+
+    def key():
+        path = os.path.join(replica_dir, WATERMARK_FILE)
+        return open(path).read() if os.path.exists(path) else None
+
+    return load, key
+
+def replica_engagement(replica_dir):
+    """Engagement metrics from the per-subscriber state sync_replica maintains, or None without one.
+
+    The state is folded forward with only the newly replicated rows on every
+    sync, so this stage never re-aggregates the whole replica.
+    """
+    from db_connection.xdr_replica import AGGREGATES_FILE, WATERMARK_FILE
+    from subscriber_aggregates import SubscriberAggregates
+    path = os.path.join(replica_dir, AGGREGATES_FILE)
+    if not os.path.exists(path):
+        return None
+
+    def load():
+        engagement = SubscriberAggregates.load(path).engagement()
+        return engagement.astype({'MSISDN/Number': 'Int64'})
+
+    def key():
+        with open(os.path.join(replica_dir, WATERMARK_FILE)) as f:
+            return f.read()
+
+    return load, key
+
+def synthetic_source(rows, seed=0):
+    from synthetic_xdr import generate_xdr
+
+    def load():
+        return generate_xdr(rows, seed=seed, typed=True)[PIPELINE_COLUMNS]
+
+    return load, lambda: {'rows': rows, 'seed': seed}
+
+def build_pipeline(load, source_key, n_clusters=3, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, max_workers=4,
+                   model_dir=DEFAULT_STORE_DIR, engagement=None):
+    """The analysis DAG: engagement, experience and satisfaction branches off one xDR load.
+
+    engagement, a (load, source_key) pair such as postgres_engagement() or
+    replica_engagement() returns,
+    replaces aggregating the xDR load for the engagement stage.
+    """
+    if engagement is None:
+        engagement_step = Stage('engagement', engagement_stage, ['xdr'])
+    else:
+        engagement_step = Stage('engagement', engagement[0], source_key=engagement[1])
+    return Pipeline([
+        Stage('xdr', load, source_key=source_key),
+        engagement_step,
+        Stage('engagement_clusters', engagement_clusters_stage, ['engagement'], {'n_clusters': n_clusters}),
+        Stage('experience', experience_stage, ['xdr']),
+        Stage('experience_clusters', experience_clusters_stage, ['experience'], {'n_clusters': n_clusters}),
+        Stage('scores', scores_stage, ['xdr']),
+        Stage('satisfaction_model', satisfaction_model_stage, ['scores'], {'model_dir': model_dir}),
+        Stage('subscriber_profile', subscriber_profile_stage, ['engagement_clusters', 'experience_clusters', 'scores']),
+    ], checkpoint_dir=checkpoint_dir, max_workers=max_workers)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the telecom analysis pipeline with checkpointed stages.")
+    parser.add_argument('--source', choices=['postgres', 'replica', 'synthetic'], default='postgres')
+    parser.add_argument('--table', default='xdr_data')
+    parser.add_argument('--replica-dir', default='data/xdr_replica')
+    parser.add_argument('--rows', type=int, default=100000, help="Row count for --source synthetic.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--n-clusters', type=int, default=3)
+    parser.add_argument('--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--targets', nargs='+', help="Stages to bring up to date (default: all).")
+    parser.add_argument('--force', nargs='+', default=[], help="Stages to recompute even if checkpointed.")
+    args = parser.parse_args(argv)
+
+    engagement = None
+    if args.source == 'postgres':
+        db = connect_postgres()
+        load, source_key = postgres_source(args.table, db=db)
+        engagement = postgres_engagement(args.table, db=db)
+    elif args.source == 'replica':
+        load, source_key = replica_source(args.replica_dir)
+        engagement = replica_engagement(args.replica_dir)
+    else:
+        load, source_key = synthetic_source(args.rows, args.seed)
+
+    pipeline = build_pipeline(load, source_key, args.n_clusters, args.checkpoint_dir, args.workers,
+                              engagement=engagement)
+    for name, (state, path) in pipeline.run(args.targets, force=args.force).items():
+        print(f"{name:<22} {state:<7} {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from traffic_matrix import app_totals
+from utils import select_k
+
+# Plotting layer for the notebooks; the analysis modules never import this at load time
+
+def plot_elbow_method(df, columns, metrics=None):
+    """Determine optimal k for K-Means using Elbow Method."""
+    if metrics is None:
+        metrics, _, _ = select_k(df, columns, refit=False)
+    plt.figure(figsize=(8, 5))
+    plt.plot(metrics['k'], metrics['inertia'], marker='o')
+    plt.title('Elbow Method for Optimal k')
+    plt.xlabel('Number of Clusters (k)')
+    plt.ylabel('Inertia')
+    plt.show()
+
+# Plot throughput and TCP retransmission per handset type
+def plot_throughput_distribution(df):
+    plt.figure(figsize=(18, 6))  # Adjust figure size to avoid layout issues
+    sns.barplot(x='Handset Type', y='avg_throughput', data=df, palette='Blues', legend=False)  # Use legend=False
+    plt.title('Throughput Distribution by Handset Type')
+    plt.xlabel('Handset Type')
+    plt.ylabel('Average Throughput')
+    plt.xticks(rotation=45)  # Rotate x-axis labels if necessary
+    plt.tight_layout(pad=3.5)  # Adjust padding
+    plt.show()
+
+def plot_tcp_retransmission(df):
+    plt.figure(figsize=(18, 6))  # Adjust figure size
+    sns.barplot(x='Handset Type', y='avg_tcp_retransmission', data=df, palette='Reds', legend=False)  # Fix palette and hue warning
+    plt.title('TCP Retransmission by Handset Type')
+    plt.xlabel('Handset Type')
+    plt.ylabel('Average TCP Retransmission')
+    plt.xticks(rotation=45)  # Rotate x-axis labels if necessary
+    plt.tight_layout(pad=3.5)  # Adjust padding to fit layout
+    plt.show()
+
+def plot_top_apps(df):
+    """Plot the top 3 most used applications."""
+    # Aggregate total download traffic for each application in one reduction
+    totals = app_totals(df, ['Social Media', 'Google', 'Youtube', 'Netflix', 'Gaming', 'Other'], directions=('DL',))
+    app_traffic_df = totals['DL'].rename('Total Traffic').reset_index()
+    
+    # Select the top 3 applications by traffic
+    top_3_apps = app_traffic_df.nlargest(3, 'Total Traffic')
+    
+    # Plot the top 3 applications
+    top_3_apps.plot(kind='bar', x='Application', y='Total Traffic', legend=False)
+    plt.title('Top 3 Most Used Applications')
+    plt.xlabel('Application')
+    plt.ylabel('Total Traffic (Bytes)')
+    plt.show()
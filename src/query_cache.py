@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+DEFAULT_CACHE_DIR = 'artifacts/query_cache'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def cache_key(query, watermark):
+    """Hash the normalized SQL together with the watermark of the data it reads."""
+    digest = hashlib.sha256(' '.join(query.split()).encode())
+    digest.update(json.dumps(watermark, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+def rows_to_frame(rows):
+    """Query rows as a DataFrame with positional column names, for Parquet."""
+    width = len(rows[0]) if rows else 0
+    return pd.DataFrame.from_records(rows, columns=[f'c{i}' for i in range(width)])
+
+def frame_to_rows(frame):
+    """Back to a list of tuples like cursor.fetchall(), with None for missing values."""
+    values = frame.astype(object).where(frame.notna(), None)
+    return [tuple(row) for row in values.to_numpy()]
+
+class QueryCache:
+    """On-disk cache of query results shared by every process using the same directory.
+
+    Each result is one Parquet file named after the query and the watermark of the
+    tables it reads, so a change to the data yields a new key instead of a stale
+    hit; results for old watermarks are never read again and age out once the
+    cache grows beyond max_bytes, least recently used first. hits and misses
+    count this process's lookups.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, f'{key}.parquet')
+
+    def get(self, query, watermark):
+        """Return the cached rows or None; a hit refreshes its LRU position."""
+        path = self.path(cache_key(query, watermark))
+        try:
+            rows = frame_to_rows(pd.read_parquet(path))
+        except FileNotFoundError:
+            # Not cached, or evicted by another process in the meantime
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable query cache entry {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # e.g. a cache directory shared read-only: the entry is still valid
+            print(f"Could not refresh the LRU position of {path}: {e}")
+        self.hits += 1
+        return rows
+
+    def put(self, query, watermark, rows):
+        """Persist rows atomically and evict old entries if over budget."""
+        path = self.path(cache_key(query, watermark))
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            rows_to_frame(rows).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def fetch(self, query, watermark, load):
+        """Cached rows for query at this watermark, or load() them and cache the result.
+
+        Failing to cache (e.g. a full disk) is logged; the loaded rows are still returned.
+        """
+        rows = self.get(query, watermark)
+        if rows is None:
+            rows = load()
+            try:
+                self.put(query, watermark, rows)
+            except Exception as e:
+                print(f"Could not cache query result: {e}")
+        return rows
+
+    def entries(self):
+        """Cached results as (path, size, last_used), least recently used first."""
+        entries = []
+        for filename in os.listdir(self.root):
+            if filename.endswith('.parquet'):
+                path = os.path.join(self.root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, keep=None):
+        """Delete least-recently-used results until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        entries = self.entries()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries)}
@@ -0,0 +1,202 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+
+from customer_satisfaction_analysis import ENGAGEMENT_FEATURES, EXPERIENCE_FEATURES, cluster_distances
+
+KEY = 'MSISDN/Number'
+FEATURES = ENGAGEMENT_FEATURES + EXPERIENCE_FEATURES
+SATISFACTION_FEATURES = ['Avg RTT UL (ms)', 'Avg Bearer TP UL (kbps)']
+
+def save_scoring_artifact(path, models, regression):
+    """Persist what scoring needs as plain arrays: imputer means, centers and coefficients.
+
+    models is the bundle from fit_score_models; regression the fitted LinearRegression
+    from regression_model.
+    """
+    np.savez(
+        path,
+        engagement_means=models['engagement_imputer'].statistics_,
+        experience_means=models['experience_imputer'].statistics_,
+        engagement_centers=models['engagement_kmeans'].cluster_centers_,
+        experience_centers=models['experience_kmeans'].cluster_centers_,
+        regression_coef=np.asarray(regression.coef_, dtype=float),
+        regression_intercept=np.asarray(regression.intercept_, dtype=float)
+    )
+
+class DataFrameFeatureSource:
+    """Local stand-in feature source: per-MSISDN feature rows held in memory."""
+
+    def __init__(self, df):
+        self.features = df.groupby(KEY)[FEATURES].mean()
+        self.features.index = self.features.index.astype(float)
+
+    def get_features(self, msisdns):
+        return self.features.reindex(pd.Index(msisdns, name=KEY))
+
+class PostgresFeatureSource:
+    """Per-MSISDN feature means looked up in xdr_data for just the requested subscribers."""
+
+    def __init__(self, db, table='xdr_data'):
+        self.db = db
+        self.table = table
+
+    def get_features(self, msisdns):
+        index = pd.Index(msisdns, dtype=float, name=KEY)
+        if len(index) == 0:
+            return pd.DataFrame(columns=FEATURES, index=index, dtype=float)
+        averages = ', '.join(f'AVG("{col}") AS "{col}"' for col in FEATURES)
+        # One array parameter rather than an IN list keeps the statement text fixed
+        query = (f'SELECT "{KEY}", {averages} FROM {self.table} '
+                 f'WHERE "{KEY}" = ANY(%s) GROUP BY "{KEY}"')
+        features = self.db.fetch_data(query, params=(list(index),))
+        if features is None:
+            features = pd.DataFrame(columns=[KEY] + FEATURES)
+        return features.set_index(KEY).reindex(index)
+
+class ScoringService:
+    """Long-lived scorer for engagement, experience and satisfaction.
+
+    The persisted artifact is loaded once. Concurrent score() calls are queued and
+    a worker thread micro-batches them: it waits at most max_wait_ms for more
+    requests (up to max_batch_rows subscribers), looks their features up in one
+    call and scores them in one vectorized pass. A request with invalid MSISDNs
+    fails on its own without affecting the rest of its batch, and requests still
+    queued when the service stops fail with RuntimeError.
+    """
+
+    def __init__(self, artifact_path, feature_source, max_batch_rows=4096, max_wait_ms=2.0):
+        with np.load(artifact_path) as artifact:
+            self.artifact = {name: artifact[name] for name in artifact.files}
+        self.feature_source = feature_source
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self._latencies = deque(maxlen=100000)
+        self._requests = queue.Queue()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def start(self):
+        self._stopped.clear()
+        self._worker = threading.Thread(target=self._run, name='scoring-service', daemon=True)
+        self._worker.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._stopped.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        # Nothing will pick up what is still queued
+        while True:
+            try:
+                _, future, _ = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("Scoring service stopped before the request was scored"))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def score_features(self, features):
+        """Score a DataFrame of feature rows in one vectorized pass."""
+        artifact = self.artifact
+        engagement = features[ENGAGEMENT_FEATURES].to_numpy(dtype=float)
+        experience = features[EXPERIENCE_FEATURES].to_numpy(dtype=float)
+        missing = np.isnan(engagement).all(axis=1) & np.isnan(experience).all(axis=1)
+        # Impute with the training means, as the fitted SimpleImputers did
+        engagement = np.where(np.isnan(engagement), artifact['engagement_means'], engagement)
+        experience = np.where(np.isnan(experience), artifact['experience_means'], experience)
+
+        engagement_distances = cluster_distances(engagement, artifact['engagement_centers'])
+        experience_distances = cluster_distances(experience, artifact['experience_centers'])
+        satisfaction_inputs = np.column_stack(
+            [experience[:, EXPERIENCE_FEATURES.index(col)] for col in SATISFACTION_FEATURES])
+        satisfaction = satisfaction_inputs @ artifact['regression_coef'] + artifact['regression_intercept']
+
+        scores = pd.DataFrame({
+            'engagement_score': engagement_distances[:, 0],
+            'experience_score': experience_distances[:, 0],
+            'satisfaction_score': satisfaction,
+            'engagement_cluster': pd.array(engagement_distances.argmin(axis=1), dtype='Int64'),
+            'experience_cluster': pd.array(experience_distances.argmin(axis=1), dtype='Int64')
+        }, index=features.index)
+        # Subscribers the feature source does not know get no score and no cluster
+        scores.loc[missing, ['engagement_score', 'experience_score', 'satisfaction_score']] = np.nan
+        scores.loc[missing, ['engagement_cluster', 'experience_cluster']] = pd.NA
+        return scores
+
+    def score(self, msisdns, timeout=None):
+        """Score a batch of MSISDNs; blocks until the micro-batch containing it is done."""
+        future = Future()
+        with self._lock:
+            if self._stopped.is_set():
+                raise RuntimeError("Scoring service is stopped")
+            self._requests.put((list(msisdns), future, time.perf_counter()))
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        """Block for one request, then gather more until the batch is full or the wait expires."""
+        try:
+            batch = [self._requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request[0])
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            requests = []
+            for keys, future, submitted in batch:
+                try:
+                    requests.append((np.asarray(keys, dtype=float).ravel(), future, submitted))
+                except (TypeError, ValueError) as e:
+                    future.set_exception(ValueError(f"Invalid MSISDN in scoring request: {e}"))
+            if not requests:
+                continue
+            try:
+                msisdns = pd.unique(np.concatenate([keys for keys, _, _ in requests]))
+                scores = self.score_features(self.feature_source.get_features(msisdns))
+                self.batches += 1
+                for keys, future, submitted in requests:
+                    future.set_result(scores.reindex(pd.Index(keys, name=KEY)))
+                    self._latencies.append(time.perf_counter() - submitted)
+            except Exception as e:
+                for _, future, _ in requests:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def latency_stats(self):
+        """Request latency percentiles in milliseconds over the recent requests."""
+        latencies = np.array(self._latencies) * 1000.0
+        if len(latencies) == 0:
+            return {'requests': 0, 'p50_ms': None, 'p99_ms': None}
+        return {
+            'requests': len(latencies),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99))
+        }
@@ -0,0 +1,316 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+class TopK:
+    """Streaming k largest (or smallest) values with their keys, in O(k) memory.
+
+    Each update() pre-selects the chunk's own top k with a linear-time
+    partition and pushes only those through a size-k heap. Ties go to the value
+    seen first, like Series.nlargest(keep='first'). NaN values are skipped.
+    """
+
+    def __init__(self, k=10, largest=True):
+        self.k = k
+        self.largest = largest
+        self.seen = 0
+        # Heap root is the entry that would be evicted next: the worst value, latest arrival
+        self._heap = []
+
+    def _push(self, value, position, key):
+        entry = (value if self.largest else -value, -position, key)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def update(self, values, keys=None):
+        """Fold in a chunk of values; keys default to the Series index (or positions)."""
+        if isinstance(values, pd.Series):
+            keys = values.index if keys is None else keys
+        values = np.asarray(values, dtype='float64')
+        keys = np.arange(self.seen, self.seen + len(values)) if keys is None else np.asarray(keys)
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid) > self.k:
+            ranked = values[valid] if self.largest else -values[valid]
+            threshold = np.partition(ranked, len(valid) - self.k)[len(valid) - self.k]
+            better = valid[ranked > threshold]
+            # Among values tied with the k-th, only the earliest arrivals can make the cut
+            tied = valid[ranked == threshold][:self.k - len(better)]
+            valid = np.sort(np.concatenate([better, tied]))
+        for i in valid:
+            self._push(values[i], self.seen + i, keys[i])
+        self.seen += len(values)
+        return self
+
+    def merge(self, other):
+        """Combine with a TopK built over another partition; its values count as later arrivals."""
+        for value, neg_position, key in other._heap:
+            value = value if other.largest else -value
+            self._push(value, self.seen - neg_position, key)
+        self.seen += other.seen
+        return self
+
+    def result(self, value_name='value', key_name='index'):
+        """Best first, as a DataFrame of (key, value)."""
+        entries = sorted(self._heap, reverse=True)
+        values = [value if self.largest else -value for value, _, _ in entries]
+        return pd.DataFrame({key_name: [key for _, _, key in entries], value_name: values})
+
+class SpaceSaving:
+    """Mergeable Space-Saving summary of the most frequent values.
+
+    At most `capacity` counters are kept. Each reported count is an upper bound
+    on the true frequency and count - error a lower bound; any value whose
+    frequency exceeds total / capacity is guaranteed to be monitored. Chunks are
+    reduced to exact counts first and merged in, so the cost per chunk is one
+    value_counts plus a capacity-sized merge.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+        # Upper bound on the frequency of any value that is not monitored
+        self.floor = 0
+        self.total = 0
+
+    @classmethod
+    def from_counts(cls, counts, capacity=100):
+        summary = cls(capacity)
+        counts = counts.sort_values(ascending=False, kind='stable')
+        summary.counts = counts.iloc[:capacity].astype('int64')
+        summary.errors = pd.Series(0, index=summary.counts.index, dtype='int64')
+        summary.floor = int(counts.iloc[capacity]) if len(counts) > capacity else 0
+        summary.total = int(counts.sum())
+        return summary
+
+    def update(self, values):
+        """Fold in a chunk of values (NaN is ignored)."""
+        return self.merge(SpaceSaving.from_counts(pd.Series(values).value_counts(dropna=True), self.capacity))
+
+    def merge(self, other):
+        # Values missing from one summary may have occurred up to its floor times there
+        index = self.counts.index.union(other.counts.index)
+        counts = (self.counts.reindex(index, fill_value=self.floor)
+                  + other.counts.reindex(index, fill_value=other.floor))
+        errors = (self.errors.reindex(index, fill_value=self.floor)
+                  + other.errors.reindex(index, fill_value=other.floor))
+        counts = counts.sort_values(ascending=False, kind='stable')
+        dropped = counts.iloc[self.capacity:]
+        self.counts = counts.iloc[:self.capacity]
+        self.errors = errors.reindex(self.counts.index)
+        self.floor = max(self.floor + other.floor, int(dropped.max()) if len(dropped) else 0)
+        self.total += other.total
+        return self
+
+    def top(self, n=10):
+        """The n most frequent values with their count bounds, most frequent first."""
+        result = pd.DataFrame({'count': self.counts, 'error': self.errors}).head(n)
+        result['guaranteed'] = result['count'] - result['error']
+        result.index.name = 'value'
+        return result.reset_index()
+
+    def heavy_hitters(self, share):
+        """Values whose frequency certainly exceeds share of all values seen."""
+        guaranteed = self.counts - self.errors
+        return guaranteed[guaranteed > share * self.total].index.tolist()
+
+class CountMinSketch:
+    """Count-Min sketch: approximate frequency of any value in fixed memory.
+
+    Estimates never undercount and overcount by at most 2 * total / width with
+    probability 1 - 0.5 ** depth. Sketches with the same width, depth and seed
+    merge by adding their tables.
+    """
+
+    def __init__(self, width=2048, depth=5, seed=0):
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, width), dtype='int64')
+        self.total = 0
+
+    def _buckets(self, values, row):
+        hashes = pd.util.hash_array(np.asarray(values, dtype=object), hash_key=f'{self.seed:08d}{row:08d}')
+        return (hashes % np.uint64(self.width)).astype('int64')
+
+    def update(self, values):
+        counts = pd.Series(values).value_counts(dropna=True)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(self._buckets(counts.index, row),
+                                           weights=counts.to_numpy(), minlength=self.width).astype('int64')
+        self.total += int(counts.sum())
+        return self
+
+    def estimate(self, values):
+        values = list(values)
+        if not values:
+            return np.zeros(0, dtype='int64')
+        return np.min([self.table[row, self._buckets(values, row)] for row in range(self.depth)], axis=0)
+
+    def merge(self, other):
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Count-Min sketches must share width, depth and seed to be merged")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+class KLLSketch:
+    """Mergeable KLL quantile sketch over a stream of numbers.
+
+    Level h holds items of weight 2**h; a level over capacity is sorted and every
+    other item (random offset) is promoted. With k=200 the rank error of any
+    quantile is about 1.3% of n at 99% confidence, using at most about 3k
+    items regardless of n. Exact count, min and max are kept alongside.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.min = np.nan
+        self.max = np.nan
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2.0 / 3.0) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                grew = level + 1 == len(self.levels)
+                if grew:
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so the promoted weight is exact
+                kept, items = (items[-1:], items[:-1]) if len(items) % 2 else (items[:0], items)
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level] = kept
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                # Capacities depend on the height, so recheck from the bottom after growing
+                level = 0 if grew else level + 1
+            else:
+                level += 1
+
+    def update(self, values):
+        """Fold in a chunk of values (NaN is ignored)."""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.n += len(values)
+            self.min = np.nanmin([self.min, values.min()])
+            self.max = np.nanmax([self.max, values.max()])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = np.nanmin([self.min, other.min])
+        self.max = np.nanmax([self.max, other.max])
+        self._compress()
+        return self
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantile(self, q):
+        """Approximate quantile(s) for q in [0, 1], linearly interpolated like numpy's default.
+
+        Each retained item stands for `weight` consecutive ranks; with no
+        compaction yet the result equals np.quantile on the raw values.
+        """
+        q = np.asarray(q, dtype='float64')
+        if self.n == 0:
+            return np.full(q.shape, np.nan)
+        values, weights = self._weighted()
+        end = np.cumsum(weights) - 1
+        ranks = np.column_stack([end - weights + 1, end]).ravel()
+        result = np.interp(q * end[-1], ranks, np.repeat(values, 2))
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+        return result if result.ndim else float(result)
+
+    def rank(self, x):
+        """Approximate fraction of values <= x."""
+        if self.n == 0:
+            return np.nan
+        values, weights = self._weighted()
+        return float(weights[:np.searchsorted(values, x, side='right')].sum() / weights.sum())
+
+class StreamingDescribe:
+    """Mergeable `describe()` for a numeric column: exact count, mean, std, min and
+    max from running moments, percentiles from a KLL sketch."""
+
+    def __init__(self, k=200, seed=0):
+        self.sketch = KLLSketch(k, seed)
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        self.sketch.update(values)
+        self.sum += values.sum()
+        self.sumsq += (values ** 2).sum()
+        return self
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.sum += other.sum
+        self.sumsq += other.sumsq
+        return self
+
+    def describe(self, percentiles=(0.25, 0.5, 0.75)):
+        n = self.sketch.n
+        mean = self.sum / n if n else np.nan
+        variance = (self.sumsq - n * mean ** 2) / (n - 1) if n > 1 else np.nan
+        stats = {'count': float(n), 'mean': mean, 'std': np.sqrt(max(variance, 0.0)), 'min': self.sketch.min}
+        for p in percentiles:
+            stats[f'{p * 100:g}%'] = self.sketch.quantile(p)
+        stats['max'] = self.sketch.max
+        return pd.Series(stats)
+
+def quantile_edges(sketch, classes=10):
+    """Bin edges splitting the sketched distribution into equal-count classes."""
+    return sketch.quantile(np.linspace(0, 1, classes + 1))
+
+def assign_classes(values, edges):
+    """1-based class per value, with pd.qcut's right-closed bins; NaN stays NaN."""
+    values = np.asarray(values, dtype='float64')
+    classes = np.searchsorted(edges[1:-1], values, side='left').astype('float64') + 1
+    classes[np.isnan(values)] = np.nan
+    return classes
+
+def decile_summary(make_chunks, column, sum_columns, classes=10, k=200):
+    """Segment rows into quantile classes of `column` and total sum_columns per class.
+
+    make_chunks() must return a fresh iterable of DataFrame chunks each time it is
+    called (e.g. per-subscriber rows fetched from xdr_subscriber_rollup): the
+    first pass builds the sketch, the second assigns classes and sums.
+    """
+    sketch = KLLSketch(k)
+    for chunk in make_chunks():
+        sketch.update(chunk[column])
+    edges = quantile_edges(sketch, classes)
+
+    totals = None
+    for chunk in make_chunks():
+        labels = assign_classes(chunk[column], edges)
+        partial = chunk[sum_columns].groupby(labels).sum()
+        totals = partial if totals is None else totals.add(partial, fill_value=0)
+    if totals is None:
+        return pd.DataFrame(columns=sum_columns)
+    totals.index = totals.index.astype(int)
+    totals.index.name = 'Decile Class'
+    return totals
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+ENGAGEMENT_METRICS = ['Bearer Id', 'Dur. (ms)', 'total_traffic']
+EXPERIENCE_METRICS = ['TCP DL Retrans. Vol (Bytes)', 'Avg RTT DL (ms)', 'Avg Bearer TP DL (kbps)']
+
+class SubscriberAggregates:
+    """Mergeable per-subscriber partial aggregates.
+
+    For every metric the state keeps the non-null count, sum and M2 (sum of
+    squared deviations from the mean) per subscriber, which is enough to rebuild
+    means and variances. Partial states are combined with Chan et al.'s pairwise
+    update, so variances stay accurate for large byte counts where sum-of-squares
+    formulas cancel. New xDR batches are folded in with update() and
+    independently computed partitions are combined with merge(), so a refresh
+    only has to process new records.
+    """
+
+    def __init__(self, metrics=None, first_columns=('Handset Type',), key='MSISDN/Number'):
+        self.metrics = list(metrics) if metrics is not None else ENGAGEMENT_METRICS + EXPERIENCE_METRICS
+        self.first_columns = list(first_columns)
+        self.key = key
+        self.state = self._empty_state()
+
+    def columns(self):
+        """Raw xDR columns update() reads."""
+        raw = [col for col in self.metrics if col != 'total_traffic']
+        if 'total_traffic' in self.metrics:
+            raw += ['Total UL (Bytes)', 'Total DL (Bytes)']
+        return list(dict.fromkeys([self.key] + raw + self.first_columns))
+
+    def _state_columns(self):
+        columns = []
+        for suffix in ('count', 'sum', 'm2'):
+            columns += [f'{metric}__{suffix}' for metric in self.metrics]
+        return columns + self.first_columns
+
+    def _empty_state(self):
+        state = pd.DataFrame(columns=self._state_columns())
+        state.index.name = self.key
+        return state
+
+    def _partial(self, batch):
+        """Reduce one raw batch to partial states per subscriber."""
+        if 'total_traffic' in self.metrics and 'total_traffic' not in batch.columns:
+            batch = batch.assign(total_traffic=batch['Total UL (Bytes)'] + batch['Total DL (Bytes)'])
+        keys = batch[self.key]
+        values = batch[self.metrics].astype('float64')
+        grouped = values.groupby(keys, sort=False)
+        counts = grouped.count()
+        # Groupby variance is computed with Welford's algorithm, not from squared sums
+        m2 = (grouped.var(ddof=0) * counts).fillna(0.0)
+        partial = pd.concat([
+            counts.add_suffix('__count'),
+            grouped.sum().add_suffix('__sum'),
+            m2.add_suffix('__m2')
+        ], axis=1)
+        for col in self.first_columns:
+            partial[col] = batch[col].groupby(keys, sort=False).first()
+        partial.index.name = self.key
+        return partial
+
+    def _block(self, state, suffix):
+        return state[[f'{metric}__{suffix}' for metric in self.metrics]].to_numpy(dtype='float64')
+
+    def _combine(self, first, second):
+        """Combine two partial states; `first` wins for first-seen columns."""
+        if first.empty:
+            return second
+        if second.empty:
+            return first
+        index = first.index.union(second.index, sort=False)
+        first, second = first.reindex(index), second.reindex(index)
+        n_a = np.nan_to_num(self._block(first, 'count'))
+        n_b = np.nan_to_num(self._block(second, 'count'))
+        sum_a = np.nan_to_num(self._block(first, 'sum'))
+        sum_b = np.nan_to_num(self._block(second, 'sum'))
+        m2_a = np.nan_to_num(self._block(first, 'm2'))
+        m2_b = np.nan_to_num(self._block(second, 'm2'))
+        n = n_a + n_b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = np.where((n_a > 0) & (n_b > 0), sum_b / n_b - sum_a / n_a, 0.0)
+            correction = np.where(n > 0, delta ** 2 * n_a * n_b / n, 0.0)
+        combined = pd.DataFrame(index=index)
+        for suffix, block in (('count', n), ('sum', sum_a + sum_b), ('m2', m2_a + m2_b + correction)):
+            for i, metric in enumerate(self.metrics):
+                combined[f'{metric}__{suffix}'] = block[:, i]
+        for col in self.first_columns:
+            combined[col] = first[col].combine_first(second[col])
+        combined.index.name = self.key
+        return combined
+
+    def update(self, batch):
+        """Fold a batch of raw xDR rows into the state."""
+        self.state = self._combine(self.state, self._partial(batch))
+        return self
+
+    def merge(self, other):
+        """Merge another partition's state into this one."""
+        if other.metrics != self.metrics or other.first_columns != self.first_columns:
+            raise ValueError("Cannot merge aggregates built over different metrics.")
+        self.state = self._combine(self.state, other.state)
+        return self
+
+    def counts(self):
+        """Non-null observation count per subscriber and metric."""
+        return self.state[[f'{metric}__count' for metric in self.metrics]].rename(
+            columns=lambda col: col.rsplit('__', 1)[0]).astype('int64')
+
+    def sums(self):
+        """Sum per subscriber and metric."""
+        return self.state[[f'{metric}__sum' for metric in self.metrics]].rename(
+            columns=lambda col: col.rsplit('__', 1)[0]).astype('float64')
+
+    def means(self):
+        """Mean per subscriber and metric (NaN where no values were seen)."""
+        return self.sums() / self.counts().replace(0, float('nan'))
+
+    def variances(self, ddof=1):
+        """Variance per subscriber and metric (NaN with ddof or fewer values)."""
+        counts = self.counts()
+        m2 = self.state[[f'{metric}__m2' for metric in self.metrics]].rename(
+            columns=lambda col: col.rsplit('__', 1)[0]).astype('float64')
+        return m2 / (counts - ddof).where(counts - ddof > 0)
+
+    def engagement(self):
+        """Per-customer engagement metrics in the shape of utils.aggregate_engagement."""
+        counts = self.counts()
+        sums = self.sums()
+        user_agg = pd.DataFrame({
+            'sessions_frequency': counts['Bearer Id'],
+            'session_duration': sums['Dur. (ms)'],
+            'total_traffic': sums['total_traffic']
+        })
+        return user_agg.sort_index().reset_index()
+
+    def experience(self):
+        """Per-customer experience metrics in the shape of aggregate_per_customer."""
+        means = self.means()
+        agg_df = pd.DataFrame({
+            'avg_tcp_retransmission': means['TCP DL Retrans. Vol (Bytes)'],
+            'avg_rtt': means['Avg RTT DL (ms)'],
+            'avg_throughput': means['Avg Bearer TP DL (kbps)'],
+            'Handset Type': self.state['Handset Type']
+        })
+        return agg_df.sort_index().reset_index()
+
+    def save(self, path):
+        """Persist the partial state so the next refresh can continue from it."""
+        self.state.to_pickle(path)
+
+    @classmethod
+    def load(cls, path, key='MSISDN/Number'):
+        """Restore a state written by save()."""
+        state = pd.read_pickle(path)
+        metrics = [col[:-len('__count')] for col in state.columns if col.endswith('__count')]
+        suffixes = ('__count', '__sum', '__m2', '__sumsq')
+        first_columns = [col for col in state.columns if not col.endswith(suffixes)]
+        for metric in metrics:
+            # States saved before M2 was kept carry a sum of squares instead
+            if f'{metric}__sumsq' in state.columns:
+                counts = state[f'{metric}__count'].replace(0, np.nan)
+                m2 = state.pop(f'{metric}__sumsq') - state[f'{metric}__sum'] ** 2 / counts
+                state[f'{metric}__m2'] = m2.clip(lower=0).fillna(0.0)
+        aggregates = cls(metrics=metrics, first_columns=first_columns, key=key)
+        aggregates.state = state
+        return aggregates
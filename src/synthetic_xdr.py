@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from xdr_schema import XDR_SCHEMA, apply_schema
+
+# Share of missing values per column, as observed in the 150k-row xDR export
+MISSING_RATES = {
+    'Bearer Id': 0.0066,
+    'IMSI': 0.0038,
+    'MSISDN/Number': 0.0071,
+    'IMEI': 0.0038,
+    'Last Location Name': 0.0077,
+    'Avg RTT DL (ms)': 0.1855,
+    'Avg RTT UL (ms)': 0.1854,
+    'TCP DL Retrans. Vol (Bytes)': 0.5876,
+    'TCP UL Retrans. Vol (Bytes)': 0.6443,
+    'HTTP DL (Bytes)': 0.5432,
+    'HTTP UL (Bytes)': 0.5454,
+    'Handset Manufacturer': 0.0038,
+    'Handset Type': 0.0038,
+    'Nb of sec with 125000B < Vol DL': 0.6502,
+    'Nb of sec with 1250B < Vol UL < 6250B': 0.6193,
+    'Nb of sec with 31250B < Vol DL < 125000B': 0.6239,
+    'Nb of sec with 37500B < Vol UL': 0.8684,
+    'Nb of sec with 6250B < Vol DL < 31250B': 0.5888,
+    'Nb of sec with 6250B < Vol UL < 37500B': 0.7456,
+}
+
+MANUFACTURERS = ['Apple', 'Samsung', 'Huawei', 'undefined', 'Sony Mobile Communications AB',
+                 'Wiko Global Sasu', 'Xiaomi Communications Co', 'Lenovo Mobile Communication Technology Ltd']
+HANDSETS_PER_MANUFACTURER = 40
+PERIOD_SECONDS = 26 * 24 * 3600  # the export covers roughly 4 to 30 April 2019
+
+# Per-application (DL range, UL range) in bytes; app volumes are close to uniform in the export
+APP_VOLUMES = {
+    'Social Media': ((0, 3.6e6), (0, 6.6e4)),
+    'Google': ((0, 1.2e7), (0, 4.3e6)),
+    'Email': ((0, 3.6e6), (0, 1.1e6)),
+    'Youtube': ((0, 2.3e7), (0, 2.2e7)),
+    'Netflix': ((0, 2.3e7), (0, 2.2e7)),
+    'Gaming': ((0, 8.5e8), (0, 1.7e7)),
+    'Other': ((0, 8.5e8), (0, 1.7e7)),
+}
+
+def _with_missing(rng, values, column):
+    rate = MISSING_RATES.get(column, 0.0)
+    if rate:
+        values = pd.Series(values).where(rng.random(len(values)) >= rate).to_numpy()
+    return values
+
+def _format_timestamps(ts):
+    """Format as the export does (e.g. '4/4/2019 07:05'); %-m/%-d only exist in glibc's strftime."""
+    return (ts.month.astype(str) + '/' + ts.day.astype(str) + '/' + ts.strftime('%Y %H:%M')).to_numpy(dtype=object)
+
+def generate_xdr_chunk(n_rows, subscriber_cdf, rng, period=(0.0, 1.0)):
+    """Generate n_rows synthetic xDR sessions with the real column set.
+
+    subscriber_cdf is the cumulative session share per subscriber; period is the
+    fraction of the capture window this chunk covers, so chunks stay in Start order.
+    """
+    subscriber = np.searchsorted(subscriber_cdf, rng.random(n_rows) * subscriber_cdf[-1])
+
+    seconds = np.sort(rng.uniform(period[0] * PERIOD_SECONDS, period[1] * PERIOD_SECONDS, n_rows))
+    start = pd.Timestamp('2019-04-04') + pd.to_timedelta(seconds.round(), unit='s')
+    duration = np.clip(rng.lognormal(11.3, 0.8, n_rows), 7142, 1.86e6).round()
+    end = start + pd.to_timedelta(duration, unit='ms')
+
+    manufacturer_idx = np.minimum(rng.zipf(1.8, n_rows) - 1, len(MANUFACTURERS) - 1)
+    handset_idx = np.minimum(rng.zipf(1.5, n_rows) - 1, HANDSETS_PER_MANUFACTURER - 1)
+    manufacturers = np.array(MANUFACTURERS, dtype=object)[manufacturer_idx]
+    handsets = np.char.add(np.char.add(manufacturers.astype(str), ' Model '), handset_idx.astype(str)).astype(object)
+
+    data = {
+        'Bearer Id': rng.uniform(6.9e18, 1.32e19, n_rows).round(-4),
+        'Start': _format_timestamps(start),
+        'Start ms': rng.integers(0, 1000, n_rows).astype(float),
+        'End': _format_timestamps(end),
+        'End ms': rng.integers(0, 1000, n_rows).astype(float),
+        'Dur. (ms)': duration,
+        'IMSI': 208200000000000.0 + subscriber,
+        'MSISDN/Number': 33600000000.0 + subscriber,
+        'IMEI': 35000000000000.0 + subscriber * 7 % 10 ** 13,
+        'Last Location Name': np.char.add('L', (rng.integers(0, 45000, n_rows)).astype(str)).astype(object),
+        'Avg RTT DL (ms)': np.round(rng.lognormal(3.7, 1.0, n_rows)),
+        'Avg RTT UL (ms)': np.round(rng.lognormal(1.8, 1.3, n_rows)),
+        'Avg Bearer TP DL (kbps)': np.round(rng.lognormal(5.5, 2.5, n_rows)),
+        'Avg Bearer TP UL (kbps)': np.round(rng.lognormal(4.5, 1.8, n_rows)),
+        'TCP DL Retrans. Vol (Bytes)': np.round(rng.lognormal(10.5, 3.0, n_rows)),
+        'TCP UL Retrans. Vol (Bytes)': np.round(rng.lognormal(9.0, 2.5, n_rows)),
+        'HTTP DL (Bytes)': np.round(rng.lognormal(14.0, 2.5, n_rows)),
+        'HTTP UL (Bytes)': np.round(rng.lognormal(12.0, 2.0, n_rows)),
+        'Activity Duration DL (ms)': np.round(rng.lognormal(10.5, 1.5, n_rows)),
+        'Activity Duration UL (ms)': np.round(rng.lognormal(10.5, 1.5, n_rows)),
+        'Dur. (ms).1': duration * 1000 + rng.integers(0, 1000, n_rows),
+        'Handset Manufacturer': manufacturers,
+        'Handset Type': handsets,
+    }
+    # Throughput buckets are percentages of session time that add up to 100
+    for buckets in (['DL TP < 50 Kbps (%)', '50 Kbps < DL TP < 250 Kbps (%)',
+                     '250 Kbps < DL TP < 1 Mbps (%)', 'DL TP > 1 Mbps (%)'],
+                    ['UL TP < 10 Kbps (%)', '10 Kbps < UL TP < 50 Kbps (%)',
+                     '50 Kbps < UL TP < 300 Kbps (%)', 'UL TP > 300 Kbps (%)']):
+        shares = rng.dirichlet([8.0, 1.0, 0.5, 0.5], n_rows) * 100
+        for i, column in enumerate(buckets):
+            data[column] = np.round(shares[:, i])
+    for column in [col for col in XDR_SCHEMA if col.startswith('Nb of sec')]:
+        data[column] = np.round(rng.lognormal(4.0, 1.5, n_rows))
+
+    total_dl = np.zeros(n_rows)
+    total_ul = np.zeros(n_rows)
+    for app, ((dl_low, dl_high), (ul_low, ul_high)) in APP_VOLUMES.items():
+        data[f'{app} DL (Bytes)'] = np.round(rng.uniform(dl_low, dl_high, n_rows))
+        data[f'{app} UL (Bytes)'] = np.round(rng.uniform(ul_low, ul_high, n_rows))
+        total_dl += data[f'{app} DL (Bytes)']
+        total_ul += data[f'{app} UL (Bytes)']
+    data['Total UL (Bytes)'] = total_ul
+    data['Total DL (Bytes)'] = total_dl
+
+    df = pd.DataFrame({col: _with_missing(rng, data[col], col) for col in XDR_SCHEMA})
+    return df
+
+def generate_xdr_chunks(n_rows, chunk_rows=1000000, n_subscribers=None, seed=0):
+    """Yield synthetic xDR sessions in chunks; deterministic for a given seed and chunk_rows."""
+    # Sized so that, as in the export, ~1.4 sessions fall on each active subscriber
+    n_subscribers = n_subscribers or max(1, int(n_rows / 0.55))
+    rng = np.random.default_rng(seed)
+    # Activity is skewed: most subscribers have one or two sessions, a few have many
+    subscriber_cdf = np.cumsum(rng.lognormal(0.0, 0.75, n_subscribers))
+    for offset in range(0, n_rows, chunk_rows):
+        rows = min(chunk_rows, n_rows - offset)
+        yield generate_xdr_chunk(rows, subscriber_cdf, rng, period=(offset / n_rows, (offset + rows) / n_rows))
+
+def generate_xdr(n_rows, n_subscribers=None, seed=0, typed=False):
+    """Generate a synthetic xDR table; typed=True applies the compact xDR schema."""
+    df = pd.concat(generate_xdr_chunks(n_rows, n_subscribers=n_subscribers, seed=seed), ignore_index=True)
+    return apply_schema(df) if typed else df
@@ -1,26 +1,56 @@
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from scipy.stats import mode
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+from sketches import TopK, SpaceSaving
+from parallel_groupby import parallel_groupby
+from instrumentation import instrument
+
+# scikit-learn is imported where it is used and plotting lives in plots.py
+PLOTS = ('plot_throughput_distribution', 'plot_tcp_retransmission')
+
+def __getattr__(name):
+    if name in PLOTS:
+        import plots
+        return getattr(plots, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Load the dataset
 def load_data(query, conn):
     """Load data from the database."""
     return pd.read_sql(query, conn)
 
+EXPERIENCE_COLUMNS = ['TCP DL Retrans. Vol (Bytes)', 'Avg RTT DL (ms)', 'Avg Bearer TP DL (kbps)']
+
 # Clean data and aggregate per customer
-def clean_data(df):
-    for col in ['TCP DL Retrans. Vol (Bytes)', 'Avg RTT DL (ms)', 'Avg Bearer TP DL (kbps)']:
+@instrument
+def clean_data(df, fill_values=None):
+    """Fill missing experience metrics with the column mean.
+
+    Pass fill_values (e.g. from compute_fill_values) when cleaning one chunk of a
+    larger table so every chunk is filled with the same table-wide means.
+    """
+    for col in EXPERIENCE_COLUMNS:
         if col in df.columns:
-            mean_value = df[col].mean()
+            mean_value = df[col].mean() if fill_values is None else fill_values[col]
             df[col].fillna(mean_value, inplace=True)
         else:
             print(f"Column '{col}' not found in the DataFrame")
     return df
 
-def aggregate_per_customer(df):
+def compute_fill_values(chunks):
+    """Compute table-wide column means for clean_data from an iterable of chunks."""
+    sums = pd.Series(0.0, index=EXPERIENCE_COLUMNS)
+    counts = pd.Series(0, index=EXPERIENCE_COLUMNS)
+    for chunk in chunks:
+        present = [col for col in EXPERIENCE_COLUMNS if col in chunk.columns]
+        sums[present] += chunk[present].sum()
+        counts[present] += chunk[present].count()
+    return (sums / counts.replace(0, float('nan'))).to_dict()
+
+@instrument
+def aggregate_per_customer(df, n_jobs=None):
+    """Average experience metrics per customer; n_jobs > 1 spreads hash partitions over processes."""
+    if n_jobs and n_jobs > 1:
+        columns = ['MSISDN/Number'] + EXPERIENCE_COLUMNS + ['Handset Type']
+        return parallel_groupby(df[columns], aggregate_per_customer, max_workers=n_jobs)
     agg_df = df.groupby('MSISDN/Number').agg({
         'TCP DL Retrans. Vol (Bytes)': 'mean',
         'Avg RTT DL (ms)': 'mean',
@@ -36,6 +66,43 @@ def aggregate_per_customer(df):
     
     return agg_df
 
+def aggregate_per_customer_chunks(chunks):
+    """Aggregate experience metrics per customer over an iterable of DataFrame chunks.
+
+    Means are carried as running sums and non-null counts so each chunk can be
+    folded in and dropped; the first non-null handset seen is kept.
+    """
+    running = None
+    for chunk in chunks:
+        partial = chunk.groupby('MSISDN/Number', sort=False).agg(
+            **{f'{col}_sum': (col, 'sum') for col in EXPERIENCE_COLUMNS},
+            **{f'{col}_count': (col, 'count') for col in EXPERIENCE_COLUMNS},
+            **{'Handset Type': ('Handset Type', 'first')}
+        )
+        if running is None:
+            running = partial
+        else:
+            combined = pd.concat([running, partial]).groupby(level=0, sort=False)
+            handsets = combined['Handset Type'].first()
+            running = combined.sum(numeric_only=True)
+            running['Handset Type'] = handsets
+    if running is None:
+        return pd.DataFrame(columns=['MSISDN/Number', 'avg_tcp_retransmission', 'avg_rtt', 'avg_throughput', 'Handset Type'])
+
+    agg_df = pd.DataFrame(index=running.index)
+    for col in EXPERIENCE_COLUMNS:
+        agg_df[col] = running[f'{col}_sum'] / running[f'{col}_count'].replace(0, float('nan'))
+    agg_df['Handset Type'] = running['Handset Type']
+    agg_df = agg_df.sort_index().reset_index()
+
+    agg_df.rename(columns={
+        'TCP DL Retrans. Vol (Bytes)': 'avg_tcp_retransmission',
+        'Avg RTT DL (ms)': 'avg_rtt',
+        'Avg Bearer TP DL (kbps)': 'avg_throughput'
+    }, inplace=True)
+
+    return agg_df
+
 # Get top, bottom, and most frequent values for a column
 def get_top_bottom_frequent(df, column):
     top_10 = df[column].nlargest(10).reset_index()
@@ -52,36 +119,48 @@ def get_top_bottom_frequent(df, column):
     
     return top_10, bottom_10, most_frequent
 
-# Plot throughput and TCP retransmission per handset type
-def plot_throughput_distribution(df):
-    plt.figure(figsize=(18, 6))  # Adjust figure size to avoid layout issues
-    sns.barplot(x='Handset Type', y='avg_throughput', data=df, palette='Blues', legend=False)  # Use legend=False
-    plt.title('Throughput Distribution by Handset Type')
-    plt.xlabel('Handset Type')
-    plt.ylabel('Average Throughput')
-    plt.xticks(rotation=45)  # Rotate x-axis labels if necessary
-    plt.tight_layout(pad=3.5)  # Adjust padding
-    plt.show()
-
-def plot_tcp_retransmission(df):
-    plt.figure(figsize=(18, 6))  # Adjust figure size
-    sns.barplot(x='Handset Type', y='avg_tcp_retransmission', data=df, palette='Reds', legend=False)  # Fix palette and hue warning
-    plt.title('TCP Retransmission by Handset Type')
-    plt.xlabel('Handset Type')
-    plt.ylabel('Average TCP Retransmission')
-    plt.xticks(rotation=45)  # Rotate x-axis labels if necessary
-    plt.tight_layout(pad=3.5)  # Adjust padding to fit layout
-    plt.show()
+def get_top_bottom_frequent_chunks(chunks, column, n=10, capacity=1000):
+    """get_top_bottom_frequent over an iterable of chunks in memory independent of the input size.
+
+    Top and bottom values keep the chunks' index labels. Most frequent values
+    come from a Space-Saving summary with `capacity` counters; they are exact
+    whenever the column has at most that many distinct values.
+    """
+    top, bottom, frequent = TopK(n), TopK(n, largest=False), SpaceSaving(capacity)
+    for chunk in chunks:
+        top.update(chunk[column])
+        bottom.update(chunk[column])
+        frequent.update(chunk[column])
+    counts = frequent.top(capacity)
+    # Like Series.mode(): every value sharing the highest count
+    modes = counts.loc[counts['count'] == counts['count'].max(), 'value'] if len(counts) else counts['value']
+    most_frequent = modes.sort_values().head(n).rename(column).reset_index(drop=True).reset_index()
+    return top.result(column), bottom.result(column), most_frequent
 
 # Perform k-means clustering for user experience segmentation
 def prepare_clustering_data(df):
+    from sklearn.preprocessing import StandardScaler
     features = df[['avg_tcp_retransmission', 'avg_rtt', 'avg_throughput']]
     scaler = StandardScaler()
     scaled_features = scaler.fit_transform(features)
     return scaled_features
 
-def perform_clustering(df, n_clusters=3):
-    scaled_data = prepare_clustering_data(df)
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-    df['cluster'] = kmeans.fit_predict(scaled_data)
+@instrument
+def perform_clustering(df, n_clusters=3, model_store=None):
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+    features = df[['avg_tcp_retransmission', 'avg_rtt', 'avg_throughput']]
+
+    def fit():
+        # Keep the scaler with the model so cached models see identically scaled input
+        scaler = StandardScaler().fit(features)
+        kmeans = KMeans(n_clusters=n_clusters, random_state=42).fit(scaler.transform(features))
+        return {'scaler': scaler, 'kmeans': kmeans}
+
+    if model_store is None:
+        models = fit()
+    else:
+        models = model_store.get_or_fit('perform_clustering', features, {'n_clusters': n_clusters, 'random_state': 42}, fit)
+    kmeans = models['kmeans']
+    df['cluster'] = kmeans.predict(models['scaler'].transform(features))
     return df, kmeans
@@ -1,17 +1,31 @@
+import os
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
+from instrumentation import instrument
+from parallel_groupby import parallel_groupby
+
+# scikit-learn is imported inside the functions that need it and plotting lives in
+# plots.py, so importing this module stays fast for headless batch and scoring jobs
+PLOTS = ('plot_elbow_method', 'plot_top_apps')
+
+def __getattr__(name):
+    if name in PLOTS:
+        import plots
+        return getattr(plots, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def load_data(query, conn):
     """Load data from the database."""
     return pd.read_sql(query, conn)
 
-def aggregate_engagement(df):
-    """Aggregate engagement metrics per customer."""
+@instrument
+def aggregate_engagement(df, n_jobs=None):
+    """Aggregate engagement metrics per customer; n_jobs > 1 spreads hash partitions over processes."""
+    if n_jobs and n_jobs > 1:
+        columns = ['MSISDN/Number', 'Bearer Id', 'Dur. (ms)', 'Total UL (Bytes)', 'Total DL (Bytes)']
+        return parallel_groupby(df[columns], aggregate_engagement, max_workers=n_jobs)
     # Calculate total traffic as the sum of total upload and download bytes
     df['total_traffic'] = df['Total UL (Bytes)'] + df['Total DL (Bytes)']
     
@@ -30,59 +44,193 @@ def aggregate_engagement(df):
     
     return user_agg
 
+def aggregate_engagement_chunks(chunks):
+    """Aggregate engagement metrics per customer over an iterable of DataFrame chunks.
+
+    Counts and sums are additive, so each chunk is folded into a running per-customer
+    total and only one chunk plus the per-customer table is held in memory.
+    """
+    user_agg = None
+    for chunk in chunks:
+        chunk_agg = aggregate_engagement(chunk)
+        if user_agg is None:
+            user_agg = chunk_agg
+        else:
+            user_agg = pd.concat([user_agg, chunk_agg]).groupby('MSISDN/Number', sort=False).sum().reset_index()
+    if user_agg is None:
+        return pd.DataFrame(columns=['MSISDN/Number', 'sessions_frequency', 'session_duration', 'total_traffic'])
+    return user_agg.sort_values('MSISDN/Number').reset_index(drop=True)
+
 
 def normalize_data(df, columns):
     """Normalize specified columns in the dataframe."""
+    from sklearn.preprocessing import StandardScaler
     scaler = StandardScaler()
     scaled = scaler.fit_transform(df[columns])
     scaled_df = pd.DataFrame(scaled, columns=[f'scaled_{col}' for col in columns])
     return scaled_df
 
-def kmeans_clustering(df, columns, n_clusters=3):
-    """Perform K-Means clustering."""
-    kmeans = KMeans(n_clusters=n_clusters, random_state=0).fit(df[columns])
+@instrument(name='engagement_kmeans')
+def kmeans_clustering(df, columns, n_clusters=3, model_store=None):
+    """Perform K-Means clustering, reusing a cached model for unchanged input if a model_store is given."""
+    from sklearn.cluster import KMeans
+
+    def fit():
+        return {'kmeans': KMeans(n_clusters=n_clusters, random_state=0).fit(df[columns])}
+
+    if model_store is None:
+        kmeans = fit()['kmeans']
+    else:
+        kmeans = model_store.get_or_fit('utils_kmeans', df[columns], {'n_clusters': n_clusters, 'random_state': 0}, fit)['kmeans']
     df['cluster'] = kmeans.labels_
     return df, kmeans
 
-def plot_elbow_method(df, columns):
-    """Determine optimal k for K-Means using Elbow Method."""
-    inertia = []
-    for k in range(1, 11):
-        kmeans = KMeans(n_clusters=k, random_state=0).fit(df[columns])
-        inertia.append(kmeans.inertia_)
-    plt.figure(figsize=(8, 5))
-    plt.plot(range(1, 11), inertia, marker='o')
-    plt.title('Elbow Method for Optimal k')
-    plt.xlabel('Number of Clusters (k)')
-    plt.ylabel('Inertia')
-    plt.show()
-
-def compute_silhouette_score(df, columns, kmeans):
-    """Compute silhouette score for the chosen k."""
-    return silhouette_score(df[columns], kmeans.labels_)
-
-def plot_top_apps(df):
-    """Plot the top 3 most used applications."""
-    # Aggregate total traffic for each application
-    app_traffic = {
-        'Social Media': df['Social Media DL (Bytes)'].sum(),
-        'Google': df['Google DL (Bytes)'].sum(),
-        'Youtube': df['Youtube DL (Bytes)'].sum(),
-        'Netflix': df['Netflix DL (Bytes)'].sum(),
-        'Gaming': df['Gaming DL (Bytes)'].sum(),
-        'Other': df['Other DL (Bytes)'].sum()
-    }
-    
-    # Convert to a DataFrame for easier plotting
-    app_traffic_df = pd.DataFrame(list(app_traffic.items()), columns=['Application', 'Total Traffic'])
-    
-    # Select the top 3 applications by traffic
-    top_3_apps = app_traffic_df.nlargest(3, 'Total Traffic')
-    
-    # Plot the top 3 applications
-    top_3_apps.plot(kind='bar', x='Application', y='Total Traffic', legend=False)
-    plt.title('Top 3 Most Used Applications')
-    plt.xlabel('Application')
-    plt.ylabel('Total Traffic (Bytes)')
-    plt.show()
+def _fit_candidate(X, k, random_state, silhouette_sample):
+    """Fit one candidate k and score it; runs inside a worker process."""
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score, calinski_harabasz_score, davies_bouldin_score
+    kmeans = KMeans(n_clusters=k, random_state=random_state).fit(X)
+    metrics = {'k': k, 'inertia': kmeans.inertia_,
+               'silhouette': np.nan, 'calinski_harabasz': np.nan, 'davies_bouldin': np.nan}
+    if 1 < k < len(X):
+        metrics['silhouette'] = silhouette_score(X, kmeans.labels_, sample_size=min(silhouette_sample, len(X)),
+                                                 random_state=random_state)
+        metrics['calinski_harabasz'] = calinski_harabasz_score(X, kmeans.labels_)
+        metrics['davies_bouldin'] = davies_bouldin_score(X, kmeans.labels_)
+    return metrics
+
+def sample_rows(df, sample_size, stratify=None, random_state=0):
+    """Draw about sample_size rows, proportionally within each stratify group if given."""
+    if sample_size is None or sample_size >= len(df):
+        return df
+    if stratify is None:
+        return df.sample(n=sample_size, random_state=random_state)
+    frac = sample_size / len(df)
+    return df.groupby(stratify, group_keys=False, observed=True).sample(frac=frac, random_state=random_state)
+
+def elbow_k(metrics):
+    """Pick the k whose inertia lies farthest below the line joining the first and last k."""
+    k = metrics['k'].to_numpy(dtype=float)
+    inertia = metrics['inertia'].to_numpy(dtype=float)
+    if len(k) < 3:
+        return int(k[-1])
+    line = inertia[0] + (inertia[-1] - inertia[0]) * (k - k[0]) / (k[-1] - k[0])
+    return int(k[np.argmax(line - inertia)])
+
+@instrument
+def select_k(df, columns, k_values=range(1, 11), sample_size=None, stratify=None, criterion='elbow',
+             n_jobs=None, random_state=0, refit=True, silhouette_sample=10000):
+    """Fit candidate k values in parallel and return the metrics as data.
+
+    Candidates are fitted across a process pool, optionally on a (stratified)
+    sample of sample_size rows. The chosen k (by elbow or best silhouette) is then
+    refitted on the full data. Returns (metrics, best_k, kmeans); kmeans is None
+    when refit=False.
+    """
+    if criterion not in ('elbow', 'silhouette'):
+        raise ValueError(f"Unknown criterion '{criterion}'. Expected 'elbow' or 'silhouette'.")
+    X = sample_rows(df, sample_size, stratify, random_state)[columns].to_numpy()
+    k_values = [k for k in k_values if 1 <= k <= len(X)]
+    if not k_values:
+        raise ValueError(f"No candidate k between 1 and the {len(X)} rows fitted.")
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(k_values))
+    args = [(X, k, random_state, silhouette_sample) for k in k_values]
+    if n_jobs == 1:
+        results = [_fit_candidate(*arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_fit_candidate, *zip(*args)))
+    metrics = pd.DataFrame(results)
+
+    if criterion == 'elbow':
+        best_k = elbow_k(metrics)
+    else:
+        if metrics['silhouette'].isna().all():
+            # Silhouette is only defined for 1 < k < number of rows fitted
+            raise ValueError(f"No silhouette for k in {k_values}; use criterion='elbow' or a k between 2 and "
+                             f"{len(X) - 1}.")
+        best_k = int(metrics.loc[metrics['silhouette'].idxmax(), 'k'])
+
+    if not refit:
+        return metrics, best_k, None
+    from sklearn.cluster import KMeans
+    kmeans = KMeans(n_clusters=best_k, random_state=random_state).fit(df[columns])
+    return metrics, best_k, kmeans
+
+def silhouette_values(X, labels, rows, chunk_rows=1000):
+    """Exact silhouette of the given rows against every point, chunk_rows rows at a time.
+
+    Memory is bounded by chunk_rows * len(X) distances regardless of len(X).
+    """
+    from sklearn.metrics.pairwise import euclidean_distances
+    clusters, codes = np.unique(labels, return_inverse=True)
+    one_hot = np.zeros((len(X), len(clusters)))
+    one_hot[np.arange(len(X)), codes] = 1.0
+    sizes = one_hot.sum(axis=0)
+
+    values = np.empty(len(rows))
+    for start in range(0, len(rows), chunk_rows):
+        idx = rows[start:start + chunk_rows]
+        # Sum of distances from each row to every member of each cluster
+        sums = euclidean_distances(X[idx], X) @ one_hot
+        own = codes[idx]
+        own_sizes = sizes[own]
+        a = sums[np.arange(len(idx)), own] / np.maximum(own_sizes - 1, 1)
+        means = sums / sizes
+        means[np.arange(len(idx)), own] = np.inf
+        b = means.min(axis=1)
+        s = (b - a) / np.maximum(a, b)
+        # Points alone in their cluster score 0 by convention
+        values[start:start + chunk_rows] = np.where(own_sizes > 1, np.nan_to_num(s), 0.0)
+    return values
+
+def simplified_silhouette(X, labels, centers):
+    """Centroid-based silhouette: distance to own center versus the nearest other center."""
+    from sklearn.metrics.pairwise import euclidean_distances
+    distances = euclidean_distances(X, centers)
+    a = distances[np.arange(len(X)), labels]
+    distances[np.arange(len(X)), labels] = np.inf
+    b = distances.min(axis=1)
+    return float(np.mean(np.nan_to_num((b - a) / np.maximum(a, b))))
+
+@instrument
+def compute_silhouette_score(df, columns, kmeans, method='exact', sample_size=10000, chunk_rows=1000,
+                             confidence=0.95, random_state=0, return_interval=False):
+    """Compute silhouette score for the chosen k.
+
+    method picks accuracy versus cost:
+    - 'exact': sklearn over the full matrix, O(n^2) time.
+    - 'chunked': the same exact value with memory bounded by chunk_rows * n.
+    - 'sampled': exact silhouettes of sample_size random points against all points,
+      O(sample_size * n).
+    - 'simplified': centroid-based silhouette, O(n * k).
 
+    Returns the score as a float. With return_interval=True the 'sampled' method
+    returns (score, lower, upper) bounds at the given confidence instead.
+    """
+    if return_interval and method != 'sampled':
+        raise ValueError("return_interval is only available with method='sampled'.")
+    X = df[columns].to_numpy(dtype=float)
+    labels = np.asarray(kmeans.labels_)
+    if method == 'exact':
+        from sklearn.metrics import silhouette_score
+        return silhouette_score(X, labels)
+    if method == 'chunked':
+        return float(np.mean(silhouette_values(X, labels, np.arange(len(X)), chunk_rows)))
+    if method == 'sampled':
+        if sample_size < 2:
+            raise ValueError(f"sample_size must be at least 2, got {sample_size}.")
+        rng = np.random.default_rng(random_state)
+        rows = rng.choice(len(X), size=min(sample_size, len(X)), replace=False)
+        values = silhouette_values(X, labels, rows, chunk_rows)
+        score = float(np.mean(values))
+        if not return_interval:
+            return score
+        margin = NormalDist().inv_cdf((1 + confidence) / 2) * np.std(values, ddof=1) / np.sqrt(len(values))
+        # No sampling error left once every point is in the sample
+        if len(rows) == len(X):
+            margin = 0.0
+        return score, score - margin, score + margin
+    if method == 'simplified':
+        return simplified_silhouette(X, labels, kmeans.cluster_centers_)
+    raise ValueError(f"Unknown silhouette method '{method}'. Expected 'exact', 'chunked', 'sampled' or 'simplified'.")
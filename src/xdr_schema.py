@@ -0,0 +1,129 @@
+import pandas as pd
+
+# Declared dtypes for every column of xdr_data.
+# Identifiers are nullable integers (they contain missing values), RTT, throughput
+# and the per-second/percentage counters fit comfortably in float32, and the
+# low-cardinality text columns are categorical. Byte volumes and durations stay
+# float64 because they are summed per subscriber and float32 would lose precision.
+XDR_SCHEMA = {
+    'Bearer Id': 'float64',  # values exceed the int64 range
+    'Start': 'datetime64[ns]',
+    'Start ms': 'float32',
+    'End': 'datetime64[ns]',
+    'End ms': 'float32',
+    'Dur. (ms)': 'float64',
+    'IMSI': 'Int64',
+    'MSISDN/Number': 'Int64',
+    'IMEI': 'Int64',
+    'Last Location Name': 'category',
+    'Avg RTT DL (ms)': 'float32',
+    'Avg RTT UL (ms)': 'float32',
+    'Avg Bearer TP DL (kbps)': 'float32',
+    'Avg Bearer TP UL (kbps)': 'float32',
+    'TCP DL Retrans. Vol (Bytes)': 'float64',
+    'TCP UL Retrans. Vol (Bytes)': 'float64',
+    'DL TP < 50 Kbps (%)': 'float32',
+    '50 Kbps < DL TP < 250 Kbps (%)': 'float32',
+    '250 Kbps < DL TP < 1 Mbps (%)': 'float32',
+    'DL TP > 1 Mbps (%)': 'float32',
+    'UL TP < 10 Kbps (%)': 'float32',
+    '10 Kbps < UL TP < 50 Kbps (%)': 'float32',
+    '50 Kbps < UL TP < 300 Kbps (%)': 'float32',
+    'UL TP > 300 Kbps (%)': 'float32',
+    'HTTP DL (Bytes)': 'float64',
+    'HTTP UL (Bytes)': 'float64',
+    'Activity Duration DL (ms)': 'float64',
+    'Activity Duration UL (ms)': 'float64',
+    'Dur. (ms).1': 'float64',
+    'Handset Manufacturer': 'category',
+    'Handset Type': 'category',
+    'Nb of sec with 125000B < Vol DL': 'float32',
+    'Nb of sec with 1250B < Vol UL < 6250B': 'float32',
+    'Nb of sec with 31250B < Vol DL < 125000B': 'float32',
+    'Nb of sec with 37500B < Vol UL': 'float32',
+    'Nb of sec with 6250B < Vol DL < 31250B': 'float32',
+    'Nb of sec with 6250B < Vol UL < 37500B': 'float32',
+    'Nb of sec with Vol DL < 6250B': 'float32',
+    'Nb of sec with Vol UL < 1250B': 'float32',
+    'Social Media DL (Bytes)': 'float64',
+    'Social Media UL (Bytes)': 'float64',
+    'Google DL (Bytes)': 'float64',
+    'Google UL (Bytes)': 'float64',
+    'Email DL (Bytes)': 'float64',
+    'Email UL (Bytes)': 'float64',
+    'Youtube DL (Bytes)': 'float64',
+    'Youtube UL (Bytes)': 'float64',
+    'Netflix DL (Bytes)': 'float64',
+    'Netflix UL (Bytes)': 'float64',
+    'Gaming DL (Bytes)': 'float64',
+    'Gaming UL (Bytes)': 'float64',
+    'Other DL (Bytes)': 'float64',
+    'Other UL (Bytes)': 'float64',
+    'Total UL (Bytes)': 'float64',
+    'Total DL (Bytes)': 'float64',
+}
+
+# Columns each analysis stage actually reads
+STAGE_COLUMNS = {
+    'engagement': ['MSISDN/Number', 'Bearer Id', 'Dur. (ms)', 'Total UL (Bytes)', 'Total DL (Bytes)'],
+    'experience': ['MSISDN/Number', 'TCP DL Retrans. Vol (Bytes)', 'Avg RTT DL (ms)',
+                   'Avg Bearer TP DL (kbps)', 'Handset Type'],
+    'satisfaction': ['MSISDN/Number', 'Avg RTT DL (ms)', 'Avg Bearer TP DL (kbps)',
+                     'Avg RTT UL (ms)', 'Avg Bearer TP UL (kbps)'],
+    'handsets': ['Handset Type', 'Handset Manufacturer'],
+}
+
+def resolve_columns(columns=None):
+    """Return the column list for a stage name, an explicit list, or all columns."""
+    if columns is None:
+        return list(XDR_SCHEMA)
+    if isinstance(columns, str):
+        if columns not in STAGE_COLUMNS:
+            raise ValueError(f"Unknown xDR stage '{columns}'. Expected one of {sorted(STAGE_COLUMNS)}")
+        return list(STAGE_COLUMNS[columns])
+    unknown = [col for col in columns if col not in XDR_SCHEMA]
+    if unknown:
+        raise ValueError(f"Columns not in the xDR schema: {unknown}")
+    return list(columns)
+
+def select_query(columns=None, table='xdr_data'):
+    """Build a SELECT that projects only the requested columns."""
+    quoted = ', '.join('"{}"'.format(col.replace('"', '""')) for col in resolve_columns(columns))
+    return f"SELECT {quoted} FROM {table}"
+
+def apply_schema(df):
+    """Cast the xDR columns present in df to their declared compact dtypes."""
+    for col in df.columns:
+        dtype = XDR_SCHEMA.get(col)
+        if dtype is None or df[col].dtype == dtype:
+            continue
+        if dtype == 'datetime64[ns]':
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif dtype == 'category':
+            df[col] = df[col].astype('category')
+        else:
+            if df[col].dtype == object:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+            df[col] = df[col].astype(dtype)
+    return df
+
+def load_xdr(conn, columns=None, table='xdr_data'):
+    """Load the requested xDR columns straight into their compact dtypes."""
+    columns = resolve_columns(columns)
+    dates = [col for col in columns if XDR_SCHEMA[col] == 'datetime64[ns]']
+    dtypes = {col: XDR_SCHEMA[col] for col in columns if col not in dates}
+    return pd.read_sql_query(select_query(columns, table), conn, dtype=dtypes, parse_dates=dates)
+
+def load_xdr_chunks(db, columns=None, table='xdr_data', chunk_rows=50000):
+    """Stream the requested xDR columns from a PostgresConnection as typed chunks."""
+    for chunk in db.fetch_chunks(select_query(columns, table), chunk_rows=chunk_rows):
+        yield apply_schema(chunk)
+
+def memory_savings(df):
+    """Report per-column memory before and after applying the compact schema."""
+    before = df.memory_usage(deep=True, index=False)
+    after = apply_schema(df.copy()).memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'before_bytes': before, 'after_bytes': after})
+    report['saved_bytes'] = report['before_bytes'] - report['after_bytes']
+    report.index.name = 'column'
+    return report.reset_index()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+import re
+import sqlite3
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from aggregation_spec import ENGAGEMENT_SPEC, EXPERIENCE_SPEC
+from utils import aggregate_engagement
+from telecom_experience_analysis import aggregate_per_customer
+
+def first_to_sqlite(match):
+    """SQLite has no array_agg; take the first non-null value by rowid, SQLite's ctid."""
+    column = match.group(1)
+    return (f'(SELECT {column} FROM xdr_data AS f WHERE f."MSISDN/Number" = xdr_data."MSISDN/Number" '
+            f'AND {column} IS NOT NULL ORDER BY f.rowid LIMIT 1)')
+
+class SqliteDb:
+    """Stands in for PostgresConnection.fetch_data over an in-memory SQLite table."""
+
+    def __init__(self, df):
+        self.conn = sqlite3.connect(':memory:')
+        df.to_sql('xdr_data', self.conn, index=False)
+
+    def fetch_data(self, query, params=None):
+        query = re.sub(r'\(array_agg\((.+?) ORDER BY ctid\) FILTER \(WHERE \1 IS NOT NULL\)\)\[1\]',
+                       first_to_sqlite, query)
+        return pd.read_sql_query(query, self.conn, params=params)
+
+class TestAggregationSpec(unittest.TestCase):
+
+    def setUp(self):
+        """Set up sample sessions, including a missing MSISDN and missing volumes."""
+        self.df = pd.DataFrame({
+            'MSISDN/Number': [3.0, 1.0, 2.0, 1.0, np.nan, 2.0],
+            'Bearer Id': [10.0, 11.0, np.nan, 13.0, 14.0, 15.0],
+            'Dur. (ms)': [30.0, 40.0, 20.0, 50.0, 60.0, 25.0],
+            'Total UL (Bytes)': [10.0, 20.0, 30.0, np.nan, 50.0, 60.0],
+            'Total DL (Bytes)': [100.0, 200.0, 150.0, 250.0, 300.0, 120.0],
+            'TCP DL Retrans. Vol (Bytes)': [5.0, np.nan, 7.0, 8.0, 9.0, 10.0],
+            'Avg RTT DL (ms)': [40.0, 50.0, 60.0, np.nan, 80.0, 90.0],
+            'Avg Bearer TP DL (kbps)': [100.0, 200.0, 300.0, 400.0, 500.0, 600.0],
+            'Handset Type': ['Handset A', None, 'Handset B', 'Handset C', 'Handset D', 'Handset E']
+        })
+
+    def test_pandas_path_matches_existing_functions(self):
+        expected = aggregate_engagement(self.df.copy())
+        pd.testing.assert_frame_equal(ENGAGEMENT_SPEC.aggregate(self.df), expected, check_dtype=False)
+
+        expected = aggregate_per_customer(self.df)
+        pd.testing.assert_frame_equal(EXPERIENCE_SPEC.aggregate(self.df), expected, check_dtype=False)
+
+    def test_sql_path_matches_pandas_path(self):
+        db = SqliteDb(self.df)
+        pd.testing.assert_frame_equal(ENGAGEMENT_SPEC.fetch(db), ENGAGEMENT_SPEC.aggregate(self.df))
+        # 'first' keeps the earliest non-null handset, skipping subscriber 1's missing one
+        experience = EXPERIENCE_SPEC.fetch(db)
+        pd.testing.assert_frame_equal(experience, EXPERIENCE_SPEC.aggregate(self.df))
+        self.assertEqual(list(experience['Handset Type']), ['Handset C', 'Handset B', 'Handset A'])
+
+    def test_to_sql_groups_next_to_the_data(self):
+        query = EXPERIENCE_SPEC.to_sql(where='"Start" > \'2019-04-25\'')
+        self.assertIn('AVG("Avg RTT DL (ms)") AS "avg_rtt"', query)
+        self.assertIn('GROUP BY "MSISDN/Number"', query)
+        self.assertIn('"MSISDN/Number" IS NOT NULL AND "Start" > \'2019-04-25\'', query)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+import unittest
+import os
+import sys
+import threading
+import time
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+# Add the repository root to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from db_connection import connection as connection_module
+from db_connection.connection import PostgresConnection, PostgresConnectionPool, get_pool, close_pools
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        if self.conn.dead:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+class FakeConnection:
+    def __init__(self, dead=False):
+        self.dead = dead
+        self.closed = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+class FakePool:
+    """Hands out queued connections the way ThreadedConnectionPool does."""
+
+    def __init__(self, connections):
+        self.idle = list(connections)
+        self.discarded = []
+        self.closed = False
+
+    def getconn(self):
+        return self.idle.pop(0) if self.idle else FakeConnection()
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.discarded.append(conn)
+        else:
+            self.idle.append(conn)
+
+class TestPostgresConnectionPool(unittest.TestCase):
+
+    def make_pool(self, connections, maxconn=3, timeout=30.0):
+        pool = PostgresConnectionPool.__new__(PostgresConnectionPool)
+        pool.maxconn = maxconn
+        pool.timeout = timeout
+        pool.slots = threading.BoundedSemaphore(maxconn)
+        pool.pool = FakePool(connections)
+        return pool
+
+    def test_dead_connections_are_replaced_on_checkout(self):
+        dead = FakeConnection(dead=True)
+        pool = self.make_pool([dead])
+        with pool.connection() as conn:
+            self.assertIsNot(conn, dead)
+            self.assertFalse(conn.dead)
+        self.assertEqual(pool.pool.discarded, [dead])
+        self.assertEqual(pool.pool.idle, [conn])
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        live = FakeConnection()
+        pool = self.make_pool([live])
+        with pool.connection() as conn:
+            conn.status = extensions.TRANSACTION_STATUS_INTRANS
+        self.assertEqual(conn.get_transaction_status(), extensions.TRANSACTION_STATUS_IDLE)
+        self.assertEqual(pool.pool.idle, [live])
+
+    def test_checkout_waits_for_a_free_connection(self):
+        pool = self.make_pool([], maxconn=2)
+        active, peak, errors = [0], [0], []
+        lock = threading.Lock()
+
+        def borrow():
+            try:
+                with pool.connection():
+                    with lock:
+                        active[0] += 1
+                        peak[0] = max(peak[0], active[0])
+                    time.sleep(0.05)
+                    with lock:
+                        active[0] -= 1
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=borrow) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(peak[0], 2)
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = self.make_pool([], maxconn=1, timeout=0.05)
+        with pool.connection():
+            with self.assertRaises(PoolError):
+                pool.getconn()
+        # The slot is released again once the connection is returned
+        with pool.connection() as conn:
+            self.assertIsNotNone(conn)
+
+class TestGetPool(unittest.TestCase):
+
+    def setUp(self):
+        self.created = []
+        self.original = connection_module.PostgresConnectionPool
+
+        class RecordingPool:
+            def __init__(pool, *args):
+                pool.args = args
+                pool.pool = FakePool([])
+                self.created.append(pool)
+
+            def closeall(pool):
+                pool.pool.closed = True
+
+        connection_module.PostgresConnectionPool = RecordingPool
+
+    def tearDown(self):
+        close_pools()
+        connection_module.PostgresConnectionPool = self.original
+
+    def test_pools_are_keyed_by_size_and_credentials(self):
+        first = get_pool('telecom', 'postgres', 'root', 'localhost', 5432, maxconn=10)
+        self.assertIs(get_pool('telecom', 'postgres', 'root', 'localhost', '5432', maxconn=10), first)
+        self.assertIsNot(get_pool('telecom', 'postgres', 'root', 'localhost', 5432, maxconn=4), first)
+        self.assertIsNot(get_pool('telecom', 'postgres', 'other', 'localhost', 5432, maxconn=10), first)
+        self.assertEqual(len(self.created), 3)
+
+class StreamCursor:
+    """Named cursor serving two chunks, then failing like a dropped connection."""
+
+    def __init__(self):
+        self.description = [('x',)]
+        self.calls = 0
+        self.itersize = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchmany(self, size):
+        self.calls += 1
+        if self.calls > 2:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        return [(self.calls,)] * size
+
+class StreamConnection(FakeConnection):
+    def cursor(self, name=None):
+        return StreamCursor()
+
+    def commit(self):
+        pass
+
+class TestFetchChunks(unittest.TestCase):
+
+    def test_error_mid_stream_is_raised_not_truncated(self):
+        db = PostgresConnection(pooled=False)
+        db.conn = StreamConnection()
+        chunks = []
+        with self.assertRaises(psycopg2.OperationalError):
+            for chunk in db.fetch_chunks("SELECT x", chunk_rows=2):
+                chunks.append(chunk)
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(db.conn.rollbacks, 1)
+
+    def test_missing_connection_is_raised(self):
+        with self.assertRaises(psycopg2.OperationalError):
+            list(PostgresConnection(pooled=False).fetch_chunks("SELECT x"))
+
+if __name__ == '__main__':
+    unittest.main()
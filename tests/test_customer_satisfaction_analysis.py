@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import euclidean
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from customer_satisfaction_analysis import cluster_distances, calculate_scores, export_to_mysql, get_engine
+
+class TestCustomerSatisfactionAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        """Set up sample per-user experience data."""
+        rng = np.random.default_rng(0)
+        self.user_data = pd.DataFrame({
+            'Avg RTT DL (ms)': rng.uniform(10, 200, 50),
+            'Avg Bearer TP DL (kbps)': rng.uniform(5, 5000, 50),
+            'Avg RTT UL (ms)': rng.uniform(1, 50, 50),
+            'Avg Bearer TP UL (kbps)': rng.uniform(5, 500, 50)
+        })
+        self.user_data.loc[3, 'Avg RTT DL (ms)'] = np.nan
+
+    def test_cluster_distances_match_euclidean(self):
+        features = self.user_data[['Avg RTT UL (ms)', 'Avg Bearer TP UL (kbps)']].to_numpy()
+        centers = np.array([[10.0, 100.0], [40.0, 400.0], [25.0, 250.0]])
+        distances = cluster_distances(features, centers, chunk_rows=7)
+        self.assertEqual(distances.shape, (50, 3))
+        expected = np.array([[euclidean(row, center) for center in centers] for row in features])
+        self.assertEqual(distances.dtype, np.float64)
+        np.testing.assert_allclose(distances, expected, rtol=1e-12)
+        # float32 is opt-in and only agrees to single precision
+        np.testing.assert_allclose(cluster_distances(features, centers, dtype=np.float32), expected, rtol=1e-5)
+
+    def test_calculate_scores_exposes_all_center_distances(self):
+        scored, distances = calculate_scores(self.user_data.copy(), chunk_rows=16, return_distances=True)
+        self.assertEqual(list(distances['engagement'].columns), ['center_0', 'center_1'])
+        np.testing.assert_allclose(scored['engagement_score'], distances['engagement']['center_0'])
+        self.assertFalse(scored['experience_score'].isnull().any())
+
+    def test_export_to_sqlite_with_atomic_swap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'scores.db')}"
+            result = export_to_mysql(self.user_data, url=url, table='scores', chunksize=8)
+            self.assertTrue(result['verified'])
+            self.assertEqual(result['rows'], 50)
+
+            # A second export replaces the table in place
+            result = export_to_mysql(self.user_data.head(20), url=url, table='scores')
+            self.assertTrue(result['verified'])
+            self.assertEqual(result['rows'], 20)
+
+            # A table left over from an interrupted swap does not block the next one
+            with get_engine(url).begin() as connection:
+                connection.exec_driver_sql('CREATE TABLE "scores__old" (x INTEGER)')
+            result = export_to_mysql(self.user_data.head(10), url=url, table='scores')
+            self.assertTrue(result['verified'])
+            self.assertEqual(result['rows'], 10)
+            get_engine(url).dispose()
+
+if __name__ == '__main__':
+    unittest.main()
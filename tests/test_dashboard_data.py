@@ -0,0 +1,207 @@
+import unittest
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from psycopg2 import extensions
+
+# Add the repository root and the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from dashboard_data import iter_query_results, fetch_profile, fetch_session_page, default_workers
+from db_connection.connection import PostgresConnectionPool
+from db_connection.subscriber_profile import PROFILE_COLUMNS, SESSION_COLUMNS
+
+class SleepingCursor:
+    """Treats the query text as the number of seconds it takes to run."""
+
+    def __init__(self, log):
+        self.log = log
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if query.startswith('SET LOCAL'):
+            self.log.append(params[0])
+            return
+        if query == 'SELECT 1':
+            return
+        if query == 'fail':
+            raise RuntimeError("canceling statement due to statement timeout")
+        time.sleep(float(query))
+        self.result = [(query,)]
+
+    def fetchall(self):
+        return self.result
+
+class FakeConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def cursor(self):
+        return SleepingCursor(self.log)
+
+    def rollback(self):
+        pass
+
+class PooledConnection(FakeConnection):
+    """What PostgresConnectionPool checks on checkout and return."""
+    closed = 0
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+class FakePool:
+    def __init__(self):
+        self.log = []
+
+    @contextmanager
+    def connection(self, timeout=None):
+        yield FakeConnection(self.log)
+
+class SessionCursor:
+    """Serves one subscriber's sessions, applying the keyset, order and limit parameters."""
+
+    def __init__(self, sessions, log):
+        self.sessions = sessions
+        self.log = log
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if query.startswith('SET LOCAL'):
+            return
+        self.log.append((query, params))
+        if 'xdr_subscriber_profile' in query:
+            self.result = [(params['msisdn'],) + (1.0,) * (len(PROFILE_COLUMNS) - 1) + ('2024-05-01',)]
+            return
+        rows = [row for row in self.sessions
+                if 'start' not in params or row[-3:] < (params['start'], params['bearer'], params['ctid'])]
+        self.result = sorted(rows, key=lambda row: row[-3:], reverse=True)[:params['limit']]
+
+    def fetchall(self):
+        return self.result
+
+class SessionPool(FakePool):
+    def __init__(self, sessions):
+        super().__init__()
+        self.sessions = sessions
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = FakeConnection(self.log)
+        connection.cursor = lambda: SessionCursor(self.sessions, self.log)
+        yield connection
+
+class TestDashboardData(unittest.TestCase):
+
+    def test_queries_run_concurrently_and_stream_results(self):
+        pool = FakePool()
+        queries = {'slow': '0.3', 'fast': '0.05', 'medium': '0.2'}
+        start = time.perf_counter()
+        results = list(iter_query_results(pool, queries, timeouts={'slow': 2}))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([name for name, _, _ in results], ['fast', 'medium', 'slow'])
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(sorted(pool.log), [2000, 10000, 10000])
+
+    def test_errors_are_reported_per_query(self):
+        results = dict((name, (rows, error)) for name, rows, error in
+                       iter_query_results(FakePool(), {'ok': '0', 'bad': 'fail'}))
+        self.assertEqual(results['ok'][0], [('0',)])
+        self.assertIsNone(results['bad'][0])
+        self.assertIsInstance(results['bad'][1], RuntimeError)
+
+    def make_bounded_pool(self, maxconn):
+        """A real PostgresConnectionPool over an inner pool that fails when exhausted, like psycopg2's."""
+        test = self
+
+        class ExhaustiblePool:
+            closed = False
+
+            def __init__(inner):
+                inner.out = 0
+                inner.peak = 0
+                inner.lock = threading.Lock()
+
+            def getconn(inner):
+                with inner.lock:
+                    if inner.out >= maxconn:
+                        test.fail("connection pool exhausted")
+                    inner.out += 1
+                    inner.peak = max(inner.peak, inner.out)
+                return PooledConnection([])
+
+            def putconn(inner, conn, close=False):
+                with inner.lock:
+                    inner.out -= 1
+
+        pool = PostgresConnectionPool.__new__(PostgresConnectionPool)
+        pool.maxconn = maxconn
+        pool.timeout = 5.0
+        pool.slots = threading.BoundedSemaphore(maxconn)
+        pool.pool = ExhaustiblePool()
+        return pool
+
+    def test_overview_queries_fit_in_a_small_pool(self):
+        pool = self.make_bounded_pool(maxconn=2)
+        self.assertEqual(default_workers(pool, 6), 1)
+        queries = {f'q{i}': '0.02' for i in range(6)}
+
+        # Two pages rendering at once, each asking for more connections than the pool has
+        results = []
+        pages = [threading.Thread(target=lambda: results.extend(iter_query_results(pool, queries, max_workers=6)))
+                 for _ in range(2)]
+        for page in pages:
+            page.start()
+        for page in pages:
+            page.join()
+        self.assertEqual(len(results), 12)
+        self.assertEqual([error for _, _, error in results if error is not None], [])
+        self.assertEqual(pool.pool.peak, 2)
+
+    def test_session_pages_follow_the_keyset(self):
+        # Three sessions share start and bearer id (e.g. a NULL bearer), differ only by
+        # ctid and straddle the first page boundary
+        keys = [(1, 0.0), (2, 1.0), (3, -1.0), (3, -1.0), (3, -1.0), (5, 5.0), (6, 6.0)]
+        sessions = [(float(i),) + (None,) * (len(SESSION_COLUMNS) - 1) + (start, bearer, f'(0,{i + 1})')
+                    for i, (start, bearer) in enumerate(keys)]
+        pool = SessionPool(sessions)
+
+        pages, cursor = [], None
+        while True:
+            rows, cursor = fetch_session_page(pool, 33664962239.0, after=cursor, page_size=3)
+            pages.append([row[0] for row in rows])
+            self.assertTrue(all(len(row) == len(SESSION_COLUMNS) for row in rows))
+            if cursor is None:
+                break
+        self.assertEqual(pages, [[6.0, 5.0, 4.0], [3.0, 2.0, 1.0], [0.0]])
+
+        first_query, first_params = pool.log[0]
+        self.assertNotIn('%(start)s', first_query)
+        self.assertNotIn('OFFSET', first_query)
+        self.assertEqual(first_params['limit'], 4)
+        self.assertEqual((pool.log[1][1]['start'], pool.log[1][1]['bearer'], pool.log[1][1]['ctid']),
+                         (3, -1.0, '(0,5)'))
+
+    def test_profile_lookup(self):
+        pool = SessionPool([])
+        profile = fetch_profile(pool, 33664962239.0)
+        self.assertEqual(profile['MSISDN/Number'], 33664962239.0)
+        self.assertEqual(list(profile), PROFILE_COLUMNS + ['updated_at'])
+
+if __name__ == '__main__':
+    unittest.main()
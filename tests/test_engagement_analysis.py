@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
@@ -11,7 +12,7 @@ import matplotlib.pyplot as plt
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 # Import the necessary functions from utils
-from utils import aggregate_engagement, normalize_data, kmeans_clustering, plot_elbow_method
+from utils import aggregate_engagement, aggregate_engagement_chunks, normalize_data, kmeans_clustering, plot_elbow_method, select_k, compute_silhouette_score
 
 class TestUserEngagementAnalysis(unittest.TestCase):
 
@@ -38,6 +39,19 @@ class TestUserEngagementAnalysis(unittest.TestCase):
         self.assertEqual(user_agg.loc[user_agg['MSISDN'] == 2, 'sessions_frequency'].values[0], 5)
         self.assertEqual(user_agg.loc[user_agg['MSISDN'] == 3, 'sessions_frequency'].values[0], 7)
 
+    def test_aggregate_engagement_chunks(self):
+        # Folding chunks must give the same per-customer totals as one pass
+        raw = pd.DataFrame({
+            'MSISDN/Number': [1, 2, 1, 3, 2, 1],
+            'Bearer Id': [10, 11, 12, 13, 14, 15],
+            'Dur. (ms)': [30, 40, 20, 50, 60, 25],
+            'Total UL (Bytes)': [10, 20, 30, 40, 50, 60],
+            'Total DL (Bytes)': [100, 200, 150, 250, 300, 120]
+        })
+        expected = aggregate_engagement(raw.copy())
+        chunked = aggregate_engagement_chunks([raw.iloc[i:i + 4].copy() for i in range(0, len(raw), 4)])
+        pd.testing.assert_frame_equal(chunked, expected)
+
     def test_normalize_data(self):
         # Normalize the data
         scaler = StandardScaler()
@@ -76,5 +90,62 @@ class TestUserEngagementAnalysis(unittest.TestCase):
         success = True  # If no exception occurred
         self.assertTrue(success, "Elbow plot method failed")
 
+    def test_select_k(self):
+        # Three well separated groups of users
+        rng = np.random.RandomState(0)
+        centers = np.repeat([[0, 0], [10, 10], [0, 10]], 40, axis=0)
+        users = pd.DataFrame(centers + rng.normal(scale=0.5, size=centers.shape), columns=['x', 'y'])
+        users['segment'] = np.repeat([0, 1, 2], 40)
+
+        metrics, best_k, kmeans = select_k(users, ['x', 'y'], k_values=range(1, 7), sample_size=60,
+                                           stratify='segment', criterion='silhouette', n_jobs=2)
+        self.assertEqual(list(metrics['k']), [1, 2, 3, 4, 5, 6])
+        self.assertTrue(metrics['inertia'].is_monotonic_decreasing)
+        self.assertEqual(best_k, 3)
+        # The chosen k is refitted on all rows, not just the sample
+        self.assertEqual(len(kmeans.labels_), len(users))
+
+        _, elbow, no_model = select_k(users, ['x', 'y'], k_values=range(1, 7), n_jobs=1, refit=False)
+        self.assertEqual(elbow, 3)
+        self.assertIsNone(no_model)
+
+    def test_select_k_rejects_unusable_candidates(self):
+        users = pd.DataFrame({'x': [0.0, 1.0, 5.0, 6.0], 'y': [0.0, 1.0, 5.0, 6.0]})
+        # Every candidate exceeds the sampled rows: nothing to fit, even with n_jobs unset
+        with self.assertRaises(ValueError):
+            select_k(users, ['x', 'y'], k_values=range(5, 8), refit=False)
+        with self.assertRaises(ValueError):
+            select_k(users, ['x', 'y'], k_values=[], refit=False)
+        # k=1 and k=len(rows) have no silhouette
+        with self.assertRaises(ValueError):
+            select_k(users, ['x', 'y'], k_values=[1, 4], criterion='silhouette', n_jobs=1, refit=False)
+        _, best_k, _ = select_k(users, ['x', 'y'], k_values=[1, 4], n_jobs=1, refit=False)
+        self.assertIn(best_k, [1, 4])
+
+    def test_compute_silhouette_score_methods(self):
+        rng = np.random.RandomState(1)
+        points = np.repeat([[0, 0], [6, 6], [0, 6]], 100, axis=0) + rng.normal(size=(300, 2))
+        users = pd.DataFrame(points, columns=['x', 'y'])
+        users, kmeans = kmeans_clustering(users, ['x', 'y'], n_clusters=3)
+
+        exact = compute_silhouette_score(users, ['x', 'y'], kmeans)
+        chunked = compute_silhouette_score(users, ['x', 'y'], kmeans, method='chunked', chunk_rows=64)
+        self.assertAlmostEqual(chunked, exact, places=10)
+
+        sampled = compute_silhouette_score(users, ['x', 'y'], kmeans, method='sampled', sample_size=100)
+        self.assertIsInstance(sampled, float)
+        score, lower, upper = compute_silhouette_score(users, ['x', 'y'], kmeans, method='sampled', sample_size=100,
+                                                       return_interval=True)
+        self.assertEqual(score, sampled)
+        self.assertLessEqual(lower, exact)
+        self.assertGreaterEqual(upper, exact)
+        with self.assertRaises(ValueError):
+            compute_silhouette_score(users, ['x', 'y'], kmeans, method='sampled', sample_size=1)
+        with self.assertRaises(ValueError):
+            compute_silhouette_score(users, ['x', 'y'], kmeans, return_interval=True)
+
+        simplified = compute_silhouette_score(users, ['x', 'y'], kmeans, method='simplified')
+        self.assertAlmostEqual(simplified, exact, delta=0.15)
+
 if __name__ == '__main__':
     unittest.main()
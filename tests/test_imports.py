@@ -0,0 +1,27 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../script')))
+
+from benchmark_imports import MODULES, measure_import
+
+class TestImports(unittest.TestCase):
+
+    def test_compute_modules_do_not_load_heavy_dependencies(self):
+        for module in MODULES:
+            with self.subTest(module=module):
+                self.assertEqual(measure_import(module, repeat=1)['heavy'], [])
+
+    def test_plot_functions_still_reachable_from_compute_modules(self):
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+        import utils
+        import telecom_experience_analysis
+        import plots
+        self.assertIs(utils.plot_top_apps, plots.plot_top_apps)
+        self.assertIs(telecom_experience_analysis.plot_throughput_distribution, plots.plot_throughput_distribution)
+        with self.assertRaises(AttributeError):
+            utils.not_a_function
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import json
+import os
+import tempfile
+import pandas as pd
+import sys
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import instrumentation
+from instrumentation import StageRecorder, configure, instrument, load_records, summarize
+from customer_satisfaction_analysis import model_deployment_tracking
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmpdir.name, 'stages.jsonl')
+        self.previous = instrumentation.get_recorder()
+
+    def tearDown(self):
+        instrumentation._recorder = self.previous
+        self.tmpdir.cleanup()
+
+    def test_wrapped_stage_records_rows_and_memory(self):
+        recorder = StageRecorder(self.log)
+        dedupe = recorder.wrap(lambda df: df.drop_duplicates(), name='dedupe')
+        dedupe(pd.DataFrame({'a': [1, 1, 2]}))
+
+        record = load_records(self.log)[0]
+        self.assertEqual(record['stage'], 'dedupe')
+        self.assertEqual((record['rows_in'], record['rows_out']), (3, 2))
+        self.assertGreater(record['df_memory_bytes'], 0)
+        self.assertGreaterEqual(record['wall_seconds'], 0)
+        self.assertIn('cpu_seconds', record)
+        self.assertEqual(record['status'], 'ok')
+
+    def test_failed_stage_is_recorded_and_reraised(self):
+        recorder = StageRecorder()
+        with self.assertRaises(ValueError):
+            with recorder.stage('load'):
+                raise ValueError('boom')
+        self.assertEqual(recorder.records[0]['status'], 'error')
+
+    def test_instrument_is_inert_until_configured(self):
+        @instrument
+        def double(df):
+            return df * 2
+
+        instrumentation._recorder = StageRecorder(enabled=False)
+        double(pd.Series([1, 2]))
+        self.assertEqual(instrumentation.get_recorder().records, [])
+
+        recorder = configure(self.log)
+        double(pd.Series([1, 2]))
+        self.assertEqual([record['stage'] for record in recorder.records], ['double'])
+
+    def test_profile_stage_writes_cprofile_and_allocations(self):
+        recorder = StageRecorder(profile_stage='build', profile_dir=self.tmpdir.name)
+        with recorder.stage('build') as record:
+            record['output'] = pd.DataFrame({'a': range(1000)})
+        with recorder.stage('other'):
+            pass
+
+        profiled, other = recorder.records
+        self.assertTrue(os.path.exists(profiled['profile_path']))
+        self.assertGreater(profiled['traced_peak_bytes'], 0)
+        self.assertTrue(profiled['top_allocations'])
+        self.assertNotIn('profile_path', other)
+
+    def test_summary_totals_per_stage(self):
+        records = [
+            {'stage': 'a', 'wall_seconds': 1.0, 'cpu_seconds': 1.0, 'rows_in': 10, 'rows_out': 5},
+            {'stage': 'a', 'wall_seconds': 2.0, 'cpu_seconds': 1.5, 'rows_in': 10, 'rows_out': 5},
+            {'stage': 'b', 'wall_seconds': 1.0, 'cpu_seconds': 0.5, 'rows_in': None, 'rows_out': None},
+        ]
+        summary = summarize(records)
+        self.assertEqual(list(summary.index), ['a', 'b'])
+        self.assertEqual(summary.loc['a', 'calls'], 2)
+        self.assertEqual(summary.loc['a', 'rows_in'], 20)
+        self.assertAlmostEqual(summary.loc['a', 'wall_share'], 0.75)
+        self.assertTrue(pd.isna(summary.loc['b', 'rows_out']))
+
+    def test_deployment_tracking_uses_training_time(self):
+        recorder = configure()
+        recorder.records.append({'stage': 'regression_model', 'started_at': '2024-01-01T00:00:00',
+                                 'wall_seconds': 2.5})
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            log_data = model_deployment_tracking(0.1)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(log_data['duration_seconds'], 2.5)
+        self.assertGreater(log_data['end_time'], log_data['start_time'])
+
+    def test_deployment_tracking_without_training_time_logs_no_duration(self):
+        instrumentation._recorder = StageRecorder(enabled=False)
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            log_data = model_deployment_tracking(0.1)
+        finally:
+            os.chdir(cwd)
+        self.assertIsNone(log_data['start_time'])
+        self.assertIsNone(log_data['duration_seconds'])
+        self.assertIsNotNone(log_data['end_time'])
+        self.assertEqual(log_data['metrics'], {'MSE': 0.1})
+
+    def test_rss_is_reported_as_process_peak_and_growth(self):
+        recorder = StageRecorder()
+        with recorder.stage('grow'):
+            pass
+        record = recorder.records[0]
+        self.assertNotIn('peak_rss_bytes', record)
+        if record['process_peak_rss_bytes'] is not None:
+            self.assertGreaterEqual(record['rss_growth_bytes'], 0)
+            self.assertIn('process_peak_rss_bytes', summarize(recorder.records).columns)
+
+if __name__ == '__main__':
+    unittest.main()
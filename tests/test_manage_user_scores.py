@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+from contextlib import contextmanager
+import pandas as pd
+
+# Add the repository root and the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from manage_user_scores import bulk_insert_user_data
+
+class RecordingCursor:
+    """Records statements and the CSV rows sent through COPY."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.fail_on and self.conn.fail_on in query:
+            raise RuntimeError("ON CONFLICT DO UPDATE command cannot affect row a second time")
+        self.conn.statements.append(' '.join(query.split()))
+
+    def copy_expert(self, query, buffer):
+        self.conn.statements.append(query)
+        self.conn.copied.append(buffer.read().splitlines())
+
+class RecordingConnection:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.statements = []
+        self.copied = []
+        self.committed = False
+        self.rolled_back = False
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+class FakeDb:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def connection(self):
+        yield self.conn
+
+class TestBulkInsertUserData(unittest.TestCase):
+
+    def setUp(self):
+        self.scores = pd.DataFrame({
+            'user_id': [1, 2, 3, 2],
+            'user_engagement': [75.3, 65.7, 82.9, 60.0],
+            'user_experience': [80.2, 70.5, 85.7, 71.0],
+            'user_satisfaction': [90.1, 88.9, 92.4, 89.5]
+        })
+
+    def test_copies_in_batches_in_one_transaction(self):
+        conn = RecordingConnection()
+        result = bulk_insert_user_data(FakeDb(conn), self.scores.drop(columns='user_id'), batch_size=3)
+        self.assertEqual(result['rows'], 4)
+        self.assertEqual([len(batch) for batch in conn.copied], [3, 1])
+        self.assertTrue(conn.committed)
+        self.assertFalse(any('setval' in statement for statement in conn.statements))
+
+    def test_upsert_keeps_last_row_per_key(self):
+        conn = RecordingConnection()
+        result = bulk_insert_user_data(FakeDb(conn), self.scores, upsert=True)
+        self.assertEqual(result['rows'], 3)
+        copied = conn.copied[0]
+        self.assertEqual([line.split(',')[0] for line in copied], ['1', '3', '2'])
+        self.assertIn('2,60.0,71.0,89.5', copied)
+        self.assertTrue(any('ON CONFLICT (user_id) DO UPDATE' in statement for statement in conn.statements))
+
+    def test_sequence_moves_past_explicit_ids(self):
+        conn = RecordingConnection()
+        bulk_insert_user_data(FakeDb(conn), self.scores, upsert=True)
+        setval = [statement for statement in conn.statements if 'setval' in statement][0]
+        self.assertIn('COALESCE(MAX(user_id), 0) + 1, false', setval)
+
+    def test_failure_rolls_back(self):
+        conn = RecordingConnection(fail_on='INSERT INTO user_scores')
+        self.assertIsNone(bulk_insert_user_data(FakeDb(conn), self.scores, upsert=True))
+        self.assertTrue(conn.rolled_back)
+        self.assertFalse(conn.committed)
+
+    def test_upsert_requires_key(self):
+        self.assertIsNone(bulk_insert_user_data(FakeDb(RecordingConnection()), self.scores.drop(columns='user_id'),
+                                                upsert=True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import os
+import sys
+import tempfile
+import pandas as pd
+from unittest import mock
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from model_store import ModelStore, fingerprint
+from telecom_experience_analysis import perform_clustering
+
+class TestModelStore(unittest.TestCase):
+
+    def setUp(self):
+        """Set up per-customer experience aggregates."""
+        self.df = pd.DataFrame({
+            'MSISDN/Number': [1, 2, 3, 4, 5, 6],
+            'avg_tcp_retransmission': [10.0, 15.0, 12.0, 400.0, 420.0, 20.0],
+            'avg_rtt': [100.0, 200.0, 90.0, 150.0, 120.0, 800.0],
+            'avg_throughput': [1000.0, 850.0, 900.0, 950.0, 30.0, 40.0]
+        })
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprint_tracks_data_and_params(self):
+        base = fingerprint(self.df, {'n_clusters': 3})
+        self.assertEqual(base, fingerprint(self.df.copy(), {'n_clusters': 3}))
+        self.assertNotEqual(base, fingerprint(self.df, {'n_clusters': 4}))
+        changed = self.df.copy()
+        changed.loc[0, 'avg_rtt'] = 101.0
+        self.assertNotEqual(base, fingerprint(changed, {'n_clusters': 3}))
+        # Models pickled under another scikit-learn release are not reused
+        with mock.patch('sklearn.__version__', '0.0.0'):
+            self.assertNotEqual(base, fingerprint(self.df, {'n_clusters': 3}))
+
+    def test_unchanged_input_loads_cached_model(self):
+        store = ModelStore(self.tmp.name)
+        first, kmeans = perform_clustering(self.df.copy(), model_store=store)
+        second, cached = perform_clustering(self.df.copy(), model_store=store)
+        self.assertEqual((store.hits, store.misses), (1, 1))
+        self.assertEqual(list(first['cluster']), list(second['cluster']))
+        self.assertEqual(kmeans.cluster_centers_.tolist(), cached.cluster_centers_.tolist())
+        self.assertTrue(os.path.exists(store.paths['perform_clustering']))
+
+    def test_eviction_is_bounded_by_size(self):
+        store = ModelStore(self.tmp.name, max_bytes=1)
+        store.get_or_fit('model', self.df, {'k': 1}, lambda: {'weights': list(range(100))})
+        store.get_or_fit('model', self.df, {'k': 2}, lambda: {'weights': list(range(100))})
+        # Only the newest artifact survives a budget smaller than one entry
+        self.assertEqual(len(store.entries()), 1)
+        self.assertIsNotNone(store.load('model', fingerprint(self.df, {'k': 2})))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from parallel_groupby import _encode, parallel_groupby, partition_ids
+from synthetic_xdr import generate_xdr
+from xdr_schema import apply_schema
+from utils import aggregate_engagement
+from telecom_experience_analysis import aggregate_per_customer
+
+class TestParallelGroupby(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = generate_xdr(5000, seed=1)
+
+    def test_partitions_are_stable_per_key(self):
+        keys = np.array([1.0, 2.0, 1.0, np.nan, 2.0])
+        parts = partition_ids(keys, 4)
+        self.assertEqual(parts[0], parts[2])
+        self.assertEqual(parts[1], parts[4])
+        self.assertTrue((parts < 4).all())
+
+    def test_engagement_matches_serial(self):
+        expected = aggregate_engagement(self.df.copy())
+        result = aggregate_engagement(self.df, n_jobs=2)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_experience_matches_serial_with_object_and_category_columns(self):
+        pd.testing.assert_frame_equal(aggregate_per_customer(self.df, n_jobs=2), aggregate_per_customer(self.df))
+        typed = apply_schema(self.df.copy())
+        self.assertIsInstance(typed['Handset Type'].dtype, pd.CategoricalDtype)
+        pd.testing.assert_frame_equal(aggregate_per_customer(typed, n_jobs=2), aggregate_per_customer(typed))
+
+    def test_typed_keys_are_shared_without_pickling_values(self):
+        typed = apply_schema(self.df.copy())
+        self.assertEqual(str(typed['MSISDN/Number'].dtype), 'Int64')
+        arrays, spec, uniques = _encode(typed['MSISDN/Number'])
+        self.assertEqual(spec[0], 'masked')
+        self.assertIsNone(uniques)
+        self.assertEqual([array.dtype for array in arrays], [np.dtype('int64'), np.dtype('bool')])
+        pd.testing.assert_frame_equal(aggregate_engagement(typed, n_jobs=2), aggregate_engagement(typed.copy()))
+
+    def test_factorized_columns_are_decoded_in_the_parent(self):
+        df = self.df.dropna(subset=['MSISDN/Number']).copy()
+        df['MSISDN/Number'] = df['MSISDN/Number'].astype('int64').astype(str).astype('string')
+        _, spec, (uniques, dtype) = _encode(df['MSISDN/Number'])
+        self.assertEqual(spec, ('codes',))
+        self.assertEqual(str(dtype), 'string')
+        # Sorted codes keep the serial path's string order of the keys
+        pd.testing.assert_frame_equal(aggregate_per_customer(df, n_jobs=2), aggregate_per_customer(df))
+
+    def test_more_partitions_than_keys(self):
+        small = self.df.dropna(subset=['MSISDN/Number']).head(3)
+        result = parallel_groupby(small, aggregate_per_customer, n_partitions=16, max_workers=2)
+        pd.testing.assert_frame_equal(result, aggregate_per_customer(small))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+import unittest
+import os
+import tempfile
+import threading
+import pandas as pd
+import sqlite3
+import sys
+from unittest import mock
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from pipeline import (
+    Stage, Pipeline, build_pipeline, engagement_stage, postgres_engagement, postgres_source, replica_engagement,
+    synthetic_source
+)
+from db_connection.xdr_replica import AGGREGATES_FILE, write_watermark
+from subscriber_aggregates import SubscriberAggregates
+from db_connection.subscriber_profile import PROFILE_COLUMNS
+
+def double(df):
+    return df * 2
+
+def triple(df):
+    return df * 3
+
+def scale_stage(df):
+    return double(df)
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.calls = []
+        self.source = {'version': 1}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_pipeline(self, factor=2):
+        def load():
+            self.calls.append('load')
+            return pd.DataFrame({'x': [1.0, 2.0, 3.0]})
+
+        def scale(df, factor):
+            self.calls.append('scale')
+            return df * factor
+
+        def total(df):
+            self.calls.append('total')
+            return pd.DataFrame({'total': [df['x'].sum()]})
+
+        return Pipeline([
+            Stage('load', load, source_key=lambda: self.source),
+            Stage('scale', scale, ['load'], {'factor': factor}),
+            Stage('total', total, ['scale']),
+        ], checkpoint_dir=self.tmpdir.name)
+
+    def test_second_run_is_served_from_checkpoints(self):
+        first = self.make_pipeline().run()
+        self.assertEqual({state for state, _ in first.values()}, {'ran'})
+        self.calls.clear()
+
+        second = self.make_pipeline().run()
+        self.assertEqual({state for state, _ in second.values()}, {'cached'})
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.make_pipeline().load('total')['total'].iloc[0], 12.0)
+
+    def test_parameter_change_reruns_only_downstream(self):
+        self.make_pipeline().run()
+        self.calls.clear()
+        status = self.make_pipeline(factor=3).run()
+        self.assertEqual(status['load'][0], 'cached')
+        self.assertEqual(self.calls, ['scale', 'total'])
+
+    def test_source_change_and_force_invalidate(self):
+        self.make_pipeline().run()
+        self.source['version'] = 2
+        self.calls.clear()
+        self.make_pipeline().run()
+        self.assertEqual(self.calls, ['load', 'scale', 'total'])
+
+        self.calls.clear()
+        self.make_pipeline().run(targets=['scale'], force=['scale'])
+        self.assertEqual(self.calls, ['scale'])
+
+    def test_independent_branches_run_concurrently(self):
+        # Each branch waits for the other, which only completes if both run at once
+        barrier = threading.Barrier(2, timeout=5)
+
+        def branch(df):
+            barrier.wait()
+            return df
+
+        pipeline = Pipeline([
+            Stage('load', lambda: pd.DataFrame({'x': [1]})),
+            Stage('left', branch, ['load']),
+            Stage('right', branch, ['load'], {}),
+        ], checkpoint_dir=self.tmpdir.name)
+        status = pipeline.run()
+        self.assertEqual(status['left'][0], 'ran')
+        self.assertEqual(status['right'][0], 'ran')
+
+    def test_callee_change_invalidates_checkpoint(self):
+        pipeline = Pipeline([Stage('x', lambda: pd.DataFrame({'x': [1.0]})),
+                             Stage('scaled', scale_stage, ['x'])], checkpoint_dir=self.tmpdir.name)
+        before = pipeline.keys()
+        # Same stage function, different helper behind it
+        with mock.patch.object(sys.modules[__name__], 'double', triple):
+            after = pipeline.keys()
+        self.assertEqual(before['x'], after['x'])
+        self.assertNotEqual(before['scaled'], after['scaled'])
+
+    def test_postgres_source_connects_and_fails_loudly(self):
+        with mock.patch('db_connection.connection.PostgresConnection') as connection_class:
+            db = connection_class.return_value
+            db.pool, db.conn = None, None
+            with self.assertRaises(ConnectionError):
+                postgres_source()
+            db.connect.assert_called_once()
+
+            db.pool = mock.Mock()
+            db.fetch_data.return_value = pd.DataFrame({'row_count': [3], 'max_start': ['2019-04-04 10:00:00']})
+            _, key = postgres_source('xdr_data')
+            self.assertEqual(key(), [{'row_count': 3, 'max_start': '2019-04-04 10:00:00'}])
+            self.assertIn('MAX("Start"::timestamp)', db.fetch_data.call_args[0][0])
+            db.fetch_data.return_value = None
+            with self.assertRaises(ConnectionError):
+                key()
+
+    def test_postgres_engagement_is_grouped_in_the_database(self):
+        xdr, _ = synthetic_source(2000)
+        xdr = xdr()
+        conn = sqlite3.connect(':memory:')
+        xdr.astype(object).where(xdr.notna(), None).to_sql('xdr_data', conn, index=False)
+        db = mock.Mock()
+        db.fetch_data.side_effect = lambda query: pd.read_sql_query(query, conn)
+
+        load, _ = postgres_engagement('xdr_data', db=db)
+        engagement = load()
+        self.assertIn('GROUP BY "MSISDN/Number"', db.fetch_data.call_args[0][0])
+        expected = engagement_stage(xdr).sort_values('MSISDN/Number').reset_index(drop=True)
+        pd.testing.assert_frame_equal(engagement, expected, check_dtype=False)
+
+        db.fetch_data.side_effect = lambda query: None
+        with self.assertRaises(ConnectionError):
+            load()
+
+    def test_replica_engagement_reads_the_incremental_state(self):
+        self.assertIsNone(replica_engagement(self.tmpdir.name))
+        xdr, _ = synthetic_source(2000)
+        xdr = xdr()
+        aggregates = SubscriberAggregates()
+        for start in range(0, len(xdr), 700):
+            aggregates.update(xdr.iloc[start:start + 700])
+        aggregates.save(os.path.join(self.tmpdir.name, AGGREGATES_FILE))
+        write_watermark(self.tmpdir.name, pd.Timestamp('2019-04-30'), len(xdr))
+
+        load, key = replica_engagement(self.tmpdir.name)
+        expected = engagement_stage(xdr).sort_values('MSISDN/Number').reset_index(drop=True)
+        pd.testing.assert_frame_equal(load(), expected, check_dtype=False)
+        self.assertIn('2019-04-30', key())
+
+        pipeline = build_pipeline(lambda: xdr, lambda: 1, checkpoint_dir=self.tmpdir.name,
+                                  engagement=(load, key))
+        self.assertEqual(pipeline.stages['engagement'].deps, [])
+
+    def test_cycle_is_rejected(self):
+        pipeline = Pipeline([Stage('a', lambda df: df, ['b']), Stage('b', lambda df: df, ['a'])],
+                            checkpoint_dir=self.tmpdir.name)
+        with self.assertRaises(ValueError):
+            pipeline.run()
+
+    def test_analysis_pipeline_on_synthetic_data(self):
+        load, source_key = synthetic_source(3000)
+        model_dir = os.path.join(self.tmpdir.name, 'models')
+        pipeline = build_pipeline(load, source_key, checkpoint_dir=self.tmpdir.name, model_dir=model_dir)
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            status = pipeline.run()
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(len(status), 8)
+        clusters = pipeline.load('engagement_clusters')
+        self.assertEqual(set(clusters['cluster']), {0, 1, 2})
+        self.assertIn('satisfaction_score', pipeline.load('scores').columns)
+        # The deployment log points at the stored regression model
+        artifact = pipeline.load('satisfaction_model')['artifacts'].iloc[0]
+        self.assertTrue(artifact.startswith(model_dir))
+        self.assertTrue(os.path.exists(artifact))
+
+        profile = pipeline.load('subscriber_profile')
+        self.assertEqual(list(profile.columns), PROFILE_COLUMNS)
+        self.assertTrue(profile['MSISDN/Number'].is_unique)
+        self.assertEqual(len(profile), len(clusters))
+        row = profile.set_index('MSISDN/Number').loc[clusters['MSISDN/Number'].iloc[0]]
+        self.assertEqual(row['engagement_cluster'], clusters['cluster'].iloc[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+from datetime import datetime
+from decimal import Decimal
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from query_cache import QueryCache, cache_key
+
+QUERY = 'SELECT "MSISDN/Number", session_count FROM xdr_subscriber_rollup ORDER BY session_count DESC LIMIT 10'
+
+class TestQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rows = [(33664962239.0, 18), (33614892860.0, 17), (None, 12)]
+        self.watermark = [[41, datetime(2024, 5, 1, 12, 0)]]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fetch_loads_once_per_watermark(self):
+        cache = QueryCache(self.tmp.name)
+        calls = []
+
+        def load():
+            calls.append(1)
+            return self.rows
+
+        self.assertEqual(cache.fetch(QUERY, self.watermark, load), self.rows)
+        self.assertEqual(cache.fetch(QUERY, self.watermark, load), self.rows)
+        self.assertEqual((cache.hits, cache.misses, len(calls)), (1, 1, 1))
+
+        # A write to xdr_data moves the watermark, so the result is loaded again
+        cache.fetch(QUERY, [[42, datetime(2024, 5, 1, 12, 0)]], load)
+        self.assertEqual((cache.hits, cache.misses, len(calls)), (1, 2, 2))
+
+    def test_results_are_shared_across_instances(self):
+        QueryCache(self.tmp.name).put(QUERY, self.watermark, self.rows)
+        other = QueryCache(self.tmp.name)
+        self.assertEqual(other.get(QUERY, self.watermark), self.rows)
+        self.assertEqual(other.hits, 1)
+
+    def test_round_trip_keeps_values_and_nulls(self):
+        cache = QueryCache(self.tmp.name)
+        rows = [('Huawei B528S-23A', Decimal(19752)), (None, Decimal(9419))]
+        cache.put(QUERY, self.watermark, rows)
+        self.assertEqual(cache.get(QUERY, self.watermark), rows)
+        cache.put('SELECT 1 WHERE false', self.watermark, [])
+        self.assertEqual(cache.get('SELECT 1 WHERE false', self.watermark), [])
+
+    def test_key_ignores_whitespace_only(self):
+        self.assertEqual(cache_key(QUERY, self.watermark), cache_key(f'\n  {QUERY}  ', self.watermark))
+        self.assertNotEqual(cache_key(QUERY, self.watermark), cache_key(QUERY.replace('10', '20'), self.watermark))
+
+    def test_evicts_least_recently_used_beyond_max_bytes(self):
+        cache = QueryCache(self.tmp.name)
+        for i in range(3):
+            cache.put(f'{QUERY} OFFSET {i}', self.watermark, self.rows)
+            time.sleep(0.01)
+        entry_size = cache.entries()[0][1]
+        # Reading the oldest entry makes the second one least recently used
+        cache.get(f'{QUERY} OFFSET 0', self.watermark)
+        cache.max_bytes = entry_size * 3 - 1
+        cache.put(f'{QUERY} OFFSET 3', self.watermark, self.rows)
+
+        self.assertIsNone(cache.get(f'{QUERY} OFFSET 1', self.watermark))
+        self.assertIsNotNone(cache.get(f'{QUERY} OFFSET 0', self.watermark))
+        self.assertIsNotNone(cache.get(f'{QUERY} OFFSET 3', self.watermark))
+
+    def test_unreadable_entry_counts_as_miss(self):
+        cache = QueryCache(self.tmp.name)
+        path = cache.put(QUERY, self.watermark, self.rows)
+        with open(path, 'wb') as f:
+            f.write(b'not parquet')
+        self.assertIsNone(cache.get(QUERY, self.watermark))
+        self.assertFalse(os.path.exists(path))
+
+    def test_failed_put_still_returns_rows(self):
+        cache = QueryCache(self.tmp.name)
+        with mock.patch('pandas.DataFrame.to_parquet', side_effect=OSError('No space left on device')):
+            self.assertEqual(cache.fetch(QUERY, self.watermark, lambda: self.rows), self.rows)
+        # No half-written temporary file is left behind
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_read_only_entry_is_kept(self):
+        cache = QueryCache(self.tmp.name)
+        path = cache.put(QUERY, self.watermark, self.rows)
+        with mock.patch('os.utime', side_effect=PermissionError('read-only')):
+            self.assertEqual(cache.get(QUERY, self.watermark), self.rows)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(cache.hits, 1)
+
+if __name__ == '__main__':
+    unittest.main()
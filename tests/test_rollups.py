@@ -0,0 +1,169 @@
+import unittest
+import os
+import re
+import sys
+import sqlite3
+from contextlib import contextmanager
+
+# Add the repository root to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from db_connection.rollups import (
+    ROLLUP_DDL, CHANGE_TRACKING_DDL, DASHBOARD_QUERIES, WATERMARK_QUERY, REFRESH_STEPS, START_TS_DDL, START_TS_INDEX,
+    ensure_rollups, refresh_rollups
+)
+
+def to_sqlite(sql):
+    """Rewrite the PostgreSQL-only syntax in the rollup SQL; Start is stored as ISO text here."""
+    sql = sql.replace('::timestamp', '').replace('ON COMMIT DROP', '').replace('FOR UPDATE', '')
+    sql = sql.replace('IS NOT DISTINCT FROM', 'IS').replace('GREATEST(', 'MAX(')
+    sql = re.sub(r'xdr_start_ts\(([^)]*)\)', r'\1', sql)
+    return re.sub(r'%\((\w+)\)s', r':\1', sql)
+
+class SqliteCursor:
+    def __init__(self, conn):
+        self.cursor = conn.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.cursor.execute(to_sqlite(query), params or {})
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+class SqliteConnection:
+    def __init__(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.autocommit = False
+        self.autocommit_log = []
+
+    def cursor(self):
+        self.autocommit_log.append(self.autocommit)
+        return SqliteCursor(self.conn)
+
+    def commit(self):
+        # Stands in for ON COMMIT DROP
+        self.conn.execute('DROP TABLE IF EXISTS temp.xdr_rollup_delta')
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+class SqliteDb:
+    def __init__(self):
+        self.conn = SqliteConnection()
+        self.statements = []
+
+    @contextmanager
+    def connection(self):
+        yield self.conn
+
+    def execute_query(self, query):
+        self.conn.conn.executescript(to_sqlite(query).replace(' NULLS LAST', ''))
+
+class TestRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SqliteDb()
+        self.db.conn.conn.execute('''
+            CREATE TABLE xdr_data ("Bearer Id" REAL, "Start" TEXT, "MSISDN/Number" REAL, "Dur. (ms)" REAL,
+                                   "Total DL (Bytes)" REAL, "Total UL (Bytes)" REAL,
+                                   "Handset Type" TEXT, "Handset Manufacturer" TEXT)''')
+        self.db.execute_query(ROLLUP_DDL)
+        self.insert([
+            (1.0, '2019-04-04 10:00:00', 1.0, 100.0, 10.0, 1.0, 'Apple iPhone 6', 'Apple'),
+            (2.0, '2019-04-04 12:00:00', 1.0, 300.0, 20.0, 2.0, 'Apple iPhone 6', 'Apple'),
+            (3.0, '2019-04-04 18:00:00', 2.0, 50.0, 30.0, 3.0, None, None),
+        ])
+
+    def insert(self, rows):
+        self.db.conn.conn.executemany('INSERT INTO xdr_data VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def subscribers(self):
+        return self.db.conn.conn.execute(
+            'SELECT "MSISDN/Number", session_count, duration_sum, dl_bytes + ul_bytes FROM xdr_subscriber_rollup '
+            'ORDER BY 1').fetchall()
+
+    def query(self, name):
+        return self.db.conn.conn.execute(to_sqlite(DASHBOARD_QUERIES[name])).fetchall()
+
+    def test_refresh_is_idempotent(self):
+        self.assertEqual(refresh_rollups(self.db), 3)
+        expected = [(1.0, 2, 400.0, 33.0), (2.0, 1, 50.0, 33.0)]
+        self.assertEqual(self.subscribers(), expected)
+        self.assertEqual(refresh_rollups(self.db), 0)
+        self.assertEqual(self.subscribers(), expected)
+
+    def test_refresh_is_incremental_and_picks_up_late_rows(self):
+        refresh_rollups(self.db)
+        self.insert([
+            (4.0, '2019-04-05 09:00:00', 2.0, 10.0, 1.0, 1.0, 'Samsung Galaxy S8', 'Samsung'),
+            # Started before the watermark but written after the last refresh
+            (5.0, '2019-04-04 11:00:00', 1.0, 200.0, 5.0, 5.0, 'Apple iPhone 6', 'Apple'),
+        ])
+        self.assertEqual(refresh_rollups(self.db), 2)
+        self.assertEqual(refresh_rollups(self.db), 0)
+        self.assertEqual(self.subscribers(), [(1.0, 3, 600.0, 43.0), (2.0, 2, 60.0, 35.0)])
+        watermark = self.db.conn.conn.execute('SELECT watermark FROM xdr_rollup_state').fetchone()[0]
+        self.assertEqual(watermark, '2019-04-05 09:00:00')
+
+        self.assertEqual(self.query('top_sessions'), [(1.0, 3), (2.0, 2)])
+        handsets = self.query('top_handsets')
+        self.assertEqual(handsets[0], ('Apple iPhone 6', 3))
+        self.assertCountEqual(handsets[1:], [(None, 1), ('Samsung Galaxy S8', 1)])
+        self.assertEqual(self.query('top_avg_duration')[0], (1.0, 200.0))
+
+    def test_rollups_folded_before_the_ledger_are_not_recounted(self):
+        refresh_rollups(self.db)
+        self.db.conn.conn.execute('DELETE FROM xdr_rollup_folded')
+        self.assertEqual(refresh_rollups(self.db), 0)
+        self.assertEqual(self.subscribers(), [(1.0, 2, 400.0, 33.0), (2.0, 1, 50.0, 33.0)])
+
+    def test_xdr_indexes_are_built_outside_a_transaction(self):
+        db = SqliteDb()
+        db.execute_query = lambda query: db.statements.append(query)
+        db.conn.cursor = lambda: db.conn.autocommit_log.append(db.conn.autocommit) or FakeIndexCursor(db.statements)
+        ensure_rollups(db)
+        self.assertEqual(db.conn.autocommit_log, [True])
+        self.assertFalse(db.conn.autocommit)
+        concurrent = [statement for statement in db.statements if 'xdr_data' in statement and 'INDEX' in statement]
+        self.assertTrue(concurrent)
+        self.assertTrue(all('CONCURRENTLY' in statement for statement in concurrent))
+        self.assertIn(CHANGE_TRACKING_DDL, db.statements)
+        self.assertLess(db.statements.index(START_TS_DDL), db.statements.index(START_TS_INDEX))
+
+    def test_start_predicates_match_the_expression_index(self):
+        self.assertIn('IMMUTABLE', START_TS_DDL)
+        for step in REFRESH_STEPS:
+            self.assertNotIn('"Start"::timestamp', step)
+        self.assertTrue(any('xdr_start_ts(x."Start") >' in step for step in REFRESH_STEPS))
+
+    def test_watermark_never_scans_xdr_data(self):
+        # Every write statement bumps the counter, including UPDATEs
+        self.assertIn('xdr_change_log', WATERMARK_QUERY)
+        self.assertNotIn('FROM xdr_data', WATERMARK_QUERY)
+        self.assertIn('INSERT OR UPDATE OR DELETE OR TRUNCATE ON xdr_data', CHANGE_TRACKING_DDL)
+
+class FakeIndexCursor:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from customer_satisfaction_analysis import (
+    fit_score_models, calculate_scores, calculate_satisfaction_score, regression_model
+)
+from scoring_service import (
+    FEATURES, ScoringService, DataFrameFeatureSource, PostgresFeatureSource, save_scoring_artifact
+)
+
+class FixedModels:
+    """Model store that always returns the given bundle, so both paths share one fit."""
+
+    def __init__(self, models):
+        self.models = models
+
+    def get_or_fit(self, name, data, params, fit):
+        return self.models
+
+class RecordingDb:
+    """Database stand-in that records fetch_data calls and returns canned feature rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def fetch_data(self, query, params=None):
+        self.calls.append((query, params))
+        return self.rows
+
+class TestScoringService(unittest.TestCase):
+
+    def setUp(self):
+        """Fit the scoring models on sample per-user data and persist them."""
+        rng = np.random.default_rng(0)
+        n = 200
+        self.user_data = pd.DataFrame({
+            'MSISDN/Number': np.arange(n, dtype=float) + 33600000000,
+            'Avg RTT DL (ms)': rng.uniform(10, 200, n),
+            'Avg Bearer TP DL (kbps)': rng.uniform(5, 5000, n),
+            'Avg RTT UL (ms)': rng.uniform(1, 50, n),
+            'Avg Bearer TP UL (kbps)': rng.uniform(5, 500, n)
+        })
+        self.user_data.loc[5, 'Avg RTT UL (ms)'] = np.nan
+
+        self.models = fit_score_models(self.user_data)
+        scored = calculate_scores(self.user_data.copy(), model_store=FixedModels(self.models))
+        scored, _ = calculate_satisfaction_score(scored)
+        self.regression, _ = regression_model(scored)
+        self.expected = scored.set_index('MSISDN/Number')
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.artifact = os.path.join(self.tmp.name, 'scoring.npz')
+        save_scoring_artifact(self.artifact, self.models, self.regression)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_concurrent_requests_match_batch_scores(self):
+        source = DataFrameFeatureSource(self.user_data)
+        keys = list(self.user_data['MSISDN/Number'])
+        requests = [keys[i:i + 10] for i in range(0, len(keys), 10)]
+
+        with ScoringService(self.artifact, source, max_wait_ms=20) as service:
+            with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+                results = list(executor.map(lambda batch: service.score(batch, timeout=5), requests))
+            stats = service.latency_stats()
+
+        scores = pd.concat(results)
+        np.testing.assert_allclose(scores['engagement_score'], self.expected.loc[keys, 'engagement_score'], rtol=1e-5)
+        np.testing.assert_allclose(scores['experience_score'], self.expected.loc[keys, 'experience_score'], rtol=1e-5)
+        imputed = self.expected.loc[keys, ['Avg RTT UL (ms)', 'Avg Bearer TP UL (kbps)']]
+        np.testing.assert_allclose(scores['satisfaction_score'], self.regression.predict(imputed), rtol=1e-6)
+
+        self.assertLess(service.batches, len(requests))
+        self.assertEqual(stats['requests'], len(requests))
+        self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+    def test_unknown_subscriber_has_no_score(self):
+        with ScoringService(self.artifact, DataFrameFeatureSource(self.user_data)) as service:
+            scores = service.score([1.0, 33600000000.0], timeout=5)
+        self.assertTrue(np.isnan(scores['engagement_score'].iloc[0]))
+        self.assertFalse(np.isnan(scores['engagement_score'].iloc[1]))
+        self.assertTrue(pd.isna(scores['engagement_cluster'].iloc[0]))
+        self.assertTrue(pd.isna(scores['experience_cluster'].iloc[0]))
+        self.assertFalse(pd.isna(scores['engagement_cluster'].iloc[1]))
+
+    def test_invalid_request_fails_alone(self):
+        with ScoringService(self.artifact, DataFrameFeatureSource(self.user_data), max_wait_ms=50) as service:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                bad = executor.submit(service.score, ['not-a-number'], 5)
+                good = executor.submit(service.score, [33600000000.0], 5)
+                with self.assertRaises(ValueError):
+                    bad.result()
+                self.assertFalse(np.isnan(good.result()['engagement_score'].iloc[0]))
+
+    def test_stop_fails_queued_requests(self):
+        service = ScoringService(self.artifact, DataFrameFeatureSource(self.user_data))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Never started, so the request stays queued until stop()
+            pending = executor.submit(service.score, [33600000000.0], 5)
+            while service._requests.empty():
+                time.sleep(0.001)
+            service.stop()
+            with self.assertRaises(RuntimeError):
+                pending.result()
+        with self.assertRaises(RuntimeError):
+            service.score([33600000000.0])
+
+    def test_postgres_source_binds_keys_as_an_array(self):
+        rows = pd.DataFrame([[2.0] + [1.0] * len(FEATURES)], columns=['MSISDN/Number'] + FEATURES)
+        db = RecordingDb(rows)
+        features = PostgresFeatureSource(db).get_features([1, 2])
+        query, params = db.calls[0]
+        self.assertIn('= ANY(%s)', query)
+        self.assertEqual(params, ([1.0, 2.0],))
+        self.assertTrue(features.loc[1.0].isna().all())
+        self.assertEqual(features.loc[2.0, FEATURES[0]], 1.0)
+
+        empty = PostgresFeatureSource(db).get_features([])
+        self.assertEqual(len(db.calls), 1)
+        self.assertEqual(list(empty.columns), FEATURES)
+        self.assertEqual(len(empty), 0)
+
+if __name__ == '__main__':
+    unittest.main()
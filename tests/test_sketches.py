@@ -0,0 +1,110 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from sketches import (
+    TopK, SpaceSaving, CountMinSketch, KLLSketch, StreamingDescribe, assign_classes, decile_summary
+)
+
+class TestSketches(unittest.TestCase):
+
+    def setUp(self):
+        """A skewed column with ties and missing values, split into uneven chunks."""
+        rng = np.random.default_rng(0)
+        values = rng.zipf(1.6, 20000).astype(float)
+        values[rng.random(20000) < 0.05] = np.nan
+        self.values = pd.Series(values)
+        self.chunks = [self.values.iloc[i:i + 3000] for i in range(0, len(self.values), 3000)]
+
+    def test_topk_matches_nlargest_and_nsmallest(self):
+        top, bottom = TopK(10), TopK(10, largest=False)
+        for chunk in self.chunks:
+            top.update(chunk)
+            bottom.update(chunk)
+        expected_top = self.values.nlargest(10).rename('value').reset_index()
+        expected_bottom = self.values.nsmallest(10).rename('value').reset_index()
+        pd.testing.assert_frame_equal(top.result(), expected_top)
+        pd.testing.assert_frame_equal(bottom.result(), expected_bottom)
+
+    def test_topk_partitions_merge(self):
+        partials = [TopK(5).update(chunk) for chunk in self.chunks]
+        merged = partials[0]
+        for partial in partials[1:]:
+            merged.merge(partial)
+        pd.testing.assert_frame_equal(merged.result(), self.values.nlargest(5).rename('value').reset_index())
+
+    def test_space_saving_is_exact_below_capacity(self):
+        summary = SpaceSaving(capacity=5000)
+        for chunk in self.chunks:
+            summary.update(chunk)
+        expected = self.values.value_counts().head(10)
+        top = summary.top(10)
+        self.assertEqual(top['value'].tolist(), expected.index.tolist())
+        self.assertEqual(top['count'].tolist(), expected.tolist())
+        self.assertTrue((top['error'] == 0).all())
+
+    def test_space_saving_bounds_when_truncated(self):
+        partials = [SpaceSaving(capacity=20).update(chunk) for chunk in self.chunks]
+        merged = partials[0]
+        for partial in partials[1:]:
+            merged.merge(partial)
+        exact = self.values.value_counts()
+        top = merged.top(20)
+        true_counts = exact.reindex(top['value']).to_numpy()
+        self.assertTrue((top['count'].to_numpy() >= true_counts).all())
+        self.assertTrue((top['guaranteed'].to_numpy() <= true_counts).all())
+        # Everything above 1 / capacity of the stream is found
+        self.assertEqual(set(exact[exact > len(self.values.dropna()) / 20].index), set(merged.heavy_hitters(0.05)))
+
+    def test_count_min_never_undercounts_and_merges(self):
+        whole = CountMinSketch(width=256).update(self.values)
+        merged = CountMinSketch(width=256)
+        for chunk in self.chunks:
+            merged.merge(CountMinSketch(width=256).update(chunk))
+        np.testing.assert_array_equal(whole.table, merged.table)
+        exact = self.values.value_counts()
+        estimates = whole.estimate(exact.index)
+        self.assertTrue((estimates >= exact.to_numpy()).all())
+        self.assertTrue((estimates - exact.to_numpy() <= 2 * whole.total / 256).mean() > 0.9)
+        with self.assertRaises(ValueError):
+            whole.merge(CountMinSketch(width=128))
+
+    def test_kll_quantiles_within_rank_error(self):
+        values = np.random.default_rng(1).lognormal(11, 1.2, 200000)
+        partials = [KLLSketch(k=200, seed=i).update(values[i::4]) for i in range(4)]
+        merged = partials[0]
+        for partial in partials[1:]:
+            merged.merge(partial)
+        self.assertEqual(merged.n, len(values))
+        self.assertLess(sum(len(items) for items in merged.levels), 3 * 200)
+        q = np.linspace(0.05, 0.95, 19)
+        ranks = np.searchsorted(np.sort(values), merged.quantile(q)) / len(values)
+        self.assertLess(np.abs(ranks - q).max(), 0.02)
+        self.assertEqual(merged.quantile(0), values.min())
+        self.assertEqual(merged.quantile(1), values.max())
+
+    def test_streaming_describe(self):
+        describe = StreamingDescribe()
+        for chunk in self.chunks:
+            describe.update(chunk)
+        expected = self.values.describe()
+        for stat in ['count', 'mean', 'std', 'min', 'max', '50%']:
+            self.assertAlmostEqual(describe.describe()[stat], expected[stat], places=6)
+
+    def test_decile_summary_matches_qcut(self):
+        # Distinct values below the sketch size keep every item, so the edges are exact
+        df = pd.DataFrame({'total_duration': np.arange(1, 101, dtype=float), 'total_data': 1.0})
+        chunks = lambda: (df.iloc[i:i + 30] for i in range(0, len(df), 30))
+        summary = decile_summary(chunks, 'total_duration', ['total_duration', 'total_data'])
+        df['Decile Class'] = pd.qcut(df['total_duration'], 10, labels=False) + 1
+        expected = df.groupby('Decile Class')[['total_duration', 'total_data']].sum()
+        pd.testing.assert_frame_equal(summary, expected)
+        np.testing.assert_array_equal(assign_classes([np.nan, 0.0], np.arange(11.0)), [np.nan, 1.0])
+
+if __name__ == '__main__':
+    unittest.main()
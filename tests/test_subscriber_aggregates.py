@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from subscriber_aggregates import SubscriberAggregates
+from utils import aggregate_engagement
+from telecom_experience_analysis import aggregate_per_customer
+
+class TestSubscriberAggregates(unittest.TestCase):
+
+    def setUp(self):
+        """Set up sample xDR sessions for three subscribers."""
+        self.df = pd.DataFrame({
+            'MSISDN/Number': [1, 2, 1, 3, 2, 1],
+            'Bearer Id': [10, 11, np.nan, 13, 14, 15],
+            'Dur. (ms)': [30, 40, 20, 50, 60, 25],
+            'Total UL (Bytes)': [10, 20, 30, 40, 50, 60],
+            'Total DL (Bytes)': [100, 200, 150, np.nan, 300, 120],
+            'TCP DL Retrans. Vol (Bytes)': [5, np.nan, 7, 8, 9, 10],
+            'Avg RTT DL (ms)': [40, 50, 60, np.nan, 80, 90],
+            'Avg Bearer TP DL (kbps)': [100, 200, 300, 400, 500, 600],
+            'Handset Type': [None, 'Handset B', 'Handset A', 'Handset C', 'Handset D', 'Handset E']
+        })
+
+    def test_update_matches_full_aggregation(self):
+        aggregates = SubscriberAggregates()
+        aggregates.update(self.df.iloc[:3]).update(self.df.iloc[3:])
+
+        expected_engagement = aggregate_engagement(self.df.copy())
+        pd.testing.assert_frame_equal(aggregates.engagement(), expected_engagement, check_dtype=False)
+
+        expected_experience = aggregate_per_customer(self.df)
+        pd.testing.assert_frame_equal(aggregates.experience(), expected_experience, check_dtype=False)
+
+    def test_merge_partitions_and_variance(self):
+        left = SubscriberAggregates().update(self.df.iloc[:4])
+        right = SubscriberAggregates().update(self.df.iloc[4:])
+        merged = left.merge(right)
+
+        expected = self.df.groupby('MSISDN/Number')['Avg Bearer TP DL (kbps)'].var()
+        np.testing.assert_allclose(merged.variances()['Avg Bearer TP DL (kbps)'].sort_index(), expected)
+
+    def test_variance_is_stable_for_large_values(self):
+        # Byte counts around 1e10 with a spread of a few bytes: sumsq/n - mean**2 loses every digit
+        rng = np.random.default_rng(0)
+        values = 1e10 + rng.normal(scale=3.0, size=1000)
+        df = pd.DataFrame({'MSISDN/Number': 1.0, 'Avg Bearer TP DL (kbps)': values})
+        aggregates = SubscriberAggregates(metrics=['Avg Bearer TP DL (kbps)'], first_columns=())
+        for start in range(0, len(df), 97):
+            aggregates.update(df.iloc[start:start + 97])
+        self.assertAlmostEqual(aggregates.variances().iloc[0, 0], np.var(values, ddof=1), delta=1e-3)
+
+    def test_save_and_load(self):
+        aggregates = SubscriberAggregates().update(self.df)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state.pkl')
+            aggregates.save(path)
+            restored = SubscriberAggregates.load(path)
+        self.assertEqual(restored.metrics, aggregates.metrics)
+        self.assertEqual(restored.first_columns, ['Handset Type'])
+        pd.testing.assert_frame_equal(restored.engagement(), aggregates.engagement())
+
+if __name__ == '__main__':
+    unittest.main()
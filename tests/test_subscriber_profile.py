@@ -0,0 +1,107 @@
+import unittest
+import os
+import sys
+from contextlib import contextmanager
+import pandas as pd
+
+# Add the repository root to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from db_connection.subscriber_profile import PROFILE_COLUMNS, PROFILE_INDEXES, ensure_profiles, write_profiles
+
+class RecordingCursor:
+    """Records statements and the CSV rows sent through COPY."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.fail_on and self.conn.fail_on in query:
+            raise RuntimeError("COPY failed")
+        self.conn.statements.append(' '.join(query.split()))
+
+    def copy_expert(self, query, buffer):
+        self.conn.statements.append(query)
+        self.conn.copied.append(buffer.read().splitlines())
+
+class RecordingConnection:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.statements = []
+        self.copied = []
+        self.autocommit = False
+        self.committed = False
+        self.rolled_back = False
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+class FakeDb:
+    def __init__(self, conn):
+        self.conn = conn
+        self.queries = []
+
+    @contextmanager
+    def connection(self):
+        yield self.conn
+
+    def execute_query(self, query):
+        self.queries.append(query)
+
+class TestWriteProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.profiles = pd.DataFrame([[33664962239.0, 3, 1000.0, 5e6, 1, 10.0, 50.0, 900.0, 'Apple iPhone 6', 0,
+                                       1.5, 2.5, 2.0],
+                                      [33614892860.0, 1, 200.0, 1e6, 0, None, None, None, None, 2,
+                                       0.5, None, None]], columns=PROFILE_COLUMNS)
+
+    def test_copies_upserts_and_deletes_missing_in_one_transaction(self):
+        conn = RecordingConnection()
+        self.assertEqual(write_profiles(FakeDb(conn), self.profiles), 2)
+        self.assertTrue(conn.committed)
+        self.assertEqual(len(conn.copied[0]), 2)
+        self.assertTrue(conn.copied[0][0].startswith('33664962239.0,3,'))
+        statements = conn.statements
+        self.assertIn('ON CONFLICT ("MSISDN/Number") DO UPDATE', statements[2])
+        self.assertTrue(statements[3].startswith('DELETE FROM xdr_subscriber_profile'))
+
+    def test_empty_profiles_are_refused_unless_forced(self):
+        conn = RecordingConnection()
+        empty = self.profiles.iloc[:0]
+        self.assertIsNone(write_profiles(FakeDb(conn), empty))
+        self.assertEqual(conn.statements, [])
+        self.assertFalse(conn.committed)
+
+        self.assertEqual(write_profiles(FakeDb(conn), empty, force=True), 0)
+        self.assertTrue(conn.committed)
+
+    def test_failure_rolls_back(self):
+        conn = RecordingConnection(fail_on='INSERT INTO xdr_subscriber_profile')
+        self.assertIsNone(write_profiles(FakeDb(conn), self.profiles))
+        self.assertTrue(conn.rolled_back)
+        self.assertFalse(conn.committed)
+
+    def test_subscriber_index_is_built_concurrently(self):
+        conn = RecordingConnection()
+        db = FakeDb(conn)
+        ensure_profiles(db)
+        self.assertNotIn('INDEX', db.queries[0])
+        self.assertEqual(conn.statements, [' '.join(statement.split()) for statement in PROFILE_INDEXES])
+        self.assertTrue(all('CONCURRENTLY' in statement for statement in conn.statements))
+        self.assertFalse(conn.autocommit)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import pandas as pd
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from synthetic_xdr import generate_xdr, generate_xdr_chunks
+from xdr_schema import XDR_SCHEMA
+from utils import aggregate_engagement
+
+class TestSyntheticXdr(unittest.TestCase):
+
+    def test_columns_match_schema(self):
+        df = generate_xdr(2000)
+        self.assertEqual(list(df.columns), list(XDR_SCHEMA))
+        self.assertEqual(len(df), 2000)
+
+    def test_seeded_generation_is_reproducible(self):
+        pd.testing.assert_frame_equal(generate_xdr(1000, seed=3), generate_xdr(1000, seed=3))
+        self.assertFalse(generate_xdr(1000, seed=3).equals(generate_xdr(1000, seed=4)))
+
+    def test_chunks_cover_requested_rows(self):
+        chunks = list(generate_xdr_chunks(2500, chunk_rows=1000))
+        self.assertEqual([len(chunk) for chunk in chunks], [1000, 1000, 500])
+
+    def test_subscribers_have_repeat_sessions(self):
+        df = generate_xdr(5000)
+        sessions = df.groupby('MSISDN/Number').size()
+        self.assertGreater(sessions.max(), 1)
+        self.assertLess(len(sessions), len(df))
+
+    def test_total_volume_is_sum_of_apps(self):
+        df = generate_xdr(1000)
+        app_columns = [col for col in XDR_SCHEMA
+                       if col.endswith('DL (Bytes)') and not col.startswith(('Total', 'HTTP'))]
+        pd.testing.assert_series_equal(df[app_columns].sum(axis=1), df['Total DL (Bytes)'], check_names=False)
+
+    def test_feeds_engagement_aggregation(self):
+        df = generate_xdr(3000)
+        agg_df = aggregate_engagement(df.copy())
+        sessions = df.dropna(subset=['MSISDN/Number'])['Bearer Id'].notna().sum()
+        self.assertEqual(agg_df['sessions_frequency'].sum(), sessions)
+
+if __name__ == '__main__':
+    unittest.main()
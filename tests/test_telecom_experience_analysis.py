@@ -7,8 +7,8 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.getcwd(), '../src')))
 
 from telecom_experience_analysis import (
-    clean_data, aggregate_per_customer,
-    get_top_bottom_frequent, plot_throughput_distribution,
+    clean_data, aggregate_per_customer, aggregate_per_customer_chunks, compute_fill_values,
+    get_top_bottom_frequent, get_top_bottom_frequent_chunks, plot_throughput_distribution,
     plot_tcp_retransmission, perform_clustering
 )
 
@@ -32,7 +32,30 @@ class TestTelecomExperienceAnalysis(unittest.TestCase):
         self.assertAlmostEqual(cleaned_df['Avg RTT DL (ms)'].mean(), 142.5)
         self.assertAlmostEqual(cleaned_df['Avg Bearer TP DL (kbps)'].mean(), 925)
 
-  
+
+    def test_clean_data_with_fill_values(self):
+        """Test chunked cleaning uses the table-wide means."""
+        fill_values = compute_fill_values([self.sample_data.iloc[:2], self.sample_data.iloc[2:]])
+        self.assertAlmostEqual(fill_values['Avg RTT DL (ms)'], 142.5)
+        cleaned_df = clean_data(self.sample_data.iloc[2:].copy(), fill_values=fill_values)
+        self.assertAlmostEqual(cleaned_df['Avg RTT DL (ms)'].iloc[0], 142.5)
+
+    def test_aggregate_per_customer_chunks(self):
+        """Test chunked aggregation matches the single-pass aggregation."""
+        data = pd.concat([self.sample_data, self.sample_data.iloc[::-1]], ignore_index=True)
+        expected = aggregate_per_customer(data)
+        chunked = aggregate_per_customer_chunks([data.iloc[i:i + 3] for i in range(0, len(data), 3)])
+        pd.testing.assert_frame_equal(chunked, expected, check_dtype=False)
+
+    def test_get_top_bottom_frequent_chunks(self):
+        """Test the streaming version matches the in-memory one."""
+        column = 'Avg RTT DL (ms)'
+        df = clean_data(self.sample_data)
+        chunks = [df.iloc[:2], df.iloc[2:]]
+        expected = get_top_bottom_frequent(df, column)
+        result = get_top_bottom_frequent_chunks(chunks, column)
+        for expected_df, result_df in zip(expected, result):
+            pd.testing.assert_frame_equal(result_df, expected_df, check_dtype=False)
 
     # def test_plot_throughput_distribution(self):
     #     """Test throughput distribution plotting."""
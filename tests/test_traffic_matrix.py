@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from traffic_matrix import TrafficMatrix, app_columns, app_totals
+
+class TestTrafficMatrix(unittest.TestCase):
+
+    def setUp(self):
+        """Three sessions from two subscribers plus one without a key."""
+        columns = app_columns(['Youtube', 'Email'])
+        self.df = pd.DataFrame({
+            'MSISDN/Number': [1.0, 2.0, 1.0, np.nan],
+            columns[0]: [100.0, 10.0, 50.0, 7.0],    # Youtube DL
+            columns[1]: [5.0, 1.0, np.nan, 7.0],      # Youtube UL
+            columns[2]: [0.0, 30.0, 20.0, 7.0],       # Email DL
+            columns[3]: [1.0, 2.0, 3.0, 7.0],         # Email UL
+        })
+        self.matrix = TrafficMatrix.from_xdr(self.df, applications=['Youtube', 'Email'])
+
+    def test_matrix_matches_per_column_groupby(self):
+        keyed = self.df.dropna(subset=['MSISDN/Number'])
+        expected = keyed.groupby('MSISDN/Number')[app_columns(['Youtube', 'Email'])].sum()
+        pd.testing.assert_frame_equal(self.matrix.to_frame(), expected)
+
+    def test_app_totals(self):
+        totals = self.matrix.app_totals()
+        self.assertEqual(totals.loc['Youtube', 'DL'], 160.0)
+        self.assertEqual(totals.loc['Email', 'Total'], 56.0)
+        # The unkeyed session still counts towards the raw column totals
+        self.assertEqual(app_totals(self.df, ['Youtube'])['UL'].iloc[0], 13.0)
+        # DL-only frames work when only DL is asked for
+        dl_only = self.df.drop(columns=app_columns(['Youtube', 'Email'], ['UL']))
+        dl_totals = app_totals(dl_only, ['Youtube', 'Email'], directions=('DL',))
+        self.assertEqual(list(dl_totals.columns), ['DL', 'Total'])
+        self.assertEqual(dl_totals.loc['Youtube', 'Total'], app_totals(self.df, ['Youtube']).loc['Youtube', 'DL'])
+
+    def test_top_users_and_app_mix(self):
+        top = self.matrix.top_users('Youtube', n=1)
+        self.assertEqual(top['MSISDN/Number'].tolist(), [1.0])
+        self.assertEqual(top['Total'].tolist(), [155.0])
+        self.assertEqual(self.matrix.top_users('Email', n=5, direction='DL')['MSISDN/Number'].tolist(), [2.0, 1.0])
+        mix = self.matrix.app_mix()
+        np.testing.assert_allclose(mix.sum(axis=1), 1.0)
+        self.assertAlmostEqual(mix.loc[2.0, 'Email'], 32.0 / 43.0)
+
+    def test_chunks_merge_to_the_same_matrix(self):
+        chunked = TrafficMatrix.from_chunks([self.df.iloc[:1], self.df.iloc[1:]], applications=['Youtube', 'Email'])
+        pd.testing.assert_frame_equal(chunked.to_frame(), self.matrix.to_frame())
+        with self.assertRaises(ValueError):
+            self.matrix.merge(TrafficMatrix.from_xdr(self.df, applications=['Youtube']))
+
+if __name__ == '__main__':
+    unittest.main()
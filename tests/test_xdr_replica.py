@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import tempfile
+import pandas as pd
+
+# Add the repository root to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from db_connection.rollups import START_TS, START_TS_INDEX
+from db_connection.xdr_replica import sync_query, sync_replica, read_replica, read_watermark, AGGREGATES_FILE, PENDING_PREFIX
+from subscriber_aggregates import SubscriberAggregates
+
+class FakeXdrSource:
+    """Serves xdr_data rows newer than the watermark the way fetch_chunks would."""
+
+    def __init__(self, df):
+        self.df = df
+        self.queries = []
+
+    def fetch_chunks(self, query, chunk_rows=50000, params=None):
+        self.queries.append((query, params))
+        rows = self.df
+        if params is not None:
+            rows = rows[pd.to_datetime(rows['Start']) > params['since']]
+        for start in range(0, len(rows), chunk_rows):
+            yield rows.iloc[start:start + chunk_rows].copy()
+
+class TestXdrReplica(unittest.TestCase):
+
+    def setUp(self):
+        """Set up sample xDR rows spread over two days."""
+        self.df = pd.DataFrame({
+            'Start': ['4/4/2019 12:01', '4/4/2019 18:30', '4/5/2019 07:00'],
+            'MSISDN/Number': [1.0, 2.0, 1.0],
+            'HTTP DL (Bytes)': [None, None, 5.0],
+            'Total DL (Bytes)': [100.0, 200.0, 300.0]
+        })
+
+    def test_sync_is_incremental(self):
+        with tempfile.TemporaryDirectory() as replica_dir:
+            source = FakeXdrSource(self.df.iloc[:2])
+            self.assertEqual(sync_replica(source, replica_dir, chunk_rows=1), 2)
+            self.assertEqual(read_watermark(replica_dir), pd.Timestamp('2019-04-04 18:30'))
+
+            source.df = self.df
+            self.assertEqual(sync_replica(source, replica_dir), 1)
+            self.assertEqual(sync_replica(source, replica_dir), 0)
+
+            replica = read_replica(replica_dir)
+            self.assertEqual(len(replica), 3)
+            self.assertEqual(replica['Total DL (Bytes)'].sum(), 600.0)
+
+            first_day = read_replica(replica_dir, columns=['MSISDN/Number'], end_day='2019-04-04')
+            self.assertEqual(list(first_day.columns), ['MSISDN/Number'])
+            self.assertEqual(len(first_day), 2)
+
+    def test_watermark_is_bound_against_the_indexed_start(self):
+        query, params = sync_query(pd.Timestamp('2019-04-04 18:30'))
+        self.assertIn(f'{START_TS} > %(since)s', query)
+        self.assertTrue(query.endswith(f'ORDER BY {START_TS}'))
+        self.assertNotIn('2019', query)
+        self.assertEqual(params['since'], pd.Timestamp('2019-04-03 18:30').to_pydatetime())
+        self.assertIn(START_TS, START_TS_INDEX)
+
+    def test_late_arrivals_are_picked_up_once(self):
+        with tempfile.TemporaryDirectory() as replica_dir:
+            source = FakeXdrSource(self.df.iloc[:2])
+            sync_replica(source, replica_dir)
+
+            # A long session that started before the watermark is written after it
+            source.df = pd.DataFrame({
+                'Start': list(self.df['Start']) + ['4/4/2019 17:00'],
+                'MSISDN/Number': [1.0, 2.0, 1.0, 3.0],
+                'HTTP DL (Bytes)': [None, None, 5.0, None],
+                'Total DL (Bytes)': [100.0, 200.0, 300.0, 50.0]
+            })
+            self.assertEqual(sync_replica(source, replica_dir), 2)
+            self.assertEqual(sync_replica(source, replica_dir), 0)
+
+            replica = read_replica(replica_dir)
+            self.assertEqual(len(replica), 4)
+            self.assertEqual(replica['Total DL (Bytes)'].sum(), 650.0)
+
+    def test_subscriber_state_folds_only_new_rows(self):
+        with tempfile.TemporaryDirectory() as replica_dir:
+            source = FakeXdrSource(self.df.iloc[:2])
+            aggregates = SubscriberAggregates(metrics=['Total DL (Bytes)'], first_columns=())
+            sync_replica(source, replica_dir, aggregates=aggregates)
+
+            source.df = self.df
+            restored = SubscriberAggregates.load(os.path.join(replica_dir, AGGREGATES_FILE))
+            sync_replica(source, replica_dir, aggregates=restored)
+            # Re-read rows inside the lookback window are not counted twice
+            sync_replica(source, replica_dir, aggregates=restored)
+
+            state = SubscriberAggregates.load(os.path.join(replica_dir, AGGREGATES_FILE))
+            self.assertEqual(state.counts()['Total DL (Bytes)'].to_dict(), {1.0: 2, 2.0: 1})
+            self.assertEqual(state.sums().loc[1.0, 'Total DL (Bytes)'], 400.0)
+
+    def test_failed_pull_leaves_replica_unchanged(self):
+        class FailingSource(FakeXdrSource):
+            def fetch_chunks(self, query, chunk_rows=50000, params=None):
+                yield from super().fetch_chunks(query, chunk_rows=1, params=params)
+                raise RuntimeError("server closed the connection unexpectedly")
+
+        with tempfile.TemporaryDirectory() as replica_dir:
+            with self.assertRaises(RuntimeError):
+                sync_replica(FailingSource(self.df), replica_dir)
+            self.assertIsNone(read_watermark(replica_dir))
+            self.assertEqual(len(read_replica(replica_dir)), 0)
+            for _, _, files in os.walk(replica_dir):
+                self.assertFalse([f for f in files if f.startswith(PENDING_PREFIX)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sqlite3
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from xdr_schema import select_query, apply_schema, load_xdr, memory_savings
+
+class TestXdrSchema(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small raw xDR table with default dtypes."""
+        self.raw = pd.DataFrame({
+            'MSISDN/Number': [33664962239.0, 33681854413.0, np.nan],
+            'Avg RTT DL (ms)': [42.0, np.nan, 65.0],
+            'Avg Bearer TP DL (kbps)': [23.0, 16.0, 6.0],
+            'Handset Type': ['Samsung Galaxy A5', 'Apple iPhone 7', 'Samsung Galaxy A5'],
+            'Start': ['4/4/2019 12:01', '4/9/2019 13:04', '4/9/2019 17:42']
+        })
+
+    def test_select_query_projects_stage_columns(self):
+        query = select_query('engagement')
+        self.assertTrue(query.startswith('SELECT "MSISDN/Number", "Bearer Id"'))
+        self.assertTrue(query.endswith('FROM xdr_data'))
+        with self.assertRaises(ValueError):
+            select_query(['Not A Column'])
+
+    def test_load_xdr_uses_compact_dtypes(self):
+        conn = sqlite3.connect(':memory:')
+        self.raw.to_sql('xdr_data', conn, index=False)
+        df = load_xdr(conn, ['MSISDN/Number', 'Avg RTT DL (ms)', 'Handset Type', 'Start'])
+        self.assertEqual(str(df['MSISDN/Number'].dtype), 'Int64')
+        self.assertEqual(df['Avg RTT DL (ms)'].dtype, np.float32)
+        self.assertEqual(str(df['Handset Type'].dtype), 'category')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['Start']))
+        self.assertEqual(df['MSISDN/Number'].iloc[0], 33664962239)
+        conn.close()
+
+    def test_memory_savings(self):
+        report = memory_savings(self.raw)
+        self.assertEqual(list(report.columns), ['column', 'before_bytes', 'after_bytes', 'saved_bytes'])
+        rtt = report.set_index('column').loc['Avg RTT DL (ms)']
+        self.assertEqual(rtt['saved_bytes'], rtt['before_bytes'] - rtt['after_bytes'])
+        self.assertGreater(rtt['saved_bytes'], 0)
+
+    def test_apply_schema_parses_numeric_strings(self):
+        df = apply_schema(pd.DataFrame({'Avg RTT UL (ms)': ['5', 'bad', None]}))
+        self.assertEqual(df['Avg RTT UL (ms)'].dtype, np.float32)
+        self.assertTrue(np.isnan(df['Avg RTT UL (ms)'].iloc[1]))
+
+if __name__ == '__main__':
+    unittest.main()